@@ -1,18 +1,35 @@
 import requests
-from bs4 import BeautifulSoup
 import time
-import random
-import json
-import csv
-from datetime import datetime
-import re
+from datetime import datetime, timedelta
 import os
-from flask import Flask, render_template, request, jsonify, send_file, session
-from werkzeug.utils import secure_filename
+import re
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, g
 import uuid
 import sqlite3
 import logging
 import traceback
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from task_queue import TaskQueue
+from rate_limiter import RateLimiter
+from http_cache import DetailCache
+from dedupe import ERROR_DESCRIPTION_PREFIX, TIMEOUT_DESCRIPTION, JobDeduper, failed_fetch, linkedin_job_id
+from replay import FixtureStore, RecordingAdapter, ReplayAdapter
+from transport import ACCEPT_ENCODING, create_adapter, read_body, shared_adapter
+import browse
+import exports
+import fulltext
+import metrics
+import parse_pool
+import rollups
+import saved_searches
+import skill_analytics
+from schema import migrate
+from pipeline import JobAnalytics, JobPipeline, DatabaseWriter, JsonStreamWriter, CsvStreamWriter
+from records import JobRecord
+from query_cache import QueryCache, SQLiteStore
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -24,252 +41,468 @@ app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-for-render')
 # SQLite Database Configuration
 DATABASE = 'job_analytics.db'
 
+# Detail enrichment configuration
+ENRICH_TIME_BUDGET = int(os.environ.get('ENRICH_TIME_BUDGET', 60))  # seconds per search
+ENRICH_DEFAULT_CONCURRENCY = int(os.environ.get('ENRICH_CONCURRENCY', 4))
+ENRICH_HOST_CONCURRENCY = {
+    'www.linkedin.com': ENRICH_DEFAULT_CONCURRENCY,
+}
+# Politeness budget: (requests per second, burst) per LinkedIn endpoint,
+# shared by every scraper in the process
+ENDPOINT_RATE_LIMITS = {
+    'search': (float(os.environ.get('SEARCH_RPS', 0.5)), 2),
+    'job_detail': (float(os.environ.get('DETAIL_RPS', 4)), 4),
+}
+SEARCH_URL = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+REQUEST_MAX_RETRIES = 3
+MAX_CONSECUTIVE_PAGE_ERRORS = 2
+PAGE_RETRY_BACKOFF = 2  # seconds before a failed search page is tried again, doubling per failure
+PAGE_RETRY_MAX_BACKOFF = 60
+
+# On-disk cache of job detail pages ('' disables it)
+DETAIL_CACHE_DIR = os.environ.get('DETAIL_CACHE_DIR', os.path.join('.cache', 'job_details'))
+DETAIL_CACHE_TTL = int(os.environ.get('DETAIL_CACHE_TTL', 24 * 3600))  # seconds
+DETAIL_CACHE_MAX_MB = int(os.environ.get('DETAIL_CACHE_MAX_MB', 256))
+# Bump whenever detail parsing or skill extraction changes to ignore cached parse results
+DETAIL_PARSER_VERSION = 2
+
+# Offline mode: answer LinkedIn requests from recorded fixtures ('' uses the network)
+REPLAY_DIR = os.environ.get('REPLAY_DIR', '')
+REPLAY_LATENCY = float(os.environ.get('REPLAY_LATENCY', 0))  # seconds added to every response
+REPLAY_ERROR_RATE = float(os.environ.get('REPLAY_ERROR_RATE', 0))  # share of requests answered with 503
+# Save live responses here so they can be replayed later ('' disables recording)
+RECORD_DIR = os.environ.get('RECORD_DIR', '')
+
+# Skip detail fetches for postings already stored with their details
+SKIP_KNOWN_JOBS = os.environ.get('SKIP_KNOWN_JOBS', '1') != '0'
+DEDUPE_FALSE_POSITIVE_RATE = 0.01
+
+# Background search workers per process
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS', 2))
+
+# Connection pool shared by all scrapers in the process: room for every
+# worker's search request and detail fetches at once
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', max(10, SEARCH_WORKERS * (ENRICH_DEFAULT_CONCURRENCY + 1))))
+# Send through httpx with HTTP/2 (needs httpx[http2] installed)
+HTTP2_ENABLED = os.environ.get('HTTP2', '0') == '1'
+# Detail pages are read only up to the end of the job criteria list, which
+# follows the description; the similar-jobs markup after it is skipped
+DETAIL_EARLY_STOP = os.environ.get('DETAIL_EARLY_STOP', '1') != '0'
+DETAIL_STOP_AFTER = (b'description__job-criteria-list', b'</ul>')
+DETAIL_MAX_BYTES = 2 * 1024 * 1024
+# Worker processes for HTML parsing and skill extraction (0 parses on the calling thread)
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', 0))
+PROGRESS_INTERVAL = 1.0  # seconds between task progress writes
+PARTIAL_RESULTS_LIMIT = 100  # most recent jobs kept for /tasks/<id>/results
+ANALYTICS_MAX_LIMIT = 100  # most rows a top-N analytics endpoint returns
+SKILL_TREND_MAX_WEEKS = 52  # longest week-over-week series /api/analytics/skill-trends returns
+# Search result ceiling and paging: LinkedIn serves at most about 1000 results per query
+SEARCH_DEFAULT_RESULTS = 25
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 1000))
+SEARCH_MAX_PAGES = 100
+SEARCH_PREFETCH_PAGES = int(os.environ.get('SEARCH_PREFETCH_PAGES', 2))  # result pages fetched ahead
+SEARCH_DEFAULT_DETAILS = int(os.environ.get('SEARCH_DEFAULT_DETAILS', 50))  # jobs enriched unless asked otherwise
+SAVED_SEARCH_MAX_RESULTS = 200  # most new postings one saved search refresh collects
+SAVED_SEARCH_MAX_PAGES = 10  # pages a refresh reads before giving up on reaching known postings
+DELTA_FEED_MAX_LIMIT = 500  # page size cap for the saved search delta feed
+SEARCH_MAX_PER_PAGE = 100  # page size cap for /jobs/search
+BROWSE_DEFAULT_LIMIT = 25
+BROWSE_MAX_LIMIT = 200  # page size cap for /api/jobs and /api/sessions
+RESULTS_TOP_LIMIT = 20  # skills and locations on the /results analysis tabs
+
+# Aggregate and analytics results are cached until the data changes or the TTL runs out
+QUERY_CACHE_TTL = int(os.environ.get('QUERY_CACHE_TTL', 60))  # seconds, 0 disables the cache
+QUERY_CACHE_ENTRIES = int(os.environ.get('QUERY_CACHE_ENTRIES', 256))
+QUERY_CACHE_PATH = os.environ.get('QUERY_CACHE_PATH', '')  # SQLite file shared by the workers of a host
+
+# Connection tuning applied to every pooled connection
+DB_PRAGMAS = (
+    ('journal_mode', 'WAL'),      # readers never block the writer
+    ('synchronous', 'NORMAL'),    # safe with WAL, avoids an fsync per commit
+    ('cache_size', -16000),       # 16 MB page cache
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+DB_BUSY_TIMEOUT = 30  # seconds to wait for the write lock
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection owned by one thread; close() hands it back to the pool"""
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def release(self):
+        super().close()
+
+_db_local = threading.local()
+
 def get_db_connection():
-    """Get SQLite database connection"""
-    conn = sqlite3.connect(DATABASE)
+    """Get the calling thread's pooled SQLite connection"""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is not None and _db_local.database == DATABASE:
+        return conn
+    if conn is not None:
+        conn.release()
+    conn = sqlite3.connect(DATABASE, timeout=DB_BUSY_TIMEOUT, factory=PooledConnection)
     conn.row_factory = sqlite3.Row
+    for pragma, value in DB_PRAGMAS:
+        conn.execute(f'PRAGMA {pragma} = {value}')
+    _db_local.conn = conn
+    _db_local.database = DATABASE
+    ensure_database()
     return conn
 
+_initialized_databases = set()
+_init_lock = threading.RLock()
+
+def ensure_database():
+    """Initialize DATABASE the first time this process connects to it
+
+    Lazy, so gunicorn workers migrate before their first query while the
+    CLIs that import this module can point DATABASE elsewhere first.
+    """
+    if DATABASE in _initialized_databases or getattr(_db_local, 'initializing', False):
+        return
+    with _init_lock:
+        if DATABASE not in _initialized_databases:
+            init_database()
+
 def init_database():
     """Initialize SQLite database tables"""
+    with _init_lock:
+        _db_local.initializing = True
+        try:
+            _init_database()
+        finally:
+            _db_local.initializing = False
+            _initialized_databases.add(DATABASE)
+
+def _init_database():
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
         logger.info("Initializing database tables...")
         
-        # Create search_sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS search_sessions (
-                id TEXT PRIMARY KEY,
-                keywords TEXT,
-                location TEXT,
-                max_results INTEGER,
-                use_auth BOOLEAN,
-                searched_at DATETIME,
-                total_jobs INTEGER
-            )
-        ''')
-        
-        # Create jobs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT,
-                title TEXT,
-                company TEXT,
-                location TEXT,
-                url TEXT,
-                post_date TEXT,
-                scraped_at DATETIME,
-                source TEXT,
-                description TEXT,
-                industry TEXT,
-                FOREIGN KEY (session_id) REFERENCES search_sessions(id)
-            )
-        ''')
-        
-        # Create job_skills table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS job_skills (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                job_id INTEGER,
-                skill TEXT,
-                FOREIGN KEY (job_id) REFERENCES jobs(id)
-            )
-        ''')
+        # Create or migrate the job tables
+        version = migrate(conn)
         
-        # Create indexes for better performance
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_id ON jobs(session_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_skill ON job_skills(skill)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_id ON job_skills(job_id)')
+        # Create background task queue table
+        TaskQueue.init_schema(cursor)
         
         conn.commit()
         conn.close()
-        logger.info("Database initialized successfully")
+        logger.info(f"Database initialized successfully (schema version {version})")
+        
+        if deduper:
+            deduper.load(background=True)
         
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
 
+rate_limiter = RateLimiter(ENDPOINT_RATE_LIMITS)
+
+def create_detail_cache():
+    """Create the job detail page cache, or None if disabled/unavailable"""
+    if not DETAIL_CACHE_DIR:
+        return None
+    try:
+        return DetailCache(DETAIL_CACHE_DIR, ttl=DETAIL_CACHE_TTL, max_bytes=DETAIL_CACHE_MAX_MB * 1024 * 1024)
+    except OSError as e:
+        logger.warning(f"Detail cache disabled: {e}")
+        return None
+
+def create_query_cache():
+    """Create the query result cache, shared with the other workers if QUERY_CACHE_PATH is set"""
+    store = None
+    if QUERY_CACHE_PATH:
+        try:
+            store = SQLiteStore(QUERY_CACHE_PATH, QUERY_CACHE_ENTRIES)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Shared query cache disabled, caching per process: {e}")
+    return QueryCache('queries', entries=QUERY_CACHE_ENTRIES, ttl=QUERY_CACHE_TTL, store=store)
+
+detail_cache = create_detail_cache()
+query_cache = create_query_cache()
+deduper = JobDeduper(get_db_connection, DEDUPE_FALSE_POSITIVE_RATE) if SKIP_KNOWN_JOBS else None
+
+_replay_store = None
+
+def create_transport(pool_size=None):
+    """The requests adapter scrapers send through: replay, recording or the network
+
+    Recording and network adapters are shared by every scraper in the
+    process, so connections stay open from one search to the next.
+    """
+    global _replay_store
+    pool_size = pool_size or HTTP_POOL_SIZE
+    if REPLAY_DIR:
+        if _replay_store is None or _replay_store.directory != REPLAY_DIR:
+            _replay_store = FixtureStore(REPLAY_DIR)
+        return ReplayAdapter(_replay_store, latency=REPLAY_LATENCY, error_rate=REPLAY_ERROR_RATE)
+    if RECORD_DIR:
+        return shared_adapter(
+            lambda: RecordingAdapter(RECORD_DIR, pool_connections=pool_size, pool_maxsize=pool_size))
+    return shared_adapter(lambda: create_adapter(pool_size, http2=HTTP2_ENABLED))
+
+def page_retry_delay(page_errors):
+    """Seconds to wait before trying a search page again after page_errors failures in a row"""
+    return min(PAGE_RETRY_BACKOFF * 2 ** (page_errors - 1), PAGE_RETRY_MAX_BACKOFF)
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+def host_concurrency(host):
+    """Maximum number of in-flight detail requests allowed for a host"""
+    return ENRICH_HOST_CONCURRENCY.get(host, ENRICH_DEFAULT_CONCURRENCY)
+
+def get_host_semaphore(host):
+    """Shared semaphore capping concurrent requests to a host across all scrapers"""
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(max(1, host_concurrency(host)))
+            _host_semaphores[host] = semaphore
+        return semaphore
+
 class AdvancedLinkedInScraper:
-    def __init__(self, session_cookie=None, user_agent=None):
+    def __init__(self, session_cookie=None, user_agent=None, progress_callback=None, transport=None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         })
+        # Cookies stay in this scraper's session; connections come from the shared adapter
+        adapter = transport or create_transport()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.recorder = adapter if isinstance(adapter, RecordingAdapter) else None
         
         if session_cookie:
             self.session.cookies.set('li_at', session_cookie)
             logger.info("Session cookie set for authenticated access")
             
         self.jobs_data = []
-        self.rate_limit_delay = random.uniform(2, 4)
+        self.rate_limit_wait = 0.0
+        self.dedupe_checked = 0
+        self.dedupe_hits = 0
         self.request_timeout = 20
         self.start_time = datetime.now()
+        self.progress_callback = progress_callback
+
+    def _request(self, url, endpoint, params=None, timeout=None, headers=None, stop_after=None):
+        """GET through the shared rate limiter, retrying throttled and failed requests
 
-    def search_jobs_public_api(self, keywords, location=None, max_results=7):  # Changed to 6
+        Returns (response, body). With stop_after, the body is streamed and
+        reading stops once it has been seen (see transport.read_body).
+        """
+        for attempt in range(REQUEST_MAX_RETRIES + 1):
+            waited = rate_limiter.acquire(endpoint)
+            self.rate_limit_wait += waited
+            metrics.RATE_LIMIT_WAIT_SECONDS.inc(waited, endpoint=endpoint)
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=timeout or self.request_timeout, stream=bool(stop_after))
+                metrics.HTTP_TTFB_SECONDS.observe(response.elapsed.total_seconds(), endpoint=endpoint)
+                body = read_body(response, stop_after, DETAIL_MAX_BYTES if stop_after else None)
+                if body.truncated:
+                    metrics.HTTP_EARLY_STOPS.inc(endpoint=endpoint)
+                if self.recorder:
+                    self.recorder.record(response, body)
+            except requests.exceptions.RequestException as e:
+                metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=type(e).__name__)
+                if not isinstance(e, requests.exceptions.ConnectionError):
+                    raise
+                rate_limiter.record(endpoint, None)
+                if attempt == REQUEST_MAX_RETRIES:
+                    raise
+                logger.warning(f"Connection error on {endpoint}, retrying ({attempt + 1}/{REQUEST_MAX_RETRIES})")
+                continue
+            metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+            metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+            metrics.HTTP_RESPONSE_BYTES.observe(len(body.content), endpoint=endpoint)
+            version = getattr(response.raw, 'version', None)
+            if version:
+                metrics.HTTP_VERSIONS.inc(version=f'HTTP/{version // 10}' + (f'.{version % 10}' if version < 20 else ''))
+            
+            rate_limiter.record(endpoint, response.status_code, response.headers)
+            if (response.status_code == 429 or response.status_code >= 500) and attempt < REQUEST_MAX_RETRIES:
+                logger.warning(f"HTTP {response.status_code} on {endpoint}, retrying ({attempt + 1}/{REQUEST_MAX_RETRIES})")
+                continue
+            response.raise_for_status()
+            return response, body
+
+    def _report_progress(self, stage, **info):
+        """Forward progress to the callback, if any (may raise to abort)"""
+        if self.progress_callback:
+            self.progress_callback(stage, **info)
+
+    def search_jobs_public_api(self, keywords, location=None, max_results=SEARCH_DEFAULT_RESULTS):
         """Search using LinkedIn's public API"""
-        logger.info(f"Searching public API for: {keywords} in {location}")
-        base_url = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
-        params = {'keywords': keywords, 'location': location, 'start': 0}
+        self.jobs_data.extend(self.iter_jobs(keywords, location, max_results))
+        return self.jobs_data
+
+    def search_jobs_authenticated(self, keywords, location=None, max_results=SEARCH_DEFAULT_RESULTS):
+        """Search using authenticated session"""
+        self.jobs_data.extend(self.iter_jobs(keywords, location, max_results, authenticated=True))
+        return self.jobs_data
+
+    def iter_jobs_public_api(self, keywords, location=None, max_results=SEARCH_DEFAULT_RESULTS):
+        """Yield jobs from LinkedIn's public API page by page"""
+        return self.iter_jobs(keywords, location, max_results)
+
+    def iter_jobs_authenticated(self, keywords, location=None, max_results=SEARCH_DEFAULT_RESULTS):
+        """Yield jobs from an authenticated search page by page"""
+        return self.iter_jobs(keywords, location, max_results, authenticated=True)
+
+    def iter_jobs(self, keywords, location=None, max_results=SEARCH_DEFAULT_RESULTS, authenticated=False,
+                  sort_by=None, page_filter=None, max_pages=SEARCH_MAX_PAGES, prefetch=SEARCH_PREFETCH_PAGES):
+        """Yield up to max_results jobs of a search, in result order
+
+        The first page tells how many cards a page holds, which fixes every
+        later page's offset. From then on up to prefetch pages are fetched
+        ahead in the background while the current one is consumed. Paging
+        stops at an empty page, max_results or max_pages (pages can come back
+        short before the end, so a short page is not taken as the last one).
+        page_filter, if given, maps a page's
+        jobs to (jobs to keep, stop after this page). A posting repeated on
+        a later page (results shift while paging) is yielded once.
+        """
+        mode = 'authenticated' if authenticated else 'public API'
+        logger.info(f"Searching ({mode}) for: {keywords} in {location}, up to {max_results} jobs")
         
+        page_size = None
+        page = 0
         jobs_collected = 0
-        max_pages = min(max_results // 7, 10)  # Reduced pages for 6 results
+        page_errors = 0
+        seen = set()
+        ahead = {}  # page number -> future of that page, fetched in the background
+        executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix='search') if prefetch > 0 else None
         
-        for page in range(max_pages):
-            try:
-                params['start'] = page * 7
-                logger.info(f"Fetching page {page + 1} from public API")
-                
-                response = self.session.get(base_url, params=params, timeout=self.request_timeout)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                job_cards = soup.find_all('div', class_='base-card')
+        def fetch(number):
+            return self.fetch_search_page(keywords, location, number * (page_size or 0), authenticated, sort_by)
+        
+        try:
+            while page < max_pages and jobs_collected < max_results:
+                future = ahead.pop(page, None)
+                try:
+                    page_jobs, cards = future.result() if future else fetch(page)
+                except Exception as e:
+                    logger.error(f"Error fetching search page {page + 1}: {e}")
+                    # Retries already happened in _request; try the page again unless errors persist
+                    page_errors += 1
+                    if page_errors >= MAX_CONSECUTIVE_PAGE_ERRORS:
+                        break
+                    time.sleep(page_retry_delay(page_errors))
+                    continue
+                page_errors = 0
                 
-                if not job_cards:
+                if not cards:
                     logger.info("No more job cards found")
                     break
+                if page_size is None:
+                    page_size = cards
                 
-                for card in job_cards:
-                    if jobs_collected >= max_results:
-                        break
-                        
-                    job_data = self._parse_job_card_public(card)
-                    if job_data:
-                        self.jobs_data.append(job_data)
-                        jobs_collected += 1
+                stop = False
+                if page_filter:
+                    page_jobs, stop = page_filter(page_jobs)
+                fresh = []
+                for job in page_jobs:
+                    key = job.job_id or job.url
+                    if key and key in seen:
+                        continue
+                    seen.add(key)
+                    fresh.append(job)
+                fresh = fresh[:max_results - jobs_collected]
+                jobs_collected += len(fresh)
+                page += 1
                 
-                time.sleep(self.rate_limit_delay)
+                done = stop or jobs_collected >= max_results
+                pages = min(max_pages, page + -(-(max_results - jobs_collected) // page_size))
+                if executor and not done:
+                    for number in range(page, min(page + prefetch, pages)):
+                        if number not in ahead:
+                            ahead[number] = executor.submit(fetch, number)
                 
-            except Exception as e:
-                logger.error(f"Error during public API job search: {e}")
-                break
+                self._report_progress('searching', page=page, pages=page if done else pages,
+                                      jobs_found=jobs_collected)
+                yield from fresh
+                if done:
+                    break
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
         
-        logger.info(f"Public API search completed. Found {len(self.jobs_data)} jobs")
-        return self.jobs_data
+        logger.info(f"Search ({mode}) completed. Found {jobs_collected} jobs in {page} pages")
 
-    def search_jobs_authenticated(self, keywords, location=None, max_results=6):  # Changed to 6
-        """Search using authenticated session"""
-        logger.info(f"Searching with authentication for: {keywords} in {location}")
-        
-        base_url = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
-        params = {'keywords': keywords, 'location': location, 'start': 0}
-        
-        jobs_collected = 0
-        max_pages = min(max_results // 7, 10)  # Reduced pages for 6 results
+    def iter_new_jobs(self, keywords, location, seen_job_ids, newest_post_date, max_results):
+        """Yield postings that appeared since a saved search last ran, newest first
+
+        Results are requested sorted by date, so paging stops at the first page
+        that reaches a posting seen before (or one older than newest_post_date).
+        That is usually the first page, so nothing is fetched ahead.
+        """
+        logger.info(f"Refreshing saved search for: {keywords} in {location}")
+        seen_job_ids = set(seen_job_ids)
         
-        for page in range(max_pages):
-            try:
-                params['start'] = page * 6
-                logger.info(f"Fetching authenticated page {page + 1}")
-                
-                response = self.session.get(base_url, params=params, timeout=self.request_timeout)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                job_cards = soup.find_all('div', class_='base-card')
-                
-                if not job_cards:
-                    logger.info("No more job cards found in authenticated search")
-                    break
-                
-                for card in job_cards:
-                    if jobs_collected >= max_results:
-                        break
-                        
-                    job_data = self._parse_job_card_authenticated(card)
-                    if job_data:
-                        self.jobs_data.append(job_data)
-                        jobs_collected += 1
-                
-                time.sleep(self.rate_limit_delay)
-                
-            except Exception as e:
-                logger.error(f"Error during authenticated job search: {e}")
-                break
+        def new_postings(page_jobs):
+            new_jobs = []
+            reached_known = False
+            for job in page_jobs:
+                if not job.job_id:
+                    # Cannot be recognised later, so only the first run reports it
+                    if not seen_job_ids:
+                        new_jobs.append(job)
+                elif job.job_id in seen_job_ids or (
+                        newest_post_date and job.post_date and job.post_date < newest_post_date):
+                    reached_known = True
+                else:
+                    new_jobs.append(job)
+            return new_jobs, reached_known
         
-        logger.info(f"Authenticated search completed. Found {len(self.jobs_data)} jobs")
-        return self.jobs_data
+        return self.iter_jobs(keywords, location, max_results, sort_by='DD', page_filter=new_postings,
+                              max_pages=SAVED_SEARCH_MAX_PAGES, prefetch=0)
 
-    def _parse_job_card_public(self, card):
-        """Parse job card from public API"""
-        try:
-            title_elem = card.find('h3', class_='base-search-card__title')
-            company_elem = card.find('h4', class_='base-search-card__subtitle')
-            location_elem = card.find('span', class_='job-search-card__location')
-            
-            if not all([title_elem, company_elem, location_elem]):
-                return None
-                
-            title = title_elem.text.strip()
-            company = company_elem.text.strip()
-            location = location_elem.text.strip()
-            
-            link_elem = card.find('a', class_='base-card__full-link')
-            job_url = link_elem['href'] if link_elem else None
-            
-            if job_url and '?' in job_url:
-                job_url = job_url.split('?')[0]
-            
-            time_elem = card.find('time', class_='job-search-card__listdate')
-            post_date = time_elem['datetime'] if time_elem else None
-            
-            return {
-                'title': title,
-                'company': company,
-                'location': location,
-                'url': job_url,
-                'post_date': post_date,
-                'scraped_at': datetime.now().isoformat(),
-                'source': 'public_api'
-            }
-            
-        except Exception as e:
-            logger.error(f"Error parsing public job card: {e}")
-            return None
+    def fetch_search_page(self, keywords, location, start, authenticated=False, sort_by=None):
+        """Fetch one page of search results from offset start
 
-    def _parse_job_card_authenticated(self, card):
-        """Parse job card for authenticated users"""
+        Returns (jobs, cards): the usable jobs and the number of cards on the
+        page, which is what the next page's offset advances by. sort_by='DD'
+        asks for the newest postings first.
+        """
+        params = {'keywords': keywords, 'location': location, 'start': start}
+        if sort_by:
+            params['sortBy'] = sort_by
+        _, body = self._request(SEARCH_URL, 'search', params=params)
+        source = 'authenticated' if authenticated else 'public_api'
+        job_cards, seconds = parse_pool.run(parse_pool.parse_cards, body.text, PARSE_WORKERS)
+        jobs = [job for job in (self._parse_job_card(card, source) for card in job_cards) if job]
+        metrics.STAGE_SECONDS.observe(seconds, stage='parse_cards')
+        metrics.STAGE_ITEMS.inc(len(job_cards), stage='parse_cards')
+        return jobs, len(job_cards)
+
+    def _parse_job_card(self, card, source='public_api'):
+        """Build a job from the fields of a search result card"""
         try:
-            title_elem = card.find('h3', class_='base-search-card__title')
-            company_elem = card.find('h4', class_='base-search-card__subtitle')
-            location_elem = card.find('span', class_='job-search-card__location')
-            
-            if not all([title_elem, company_elem, location_elem]):
+            if not card:
                 return None
-                
-            title = title_elem.text.strip()
-            company = company_elem.text.strip()
-            location = location_elem.text.strip()
-            
-            link_elem = card.find('a', class_='base-card__full-link')
-            job_url = link_elem['href'] if link_elem else None
             
+            job_url = card['url']
             if job_url:
                 if '?' in job_url:
                     job_url = job_url.split('?')[0]
                 if job_url.startswith('/'):
                     job_url = f"https://www.linkedin.com{job_url}"
             
-            time_elem = card.find('time', class_='job-search-card__listdate')
-            post_date = time_elem['datetime'] if time_elem else None
-            
-            return {
-                'title': title,
-                'company': company,
-                'location': location,
-                'url': job_url,
-                'post_date': post_date,
-                'scraped_at': datetime.now().isoformat(),
-                'source': 'authenticated'
-            }
+            return JobRecord(card['title'], card['company'], card['location'], job_url, linkedin_job_id(job_url),
+                             card['post_date'], datetime.now().isoformat(), source)
             
         except Exception as e:
-            logger.error(f"Error parsing authenticated job card: {e}")
+            logger.error(f"Error parsing job card: {e}")
             return None
 
     def get_job_details(self, job_url):
@@ -278,203 +511,188 @@ class AdvancedLinkedInScraper:
             if not job_url:
                 return {}
                 
+            entry = detail_cache.lookup(job_url) if detail_cache else None
+            if entry and entry.truncated and entry.details(DETAIL_PARSER_VERSION) is None:
+                # Cut off after what an older parser needed: fetch the whole page again
+                entry = None
+            if entry and entry.fresh:
+                metrics.DETAIL_LOOKUPS.inc(source='cache')
+                return entry.details(DETAIL_PARSER_VERSION) or self._parse_job_details(entry.body)
+            
             logger.info(f"Fetching job details from: {job_url[:100]}...")
             
             detail_timeout = 15
             
-            response = self.session.get(job_url, timeout=detail_timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            description = ""
-            description_selectors = [
-                'div.description__text',
-                'section.description',
-                'div.description',
-                'div.job-details',
-                'div.job-description'
-            ]
+            response, body = self._request(job_url, 'job_detail', timeout=detail_timeout,
+                                           headers=entry.validators() if entry else None,
+                                           stop_after=DETAIL_STOP_AFTER if DETAIL_EARLY_STOP else None)
             
-            for selector in description_selectors:
-                desc_elem = soup.select_one(selector)
-                if desc_elem:
-                    description = desc_elem.get_text(separator='\n').strip()
-                    if description:
-                        break
+            if response.status_code == 304 and entry:
+                details = entry.details(DETAIL_PARSER_VERSION) or self._parse_job_details(entry.body)
+                detail_cache.mark_revalidated(entry, details, DETAIL_PARSER_VERSION)
+                metrics.DETAIL_LOOKUPS.inc(source='revalidated')
+                return details
             
-            if not description:
-                main_content = soup.find('main') or soup.find('body')
-                if main_content:
-                    description = main_content.get_text(separator='\n').strip()[:2000]
-            
-            skills = self._extract_skills_from_text(description)
-            industry = self._extract_industry(soup)
-            
-            return {
-                'description': description[:5000],
-                'skills': skills,
-                'industry': industry
-            }
+            details = self._parse_job_details(body.text)
+            if detail_cache:
+                detail_cache.store(job_url, body.text, response.headers, details, DETAIL_PARSER_VERSION,
+                                   truncated=body.truncated)
+            metrics.DETAIL_LOOKUPS.inc(source='fetched')
+            return details
             
         except requests.exceptions.Timeout:
             logger.warning(f"Timeout fetching job details from: {job_url[:100]}...")
-            return {'description': 'Timeout fetching details', 'skills': [], 'industry': ''}
+            metrics.DETAIL_LOOKUPS.inc(source='failed')
+            return {'description': TIMEOUT_DESCRIPTION, 'skills': [], 'industry': ''}
         except Exception as e:
             logger.warning(f"Error getting job details: {e}")
-            return {'description': f'Error: {str(e)}', 'skills': [], 'industry': ''}
-
-    def _extract_skills_from_text(self, text):
-        """Extract technical skills from job description text"""
-        skill_patterns = [
-            r'\b(?:Python|Java|JavaScript|TypeScript|SQL|R|Scala|C\+\+|C#|Go|Ruby|PHP|Swift|Kotlin)\b',
-            r'\b(?:AWS|Azure|GCP|Google Cloud Platform|Amazon Web Services|Microsoft Azure)\b',
-            r'\b(?:Docker|Kubernetes|Terraform|Ansible|Jenkins|GitLab CI|GitHub Actions)\b',
-            r'\b(?:Spark|Hadoop|Kafka|Airflow|Tableau|Power BI|Looker|Snowflake)\b',
-            r'\b(?:TensorFlow|PyTorch|Keras|scikit-learn|MLlib|OpenCV|NLTK|spaCy)\b',
-            r'\b(?:React|Angular|Vue\.js|Node\.js|Django|Flask|Spring Boot|Express\.js)\b',
-            r'\b(?:MySQL|PostgreSQL|MongoDB|Redis|Cassandra|Elasticsearch|DynamoDB)\b',
-            r'\b(?:Git|SVN|Mercurial|JIRA|Confluence|Slack|Trello|Asana)\b',
-            r'\b(?:REST|GraphQL|SOAP|JSON|XML|Microservices|API)\b',
-            r'\b(?:Agile|Scrum|Kanban|Waterfall|DevOps|CI/CD)\b'
-        ]
-        
-        skills = set()
-        for pattern in skill_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            skills.update(match for match in matches)
-        
-        return list(skills)
+            metrics.DETAIL_LOOKUPS.inc(source='failed')
+            return {'description': f'{ERROR_DESCRIPTION_PREFIX}{str(e)}', 'skills': [], 'industry': ''}
 
-    def _extract_industry(self, soup):
-        """Extract industry from job details"""
-        try:
-            criteria_items = soup.find_all('li', class_='description__job-criteria-item')
-            for item in criteria_items:
-                subtitle = item.find('h3', class_='description__job-criteria-subtitle')
-                text = item.find('span', class_='description__job-criteria-text')
-                if subtitle and text and 'industry' in subtitle.text.lower():
-                    return text.text.strip()
-        except Exception as e:
-            logger.debug(f"Could not extract industry: {e}")
-        return "Not specified"
+    def _stored_details(self, job):
+        """Details of a posting stored by an earlier search, or None if they must be fetched"""
+        if deduper is None or not job.job_id:
+            return None
+        self.dedupe_checked += 1
+        details = deduper.stored_details(job.job_id)
+        if details is not None:
+            self.dedupe_hits += 1
+            metrics.DETAIL_LOOKUPS.inc(source='stored')
+        return details
+
+    def dedupe_stats(self):
+        return {
+            'checked': self.dedupe_checked,
+            'known': self.dedupe_hits,
+            'hit_rate': round(self.dedupe_hits / self.dedupe_checked, 3) if self.dedupe_checked else 0.0
+        }
+
+    def _parse_job_details(self, html):
+        """Parse description, skills and industry from a job detail page (in a parse worker, if enabled)"""
+        details, parse_seconds, extract_seconds = parse_pool.run(parse_pool.parse_details, html, PARSE_WORKERS)
+        metrics.STAGE_SECONDS.observe(parse_seconds, stage='parse_details')
+        metrics.STAGE_SECONDS.observe(extract_seconds, stage='skill_extraction')
+        metrics.STAGE_ITEMS.inc(len(details['skills']), stage='skill_extraction')
+        return details
 
     def analyze_skills_frequency(self):
         """Analyze frequency of skills in job descriptions"""
-        skill_counter = {}
-        for job in self.jobs_data:
-            if 'details' in job and 'skills' in job['details']:
-                for skill in job['details']['skills']:
-                    skill_counter[skill] = skill_counter.get(skill, 0) + 1
-        
-        return sorted(skill_counter.items(), key=lambda x: x[1], reverse=True)
+        return self._analytics().skills_frequency()
 
     def analyze_geographic_trends(self):
         """Analyze geographic distribution of jobs"""
-        location_counter = {}
+        return self._analytics().geographic_trends()
+
+    def _analytics(self):
+        analytics = JobAnalytics()
         for job in self.jobs_data:
-            location = job.get('location', 'Unknown')
-            location_counter[location] = location_counter.get(location, 0) + 1
-        
-        return sorted(location_counter.items(), key=lambda x: x[1], reverse=True)
+            analytics.add(job)
+        return analytics
+
+    def enrich_jobs_with_details(self, max_details=6, max_workers=None):
+        """Enrich jobs with detailed information using a bounded thread pool"""
+        started = time.monotonic()
+        successful_details = sum(
+            1 for _, success in self.iter_enriched(self.jobs_data, max_details, max_workers) if success
+        )
+        elapsed = time.monotonic() - started
+        rate = successful_details / elapsed if elapsed > 0 else 0
+        logger.info(f"Successfully enriched {successful_details} jobs with details ({rate:.2f} jobs/sec)")
+        return successful_details
+
+    def iter_enriched(self, jobs, max_details=None, max_workers=None, deadline=None):
+        """Yield (job, enriched) pairs as detail fetches finish, keeping a bounded window in flight
 
-    def enrich_jobs_with_details(self, max_details=6):  # Changed to 6
-        """Enrich jobs with detailed information - limited to 6"""
-        jobs_to_process = min(len(self.jobs_data), max_details)
-        logger.info(f"Enriching {jobs_to_process} jobs with details")
+        Postings already stored with their details get them from the database.
+        Of the others, the first max_details jobs with a URL are enriched
+        concurrently; the rest (and anything arriving after the time budget is
+        spent) pass straight through. The budget ends at deadline (a time.time()
+        value), by default ENRICH_TIME_BUDGET after the search started.
+        """
+        if max_workers is None:
+            max_workers = max(ENRICH_HOST_CONCURRENCY.values(), default=ENRICH_DEFAULT_CONCURRENCY)
+        max_workers = max(1, max_workers)
+        window = max_workers * 2
+        if deadline is None:
+            deadline = self.start_time.timestamp() + ENRICH_TIME_BUDGET
+        total = max_details
         
-        successful_details = 0
-        for i, job in enumerate(self.jobs_data[:jobs_to_process]):
-            try:
-                if job.get('url'):
-                    logger.info(f"Getting details for job {i+1}/{jobs_to_process}")
-                    details = self.get_job_details(job['url'])
-                    if details:
-                        job['details'] = details
-                        if details.get('description') and details['description'] not in ['Timeout fetching details', '']:
-                            successful_details += 1
-                    
-                    time.sleep(random.uniform(1, 2))
-                    
-                    time_elapsed = (datetime.now() - self.start_time).total_seconds()
-                    if time_elapsed > 60:
-                        logger.info("Stopping job enrichment early to avoid timeout")
-                        break
-                        
-            except Exception as e:
-                logger.error(f"Error enriching job {i+1}: {e}")
-                continue
+        def enrich(job):
+            # Skip work that would start after the politeness budget is spent
+            if time.time() > deadline:
+                return None
+            with get_host_semaphore(urlparse(job.url).netloc):
+                if time.time() > deadline:
+                    return None
+                with metrics.STAGE_SECONDS.time(stage='enrich'):
+                    return self.get_job_details(job.url)
         
-        logger.info(f"Successfully enriched {successful_details} jobs with details")
-        return successful_details
+        submitted = 0
+        completed = 0
+        pending = {}
+        
+        def finished(timeout):
+            nonlocal completed
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = pending.pop(future)
+                success = False
+                try:
+                    details = future.result()
+                    # A failed fetch leaves the job unenriched, so the details stored earlier are kept
+                    if details and not failed_fetch(details.get('description')):
+                        job.set_details(details)
+                        success = bool(details.get('description'))
+                    if success and deduper:
+                        deduper.add(job.job_id)
+                except Exception as e:
+                    logger.error(f"Error enriching job '{job.title}': {e}")
+                completed += 1
+                yield job, success
+                self._report_progress('enriching', done=completed, total=total or submitted)
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enrich')
+        try:
+            for job in jobs:
+                stored = self._stored_details(job)
+                if stored is not None:
+                    job.set_details(stored)
+                    yield job, True
+                elif job.url and (max_details is None or submitted < max_details) and time.time() < deadline:
+                    pending[executor.submit(enrich, job)] = job
+                    submitted += 1
+                    while len(pending) >= window:
+                        yield from finished(None)
+                else:
+                    yield job, False
+                if pending:
+                    yield from finished(0)
+            
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    logger.info("Stopping job enrichment early to avoid timeout")
+                    break
+                yield from finished(remaining)
+            
+            # Jobs whose details did not arrive in time are passed through unenriched
+            for future, job in list(pending.items()):
+                future.cancel()
+                yield job, False
+            pending.clear()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def save_to_database(self, session_id, keywords, location, max_results, use_auth):
         """Save jobs data to SQLite database"""
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT id FROM search_sessions WHERE id = ?", (session_id,))
-            existing_session = cursor.fetchone()
-            
-            if existing_session:
-                logger.info(f"Session {session_id} already exists, skipping duplicate")
-                conn.close()
-                return True
-            
-            cursor.execute('''
-                INSERT INTO search_sessions (id, keywords, location, max_results, use_auth, searched_at, total_jobs)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (session_id, keywords, location, max_results, use_auth, datetime.now(), len(self.jobs_data)))
-            logger.info(f"Saved search session: {session_id}")
-            
-            jobs_saved = 0
-            skills_saved = 0
-            
-            for job_index, job in enumerate(self.jobs_data):
-                try:
-                    title = job.get('title', '')[:1000]
-                    company = job.get('company', '')[:500]
-                    job_location = job.get('location', '')[:500]
-                    url = job.get('url', '')[:1000]
-                    post_date = job.get('post_date', '')
-                    
-                    scraped_at_str = job.get('scraped_at')
-                    scraped_at = datetime.now()
-                    if scraped_at_str:
-                        try:
-                            scraped_at = datetime.fromisoformat(scraped_at_str.replace('Z', '+00:00'))
-                        except (ValueError, TypeError):
-                            scraped_at = datetime.now()
-                    
-                    source = job.get('source', 'unknown')
-                    description = job.get('details', {}).get('description', '')[:65000]
-                    industry = job.get('details', {}).get('industry', '')[:500]
-                    
-                    cursor.execute('''
-                        INSERT INTO jobs (session_id, title, company, location, url, post_date, scraped_at, source, description, industry)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (session_id, title, company, job_location, url, post_date, scraped_at, source, description, industry))
-                    
-                    job_id = cursor.lastrowid
-                    jobs_saved += 1
-                    
-                    if 'details' in job and 'skills' in job['details']:
-                        for skill in job['details']['skills']:
-                            if skill and len(skill) <= 255:
-                                cursor.execute('INSERT INTO job_skills (job_id, skill) VALUES (?, ?)', (job_id, skill))
-                                skills_saved += 1
-                    
-                    if job_index % 10 == 0:
-                        logger.info(f"Progress: {job_index + 1}/{len(self.jobs_data)} jobs saved")
-                        
-                except Exception as job_error:
-                    logger.error(f"Failed to save job {job_index}: {job_error}")
-                    continue
-            
-            conn.commit()
-            conn.close()
-            logger.info(f"Database save completed: {jobs_saved} jobs, {skills_saved} skills saved")
+            writer = DatabaseWriter(get_db_connection, session_id, keywords, location, max_results, use_auth)
+            writer.open()
+            try:
+                for job in self.jobs_data:
+                    writer.write(job)
+            finally:
+                writer.close()
             return True
             
         except Exception as e:
@@ -483,56 +701,24 @@ class AdvancedLinkedInScraper:
 
     def save_to_json(self, filename):
         """Save jobs data to JSON file"""
-        serializable_jobs = []
-        for job in self.jobs_data:
-            serializable_job = job.copy()
-            if 'scraped_at' in serializable_job and isinstance(serializable_job['scraped_at'], datetime):
-                serializable_job['scraped_at'] = serializable_job['scraped_at'].isoformat()
-            serializable_jobs.append(serializable_job)
-        
-        data = {
-            'jobs': serializable_jobs,
-            'metadata': {
-                'scraped_at': datetime.now().isoformat(),
-                'total_jobs': len(self.jobs_data),
-                'total_with_details': sum(1 for job in self.jobs_data if 'details' in job)
-            }
-        }
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-        
-        logger.info(f"Saved {len(self.jobs_data)} jobs to {filename}")
+        writer = JsonStreamWriter(filename).open()
+        try:
+            for job in self.jobs_data:
+                writer.write(job)
+        finally:
+            writer.close()
 
     def save_to_csv(self, filename):
         """Save jobs data to CSV file"""
         if not self.jobs_data:
             return
-            
-        fieldnames = ['title', 'company', 'location', 'url', 'post_date', 'scraped_at', 'source', 
-                     'description', 'industry', 'skills']
         
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
+        writer = CsvStreamWriter(filename).open()
+        try:
             for job in self.jobs_data:
-                row = {
-                    'title': job.get('title', ''),
-                    'company': job.get('company', ''),
-                    'location': job.get('location', ''),
-                    'url': job.get('url', ''),
-                    'post_date': job.get('post_date', ''),
-                    'scraped_at': job.get('scraped_at', ''),
-                    'source': job.get('source', ''),
-                    'description': job.get('details', {}).get('description', '')[:1000],
-                    'industry': job.get('details', {}).get('industry', ''),
-                    'skills': ', '.join(job.get('details', {}).get('skills', []))
-                }
-                
-                writer.writerow(row)
-        
-        logger.info(f"Saved {len(self.jobs_data)} jobs to {filename}")
+                writer.write(job)
+        finally:
+            writer.close()
 
 @app.errorhandler(500)
 def internal_error(error):
@@ -553,6 +739,142 @@ def not_found(error):
 def index():
     return render_template('index.html')
 
+def run_search_task(params, secrets, context):
+    """Run a full search as a background task, streaming jobs through
+    enrichment, analytics, the database and the export files as they arrive"""
+    keywords = params['keywords']
+    location = params.get('location', '')
+    max_results = params.get('max_results', SEARCH_DEFAULT_RESULTS)
+    use_auth = params.get('use_auth', False)
+    session_cookie = secrets.get('session_cookie')
+    saved_search_id = params.get('saved_search_id')
+    max_details = params.get('max_details', min(max_results, SEARCH_DEFAULT_DETAILS))
+    
+    status = {'stage': 'searching', 'message': 'Searching LinkedIn jobs'}
+    
+    def on_progress(stage, **info):
+        if stage == 'searching':
+            status['message'] = f"Fetched page {info['page']} ({info['jobs_found']} jobs found)"
+        elif stage == 'enriching':
+            status['message'] = f"Fetched details for {info['done']}/{info['total']} jobs"
+        status['stage'] = stage
+        context.check_cancelled()
+    
+    # Initialize scraper
+    scraper = AdvancedLinkedInScraper(
+        session_cookie=session_cookie if use_auth else None,
+        progress_callback=on_progress
+    )
+    
+    # Generate session id
+    session_id = str(uuid.uuid4())[:8]
+    
+    context.update(stage='searching', progress=0.02, message=status['message'])
+    if saved_search_id:
+        seen_job_ids, newest_post_date = saved_searches.watermark(get_db_connection(), saved_search_id)
+        jobs = scraper.iter_new_jobs(keywords, location, seen_job_ids, newest_post_date, max_results)
+    elif use_auth and session_cookie:
+        jobs = scraper.iter_jobs(keywords, location, max_results, authenticated=True)
+    else:
+        jobs = scraper.iter_jobs(keywords, location, max_results)
+    
+    db_writer = DatabaseWriter(get_db_connection, session_id, keywords, location, max_results, use_auth)
+    recent_jobs = deque(maxlen=PARTIAL_RESULTS_LIMIT)
+    found_jobs = []
+    successful_details = 0
+    last_update = time.monotonic()
+    
+    with JobPipeline([db_writer]) as pipeline:
+        for job, enriched in scraper.iter_enriched(jobs, max_details=max_details):
+            pipeline.feed(job)
+            if saved_search_id:
+                found_jobs.append({'job_id': job.job_id, 'post_date': job.post_date})
+            recent_jobs.append(job.summary())
+            successful_details += enriched
+            if time.monotonic() - last_update >= PROGRESS_INTERVAL:
+                last_update = time.monotonic()
+                context.update(stage=status['stage'], message=status['message'],
+                               progress=0.05 + 0.9 * pipeline.analytics.total_jobs / max(max_results, 1),
+                               partial_results=list(recent_jobs))
+    
+    analytics = pipeline.analytics
+    jobs_count = analytics.total_jobs
+    if saved_search_id:
+        saved_searches.record_run(get_db_connection(), saved_search_id, session_id, found_jobs)
+        if not jobs_count:
+            return {
+                'success': True,
+                'message': f"No new job listings for '{keywords}' in '{location}' since the last refresh",
+                'saved_search_id': saved_search_id,
+                'jobs_count': 0,
+                'dedupe': scraper.dedupe_stats()
+            }
+    if not jobs_count:
+        logger.info("No jobs found for search")
+        return {
+            'success': False,
+            'message': "No jobs found. Try different keywords or location."
+        }
+    
+    context.update(stage='analyzing', progress=0.98, message='Analyzing skills and locations',
+                   partial_results=list(recent_jobs))
+    skills_freq = analytics.skills_frequency()
+    geo_trends = analytics.geographic_trends()
+    
+    logger.info(f"Search completed successfully. Jobs found: {jobs_count}, "
+                f"rate limit wait: {scraper.rate_limit_wait:.1f}s")
+    return {
+        'success': True,
+        'message': f"Found {jobs_count} job listings for '{keywords}' in '{location}'",
+        'session_id': session_id,
+        'jobs_count': jobs_count,
+        'jobs_with_details': successful_details,
+        'top_skills': skills_freq[:6],  # Show top 6 skills
+        'top_locations': geo_trends[:6], # Show top 6 locations
+        'json_url': export_url(session_id, 'json'),
+        'csv_url': export_url(session_id, 'csv'),
+        'ndjson_url': export_url(session_id, 'ndjson'),
+        'results_url': f"/results?session_id={session_id}",
+        'db_success': pipeline.ok(db_writer),
+        'rate_limit_wait_seconds': round(scraper.rate_limit_wait, 2),
+        'dedupe': scraper.dedupe_stats(),
+        'saved_search_id': saved_search_id
+    }
+
+def export_url(session_id, fmt):
+    return f"/api/export?session_id={session_id}&format={fmt}"
+
+_task_queue = None
+_task_queue_lock = threading.Lock()
+
+def get_task_queue():
+    """Return the process task queue, starting its workers on first use"""
+    global _task_queue
+    with _task_queue_lock:
+        if _task_queue is None:
+            _task_queue = TaskQueue(get_db_connection, run_search_task, workers=SEARCH_WORKERS)
+            _task_queue.start()
+            if PARSE_WORKERS:
+                # Started with the search workers, so the first search does not wait for them
+                parse_pool.get_pool(PARSE_WORKERS)
+        return _task_queue
+
+def task_payload(task):
+    """Public view of a task row"""
+    return {
+        'task_id': task['id'],
+        'status': task['status'],
+        'stage': task['stage'],
+        'progress': task['progress'],
+        'message': task['message'],
+        'error': task['error'],
+        'result': task['result'],
+        'partial_count': len(task['partial_results'] or []),
+        'created_at': task['created_at'],
+        'started_at': task['started_at'],
+        'finished_at': task['finished_at']
+    }
+
 @app.route('/search', methods=['POST'])
 def search_jobs():
     try:
@@ -560,12 +882,16 @@ def search_jobs():
         location = request.form.get('location', '').strip()
         
         try:
-            max_results = int(request.form.get('max_results', 7))  # Changed default to 6
+            max_results = int(request.form.get('max_results', SEARCH_DEFAULT_RESULTS))
         except (ValueError, TypeError):
-            max_results = 7
-            
-        # Force max_results to be 6 regardless of user input
-        max_results = 7
+            max_results = SEARCH_DEFAULT_RESULTS
+        max_results = min(max(max_results, 1), SEARCH_MAX_RESULTS)
+        
+        try:
+            max_details = int(request.form['max_details'])
+        except (KeyError, ValueError, TypeError):
+            max_details = min(max_results, SEARCH_DEFAULT_DETAILS)
+        max_details = min(max(max_details, 0), max_results)
         
         use_auth = request.form.get('use_auth') == 'on'
         session_cookie = request.form.get('session_cookie', '').strip()
@@ -579,64 +905,22 @@ def search_jobs():
                 'message': "Please enter job keywords to search."
             })
         
-        # Initialize scraper
-        scraper = AdvancedLinkedInScraper(
-            session_cookie=session_cookie if use_auth else None
-        )
-        
-        # Perform search
-        logger.info("Starting job search...")
-        if use_auth and session_cookie:
-            jobs = scraper.search_jobs_authenticated(keywords, location, max_results)
-        else:
-            jobs = scraper.search_jobs_public_api(keywords, location, max_results)
-        
-        if not jobs:
-            logger.info("No jobs found for search")
-            return jsonify({
-                'success': False,
-                'message': "No jobs found. Try different keywords or location."
-            })
-        
-        # Enrich only 6 jobs with details
-        max_details = 7
-        logger.info(f"Enriching {max_details} jobs with details")
-        successful_details = scraper.enrich_jobs_with_details(max_details=max_details)
-        
-        # Analyze data
-        skills_freq = scraper.analyze_skills_frequency()
-        geo_trends = scraper.analyze_geographic_trends()
-        
-        # Generate filenames
-        session_id = str(uuid.uuid4())[:8]
-        json_filename = f"linkedin_jobs_{session_id}.json"
-        csv_filename = f"linkedin_jobs_{session_id}.csv"
-        
-        # Save to database
-        db_success = scraper.save_to_database(session_id, keywords, location, max_results, use_auth)
-        
-        # Save to files
-        try:
-            scraper.save_to_json(json_filename)
-            scraper.save_to_csv(csv_filename)
-        except Exception as file_error:
-            logger.error(f"File save error: {file_error}")
-        
-        # Prepare response data
-        response_data = {
-            'success': True,
-            'message': f"Found {len(jobs)} job listings for '{keywords}' in '{location}'",
-            'jobs_count': len(jobs),
-            'jobs_with_details': successful_details,
-            'top_skills': skills_freq[:6],  # Show top 6 skills
-            'top_locations': geo_trends[:6], # Show top 6 locations
-            'json_filename': json_filename,
-            'csv_filename': csv_filename,
-            'db_success': db_success
+        params = {
+            'keywords': keywords,
+            'location': location,
+            'max_results': max_results,
+            'max_details': max_details,
+            'use_auth': use_auth
         }
+        secrets = {'session_cookie': session_cookie} if use_auth and session_cookie else None
+        task_id = get_task_queue().submit(params, secrets=secrets)
         
-        logger.info(f"Search completed successfully. Jobs found: {len(jobs)}")
-        return jsonify(response_data)
+        return jsonify({
+            'success': True,
+            'task_id': task_id,
+            'status': 'queued',
+            **task_links(task_id)
+        }), 202
         
     except Exception as e:
         logger.error(f"Error in search_jobs: {str(e)}")
@@ -646,71 +930,492 @@ def search_jobs():
             'message': f"An error occurred during search: {str(e)}"
         }), 500
 
+def task_links(task_id):
+    return {
+        'status_url': f"/tasks/{task_id}",
+        'results_url': f"/tasks/{task_id}/results",
+        'cancel_url': f"/tasks/{task_id}/cancel"
+    }
+
+@app.route('/api/saved-searches', methods=['POST'])
+def create_saved_search():
+    """Save a keywords/location query so it can be refreshed for new postings"""
+    data = request.get_json(silent=True) or request.form
+    keywords = (data.get('keywords') or '').strip()
+    location = (data.get('location') or '').strip()
+    if not keywords:
+        return jsonify({'success': False, 'message': 'keywords is required'}), 400
+    try:
+        max_results = int(data.get('max_results') or 50)
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'message': 'max_results must be a number'}), 400
+    max_results = max(1, min(max_results, SAVED_SEARCH_MAX_RESULTS))
+    saved = saved_searches.create(get_db_connection(), keywords, location, max_results)
+    return jsonify({'success': True, 'saved_search': saved}), 201
+
+@app.route('/api/saved-searches')
+def list_saved_searches():
+    return jsonify({'success': True, 'saved_searches': saved_searches.list_all(get_db_connection())})
+
+@app.route('/api/saved-searches/<saved_search_id>')
+def get_saved_search(saved_search_id):
+    saved = saved_searches.get(get_db_connection(), saved_search_id)
+    if saved is None:
+        return jsonify({'success': False, 'message': 'Saved search not found'}), 404
+    return jsonify({'success': True, 'saved_search': saved})
+
+@app.route('/api/saved-searches/<saved_search_id>', methods=['DELETE'])
+def delete_saved_search(saved_search_id):
+    if not saved_searches.delete(get_db_connection(), saved_search_id):
+        return jsonify({'success': False, 'message': 'Saved search not found'}), 404
+    return jsonify({'success': True, 'saved_search_id': saved_search_id})
+
+@app.route('/api/saved-searches/<saved_search_id>/refresh', methods=['POST'])
+def refresh_saved_search(saved_search_id):
+    """Queue a refresh that only collects and enriches postings newer than the last one"""
+    saved = saved_searches.get(get_db_connection(), saved_search_id)
+    if saved is None:
+        return jsonify({'success': False, 'message': 'Saved search not found'}), 404
+    task_id = get_task_queue().submit({
+        'keywords': saved['keywords'],
+        'location': saved['location'],
+        'max_results': saved['max_results'],
+        'max_details': saved['max_results'],
+        'use_auth': False,
+        'saved_search_id': saved_search_id
+    })
+    return jsonify({'success': True, 'task_id': task_id, 'status': 'queued', **task_links(task_id)}), 202
+
+@app.route('/api/saved-searches/<saved_search_id>/new')
+def saved_search_delta(saved_search_id):
+    """Delta feed: postings found by refreshes after ?since= (default: the latest refresh)
+
+    Pages of ?limit= postings, oldest refresh first; follow next_cursor while
+    has_more, then poll with since=next_since.
+    """
+    conn = get_db_connection()
+    if saved_searches.get(conn, saved_search_id) is None:
+        return jsonify({'success': False, 'message': 'Saved search not found'}), 404
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'since must be an ISO date or timestamp'}), 400
+    try:
+        cursor = browse.decode_cursor(request.args.get('cursor'), saved_searches.POSTINGS_CURSOR)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    limit = max(1, min(request.args.get('limit', 100, type=int), DELTA_FEED_MAX_LIMIT))
+    jobs, next_cursor, next_since = saved_searches.new_postings(conn, saved_search_id, since, limit, cursor)
+    return jsonify({
+        'success': True,
+        'saved_search_id': saved_search_id,
+        'since': since.isoformat(sep=' ') if since else None,
+        'next_since': next_since,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'jobs_count': len(jobs),
+        'jobs': jobs
+    })
+
+@app.route('/tasks/<task_id>')
+def task_status(task_id):
+    """Poll the progress of a background search"""
+    task = get_task_queue().get(task_id)
+    if task is None:
+        return jsonify({'success': False, 'message': 'Task not found'}), 404
+    return jsonify({'success': True, 'task': task_payload(task)})
+
+@app.route('/tasks/<task_id>/results')
+def task_results(task_id):
+    """Jobs collected so far by a background search"""
+    task = get_task_queue().get(task_id)
+    if task is None:
+        return jsonify({'success': False, 'message': 'Task not found'}), 404
+    jobs = task['partial_results'] or []
+    return jsonify({
+        'success': True,
+        'task_id': task_id,
+        'status': task['status'],
+        'complete': task['status'] == 'completed',
+        'jobs_count': len(jobs),
+        'jobs': jobs
+    })
+
+@app.route('/tasks/<task_id>/cancel', methods=['POST'])
+def cancel_task(task_id):
+    """Cancel a queued or running background search"""
+    queue = get_task_queue()
+    task = queue.get(task_id)
+    if task is None:
+        return jsonify({'success': False, 'message': 'Task not found'}), 404
+    if not queue.cancel(task_id):
+        return jsonify({
+            'success': False,
+            'message': f"Task already {task['status']}"
+        }), 409
+    return jsonify({'success': True, 'task_id': task_id, 'message': 'Cancellation requested'})
+
+def browse_args(names, cursor_shapes):
+    """Filters named in names, plus the cursor and page size, shared by the browsing endpoints
+
+    Raises ValueError, with a message for the client, on a malformed value.
+    """
+    args = {name: request.args.get(name, '').strip() or None for name in names}
+    for key in ('since', 'until'):
+        value = request.args.get(key)
+        try:
+            args[key] = datetime.fromisoformat(value) if value else None
+        except ValueError:
+            raise ValueError(f"{key} must be an ISO date or timestamp")
+    args['cursor'] = browse.decode_cursor(request.args.get('cursor'), cursor_shapes)
+    args['limit'] = max(1, min(request.args.get('limit', BROWSE_DEFAULT_LIMIT, type=int), BROWSE_MAX_LIMIT))
+    return args
+
+JOB_FILTERS = ('company', 'location', 'skill', 'session_id')
+SESSION_FILTERS = ('keyword', 'location')
+
+@app.route('/api/jobs')
+def browse_jobs():
+    """Stored jobs, newest stored first, a page at a time
+
+    Filters: company, location, skill (whole values, any case), session_id
+    and since/until (ISO dates, on when the job was scraped). Pass a page's
+    next_cursor back as ?cursor= for the page after it.
+    """
+    try:
+        args = browse_args(JOB_FILTERS, browse.JOB_CURSOR)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    jobs, next_cursor = browse.list_jobs(get_db_connection(), **args)
+    return jsonify({
+        'success': True,
+        'limit': args['limit'],
+        'jobs_count': len(jobs),
+        'has_more': next_cursor is not None,
+        'next_cursor': next_cursor,
+        'jobs': jobs
+    })
+
+@app.route('/api/sessions')
+def browse_sessions():
+    """Search sessions, most recent first, a page at a time (filters: keyword, location, since/until)"""
+    try:
+        args = browse_args(SESSION_FILTERS, browse.SESSION_CURSOR)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    sessions, next_cursor = browse.list_sessions(get_db_connection(), **args)
+    return jsonify({
+        'success': True,
+        'limit': args['limit'],
+        'sessions_count': len(sessions),
+        'has_more': next_cursor is not None,
+        'next_cursor': next_cursor,
+        'sessions': sessions
+    })
+
+def next_page_url(endpoint, next_cursor):
+    """This page's URL with the cursor of the next one, or None on the last page"""
+    if next_cursor is None:
+        return None
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    return url_for(endpoint, **args)
+
 @app.route('/results')
 def results():
-    jobs_data = session.get('jobs_data', [])
-    skills_freq = session.get('skills_freq', [])
-    geo_trends = session.get('geo_trends', [])
-    
-    return render_template('results.html', 
-                         jobs=jobs_data, 
-                         skills_frequency=skills_freq, 
-                         geo_trends=geo_trends)
+    """Stored jobs of one search (?session_id=) or of all of them, with their top skills and locations"""
+    try:
+        args = browse_args(JOB_FILTERS, browse.JOB_CURSOR)
+    except ValueError as e:
+        return str(e), 400
+    conn = get_db_connection()
+    jobs, next_cursor = browse.list_jobs(conn, **args)
+    session_id = args['session_id']
+
+    def analysis():
+        if session_id:
+            total_jobs = conn.execute('SELECT COUNT(*) FROM session_jobs WHERE session_id = ?',
+                                      (session_id,)).fetchone()[0]
+        else:
+            total_jobs = rollups.totals(conn).get('jobs', 0)
+        return {
+            'total_jobs': total_jobs,
+            'skills_frequency': rollups.top_skills(conn, RESULTS_TOP_LIMIT, session_id=session_id),
+            'geo_trends': rollups.top_locations(conn, RESULTS_TOP_LIMIT, session_id=session_id)
+        }
+
+    return render_template('results.html',
+                           jobs=jobs,
+                           filters={name: args[name] or '' for name in JOB_FILTERS},
+                           next_url=next_page_url('results', next_cursor),
+                           **query_cache.get(conn, ('results', session_id), analysis))
+
+LEGACY_DOWNLOAD = re.compile(r'^linkedin_jobs_([A-Za-z0-9-]+)\.(json|csv)$')
 
 @app.route('/download/<filename>')
 def download_file(filename):
-    if '..' in filename or filename.startswith('/'):
-        return "Invalid filename", 400
-        
-    safe_filename = secure_filename(filename)
-    try:
-        return send_file(safe_filename, as_attachment=True)
-    except FileNotFoundError:
+    """Old per-search file links, now answered by the export endpoint"""
+    match = LEGACY_DOWNLOAD.match(filename)
+    if not match:
         return "File not found", 404
+    return redirect(url_for('export_jobs', session_id=match.group(1), format=match.group(2)))
+
+def open_read_connection():
+    """A private read-only connection for long reads that should not tie up the pooled one"""
+    conn = sqlite3.connect(DATABASE, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA query_only = ON')
+    return conn
+
+@app.route('/api/export')
+def export_jobs():
+    """Stream stored jobs as CSV, NDJSON or JSON, optionally gzipped
+
+    Filters: session_id, keyword, location (substring), since/until (ISO
+    dates, on when the job was scraped). The rows come straight from SQLite
+    in batches, so the export never sits in memory or on disk.
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in exports.EXPORT_FORMATS:
+        return jsonify({'success': False,
+                        'message': f"format must be one of {', '.join(exports.EXPORT_FORMATS)}"}), 400
+    filters = {key: request.args.get(key, '').strip() or None for key in ('session_id', 'keyword', 'location')}
+    for key in ('since', 'until'):
+        value = request.args.get(key)
+        try:
+            filters[key] = datetime.fromisoformat(value) if value else None
+        except ValueError:
+            return jsonify({'success': False, 'message': f"{key} must be an ISO date or timestamp"}), 400
+    gzip = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    label = re.sub(r'[^A-Za-z0-9_-]', '_', filters['session_id'] or 'export')[:64]
+    name = f"linkedin_jobs_{label}.{fmt}" + ('.gz' if gzip else '')
+    headers = {'Content-Disposition': f'attachment; filename="{name}"'}
+    mimetype = 'application/gzip' if gzip else exports.EXPORT_FORMATS[fmt]
+    return Response(exports.stream(open_read_connection, fmt, filters, gzip=gzip), mimetype=mimetype,
+                    headers=headers)
 
 @app.route('/database')
 def database_admin():
     """Database administration page"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) as count FROM jobs')
-        total_jobs = cursor.fetchone()[0]
+        args = browse_args(SESSION_FILTERS, browse.SESSION_CURSOR)
         
-        cursor.execute('SELECT COUNT(*) as count FROM search_sessions')
-        total_sessions = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT skill) as count FROM job_skills')
-        total_skills = cursor.fetchone()[0]
+        def overview():
+            totals = rollups.totals(conn)
+            recent_searches, next_cursor = browse.list_sessions(conn, **args)
+            return {
+                'total_jobs': totals.get('jobs', 0),
+                'total_sessions': totals.get('sessions', 0),
+                'total_skills': conn.execute('SELECT COUNT(*) FROM skills').fetchone()[0],
+                'recent_searches': recent_searches,
+                'next_cursor': next_cursor
+            }
         
-        cursor.execute('''
-            SELECT id, keywords, location, searched_at, total_jobs 
-            FROM search_sessions 
-            ORDER BY searched_at DESC 
-            LIMIT 10
-        ''')
-        recent_searches = cursor.fetchall()
+        page = query_cache.get(conn, ('database', args), overview)
         
         conn.close()
         
         return render_template('database.html',
-                            total_jobs=total_jobs,
-                            total_sessions=total_sessions,
-                            total_skills=total_skills,
-                            recent_searches=recent_searches)
+                            total_jobs=page['total_jobs'],
+                            total_sessions=page['total_sessions'],
+                            total_skills=page['total_skills'],
+                            recent_searches=page['recent_searches'],
+                            next_url=next_page_url('database_admin', page['next_cursor']))
         
+    except ValueError as e:
+        return str(e), 400
     except Exception as e:
         logger.error(f"Database admin error: {e}")
         return f"Database error: {str(e)}", 500
 
+def analytics_query_args():
+    """Window, keyword, session and limit filters shared by the analytics endpoints"""
+    args = {
+        'limit': max(1, min(request.args.get('limit', 10, type=int), ANALYTICS_MAX_LIMIT)),
+        'keyword': request.args.get('keyword') or None,
+        'session_id': request.args.get('session_id') or None,
+        'since': request.args.get('since') or None,
+        'until': request.args.get('until') or None
+    }
+    for key in ('since', 'until'):
+        if args[key]:
+            args[key] = datetime.strptime(args[key][:10], '%Y-%m-%d').date()
+    days = request.args.get('days', type=int)
+    if days and not args['since']:
+        args['since'] = (args['until'] or datetime.now().date()) - timedelta(days=days - 1)
+    return args
+
+def analytics_response(name, query):
+    try:
+        args = analytics_query_args()
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'since and until must be dates in YYYY-MM-DD format'
+        }), 400
+    conn = get_db_connection()
+    rows = query_cache.get(conn, (name, args), lambda: query(conn, **args))
+    return jsonify({
+        'success': True,
+        'window': {
+            'since': args['since'].isoformat() if args['since'] else None,
+            'until': args['until'].isoformat() if args['until'] else None,
+            'keyword': args['keyword'],
+            'session_id': args['session_id']
+        },
+        name: [{'name': value, 'jobs': jobs} for value, jobs in rows]
+    })
+
+@app.route('/api/analytics/top-skills')
+def top_skills():
+    """Most demanded skills over a time window, served from the rollup tables"""
+    return analytics_response('skills', rollups.top_skills)
+
+@app.route('/api/analytics/top-locations')
+def top_locations():
+    """Most common job locations over a time window, served from the rollup tables"""
+    return analytics_response('locations', rollups.top_locations)
+
+def skill_analytics_request(build):
+    """Run a skill co-occurrence or trend query with the shared analytics filters"""
+    if not skill_analytics.available():
+        return jsonify({'success': False, 'message': 'Skill analytics need numpy and scipy installed'}), 503
+    try:
+        args = analytics_query_args()
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'since and until must be dates in YYYY-MM-DD format'
+        }), 400
+    args['min_jobs'] = max(1, request.args.get('min_jobs', 2, type=int))
+    args['sort'] = 'lift' if request.args.get('sort') == 'lift' else 'jobs'
+    conn = get_db_connection()
+    try:
+        # The endpoint's own parameters are read from the query string, so it is part of the key
+        payload = query_cache.get(conn, (request.path, args, sorted(request.args.items())),
+                                    lambda: build(conn, args))
+    except LookupError as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+    payload = dict(payload)
+    payload.update({
+        'success': True,
+        'window': {
+            'since': args['since'].isoformat() if args['since'] else None,
+            'until': args['until'].isoformat() if args['until'] else None,
+            'keyword': args['keyword'],
+            'session_id': args['session_id']
+        }
+    })
+    return jsonify(payload)
+
+def _skill_matrix(conn, args):
+    return skill_analytics.skill_matrix(conn, since=args['since'], until=args['until'],
+                                        keyword=args['keyword'], session_id=args['session_id'])
+
+@app.route('/api/analytics/skill-pairs')
+def skill_pairs():
+    """Skill pairs most often asked for together, with their lift (sort=jobs|lift)"""
+    def build(conn, args):
+        matrix = _skill_matrix(conn, args)
+        return {'jobs': matrix.jobs,
+                'pairs': matrix.pairs(args['limit'], min_jobs=args['min_jobs'], sort=args['sort'])}
+    return skill_analytics_request(build)
+
+@app.route('/api/analytics/related-skills')
+def related_skills():
+    """Skills asked for together with ?skill=, by lift (or sort=jobs)"""
+    name = request.args.get('skill', '').strip()
+    if not name:
+        return jsonify({'success': False, 'message': 'skill is required'}), 400
+    
+    def build(conn, args):
+        matrix = _skill_matrix(conn, args)
+        skill_id = skill_analytics.skill_id(conn, name)
+        related = matrix.related(skill_id, args['limit'], min_jobs=args['min_jobs'],
+                                 sort='jobs' if request.args.get('sort') == 'jobs' else 'lift')
+        if related is None:
+            raise LookupError(f"No jobs ask for '{name}' in this window")
+        return {'skill': matrix.names[skill_id], 'jobs': matrix.jobs, 'related': related}
+    return skill_analytics_request(build)
+
+@app.route('/api/analytics/skill-trends')
+def skill_trends():
+    """Skills gaining and losing share week over week (weeks=8, min_jobs=3)"""
+    weeks = max(2, min(request.args.get('weeks', 8, type=int), SKILL_TREND_MAX_WEEKS))
+    
+    def build(conn, args):
+        return skill_analytics.skill_trends(conn, weeks=weeks, limit=args['limit'], until=args['until'],
+                                            keyword=args['keyword'],
+                                            min_jobs=request.args.get('min_jobs', 3, type=int))
+    return skill_analytics_request(build)
+
+@app.route('/jobs/search')
+def search_stored_jobs():
+    """Full-text search over every stored posting, best matches first"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'message': 'Query parameter q is required'}), 400
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), SEARCH_MAX_PER_PAGE))
+    conn = get_db_connection()
+    if not fulltext.index_exists(conn):
+        return jsonify({'success': False, 'message': 'Full-text search is not available'}), 503
+    sort = request.args.get('sort', 'relevance')
+    if sort not in ('relevance', 'recent'):
+        return jsonify({'success': False, 'message': "sort must be 'relevance' or 'recent'"}), 400
+    results, has_more, truncated = fulltext.search(conn, query, limit=per_page, offset=(page - 1) * per_page,
+                                                   sort=sort)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'sort': sort,
+        'page': page,
+        'per_page': per_page,
+        'has_more': has_more,
+        # Only the newest rank_candidates matches were ranked; sort=recent reaches the rest
+        'truncated': truncated,
+        'rank_candidates': fulltext.RANK_CANDIDATES if truncated else None,
+        'results': results
+    })
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count and time every request by its route pattern (not its URL, to keep label values few)"""
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.SERVER_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    if 'request_started' in g:
+        metrics.SERVER_REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, route=route)
+    return response
+
+metrics.REGISTRY.gauge('scraper_detail_cache_bytes', 'Size of the on-disk job detail cache',
+                       function=lambda: detail_cache.stats()['bytes'] if detail_cache else 0)
+metrics.REGISTRY.gauge('scraper_dedupe_known_postings', 'Postings in the dedupe filter',
+                       function=lambda: deduper.stats()['known_postings'] if deduper else 0)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Process metrics in the Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/health')
 def health_check():
     """Health check endpoint for Render"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'database': 'SQLite'
+        'database': 'SQLite',
+        'rate_limiter': rate_limiter.stats(),
+        'dedupe': deduper.stats() if deduper else None,
+        'detail_cache': detail_cache.stats() if detail_cache else None,
+        'query_cache': query_cache.stats(),
+        'parse_workers': PARSE_WORKERS
     })
 
 @app.route('/test')
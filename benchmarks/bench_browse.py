@@ -0,0 +1,128 @@
+"""Benchmark: /api/jobs page latency with keyset cursors vs OFFSET, by page depth.
+
+Loads --jobs postings through DatabaseWriter and reads one page of --limit
+jobs at increasing depths, unfiltered and filtered by a company, a common
+and a rare skill: once as browse.list_jobs does (seek to the cursor) and
+once with the same query paged by OFFSET, which has to step over every row
+before the page.
+
+Usage: python benchmarks/bench_browse.py [--jobs 200000] [--limit 25]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import browse  # noqa: E402
+from pipeline import DatabaseWriter  # noqa: E402
+from records import JobRecord  # noqa: E402
+
+TITLES = ['Data Engineer', 'Backend Engineer', 'Site Reliability Engineer', 'ML Engineer', 'Analyst']
+COMMON_SKILLS = ['Python', 'SQL', 'AWS', 'Docker', 'Kubernetes']
+RARE_SKILL = 'Elixir'
+DEPTHS = (0, 1000, 10000, 100000, 1000000)
+
+
+def make_job(i, rng, started):
+    skills = rng.sample(COMMON_SKILLS, 2) + ([RARE_SKILL] if rng.random() < 0.002 else [])
+    return {
+        'title': f'{rng.choice(TITLES)} {i}',
+        'company': f'Company {i % 20}',
+        'location': f'City {i % 80}',
+        'url': f'https://www.linkedin.com/jobs/view/{i}',
+        'scraped_at': (started + timedelta(seconds=i)).isoformat(),
+        'source': 'public_api',
+        'details': {'description': 'Build and run data services. ' * 20, 'skills': skills,
+                    'industry': 'Software Development'}
+    }
+
+
+def timed(fn, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def offset_page(conn, limit, offset, company=None, skill_id=None, skill_jobs=0):
+    """The same page as list_jobs, with the same query plan, paged the OFFSET way (rows, skills by job id)"""
+    conditions = []
+    params = []
+    if company:
+        conditions.append('j.company = ? COLLATE NOCASE')
+        params.append(company)
+    if skill_id is not None:
+        if skill_jobs <= browse.SKILL_SORT_MAX_JOBS:
+            conditions.append('j.id IN (SELECT job_id FROM job_skills WHERE skill_id = ?)')
+        else:
+            conditions.append('EXISTS (SELECT 1 FROM job_skills js WHERE js.job_id = j.id AND js.skill_id = ?)')
+        params.append(skill_id)
+    where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+    rows = conn.execute(f'''
+        SELECT j.id, j.linkedin_job_id, j.title, j.company, j.location, j.url, j.post_date, j.scraped_at,
+               j.source, j.industry, substr(j.description, 1, {browse.DESCRIPTION_PREVIEW_CHARS}) AS description
+        FROM jobs j {where}
+        ORDER BY j.id DESC
+        LIMIT ? OFFSET ?
+    ''', (*params, limit, offset)).fetchall()
+    return rows, browse._skills_of(conn, [row['id'] for row in rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=200000)
+    parser.add_argument('--limit', type=int, default=25)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    started = datetime(2026, 1, 1)
+    with tempfile.TemporaryDirectory() as directory:
+        app.DATABASE = os.path.join(directory, 'browse.db')
+        app.init_database()
+        start = time.perf_counter()
+        writer = DatabaseWriter(app.get_db_connection, 'bench', 'bench', '', args.jobs, False, batch_size=2000)
+        writer.open()
+        for i in range(args.jobs):
+            writer.write(JobRecord.from_dict(make_job(i, rng, started)))
+        writer.close()
+        conn = app.get_db_connection()
+        print(f"loaded {args.jobs} postings in {time.perf_counter() - start:.1f}s, pages of {args.limit}")
+
+        cases = [('all jobs', {}), ('company', {'company': 'company 7'}),
+                 ('common skill', {'skill': 'python'}), ('rare skill', {'skill': RARE_SKILL})]
+        print(f"{'filter':14}{'matches':>9}{'depth':>9}{'keyset':>10}{'OFFSET':>10}")
+        for label, filters in cases:
+            matches, page_filters = args.jobs, (None, None, 0)
+            if 'company' in filters:
+                matches = conn.execute('SELECT COUNT(*) FROM jobs WHERE company = ? COLLATE NOCASE',
+                                       (filters['company'],)).fetchone()[0]
+                page_filters = (filters['company'], None, 0)
+            if 'skill' in filters:
+                skill_id = conn.execute('SELECT id FROM skills WHERE name = ? COLLATE NOCASE',
+                                        (filters['skill'],)).fetchone()[0]
+                matches = conn.execute('SELECT COUNT(*) FROM job_skills WHERE skill_id = ?',
+                                       (skill_id,)).fetchone()[0]
+                page_filters = (None, skill_id, matches)
+            for depth in DEPTHS:
+                if depth and depth >= matches:
+                    break
+                cursor = None
+                if depth:
+                    # The cursor a client would hold after reading depth jobs
+                    last = offset_page(conn, 1, depth - 1, *page_filters)[0][0]
+                    cursor = [last['id']]
+                keyset, (jobs, _) = timed(lambda: browse.list_jobs(conn, args.limit, cursor=cursor, **filters))
+                offset, (rows, _) = timed(lambda: offset_page(conn, args.limit, depth, *page_filters))
+                if [job['url'] for job in jobs] != [row['url'] for row in rows]:
+                    sys.exit(f"{label} at depth {depth}: keyset and OFFSET pages differ")
+                print(f"{label:14}{matches:>9}{depth:>9}{keyset:>8.2f}ms{offset:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
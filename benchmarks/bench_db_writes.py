@@ -0,0 +1,176 @@
+"""Benchmark: job insert throughput of the legacy per-row save vs the bulk WAL writer.
+
+Each variant runs twice: on an idle database and while reader threads
+hammer it with the /database dashboard aggregates, which is where the
+rollback journal used to serialise readers and the writer.
+
+Usage: python benchmarks/bench_db_writes.py [--jobs 10000] [--skills 6] [--readers 2]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from pipeline import DatabaseWriter  # noqa: E402
+from records import JobRecord  # noqa: E402
+
+SKILLS = ['Python', 'SQL', 'AWS', 'Docker', 'Kubernetes', 'React', 'Java', 'Spark', 'Kafka', 'Git']
+
+
+def make_jobs(count, skills_per_job, seed=11):
+    rng = random.Random(seed)
+    return [{
+        'title': f'Engineer {i}',
+        'company': f'Company {i % 500}',
+        'location': f'City {i % 80}',
+        'url': f'https://www.linkedin.com/jobs/view/engineer-{i}',
+        'post_date': '2026-10-01',
+        'scraped_at': datetime.now().isoformat(),
+        'source': 'public_api',
+        'details': {
+            'description': 'Build data platforms. ' * 40,
+            'industry': 'Software Development',
+            'skills': rng.sample(SKILLS, skills_per_job)
+        }
+    } for i in range(count)]
+
+
+# The original schema: one jobs row per sighting and skill names on every link row
+LEGACY_SCHEMA = '''
+    CREATE TABLE search_sessions (id TEXT PRIMARY KEY, keywords TEXT, location TEXT, max_results INTEGER,
+                                  use_auth BOOLEAN, searched_at DATETIME, total_jobs INTEGER);
+    CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, title TEXT, company TEXT,
+                       location TEXT, url TEXT, post_date TEXT, scraped_at DATETIME, source TEXT,
+                       description TEXT, industry TEXT);
+    CREATE TABLE job_skills (id INTEGER PRIMARY KEY AUTOINCREMENT, job_id INTEGER, skill TEXT);
+    CREATE INDEX idx_session_id ON jobs(session_id);
+    CREATE INDEX idx_skill ON job_skills(skill);
+    CREATE INDEX idx_job_id ON job_skills(job_id);
+'''
+
+
+def legacy_save(database, session_id, jobs):
+    """The original save_to_database loop: default journal, one INSERT per row"""
+    conn = sqlite3.connect(database)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO search_sessions (id, keywords, location, max_results, use_auth, searched_at, total_jobs)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (session_id, 'bench', 'bench', len(jobs), False, datetime.now(), len(jobs)))
+    for job in jobs:
+        scraped_at = datetime.fromisoformat(job['scraped_at'])
+        cursor.execute('''
+            INSERT INTO jobs (session_id, title, company, location, url, post_date, scraped_at, source, description, industry)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (session_id, job['title'][:1000], job['company'][:500], job['location'][:500], job['url'][:1000],
+              job['post_date'], scraped_at, job['source'], job['details']['description'][:65000],
+              job['details']['industry'][:500]))
+        job_id = cursor.lastrowid
+        for skill in job['details']['skills']:
+            cursor.execute('INSERT INTO job_skills (job_id, skill) VALUES (?, ?)', (job_id, skill))
+    conn.commit()
+    conn.close()
+
+
+def bulk_save(session_id, jobs):
+    writer = DatabaseWriter(app.get_db_connection, session_id, 'bench', 'bench', len(jobs), False)
+    writer.open()
+    try:
+        for job in jobs:
+            writer.write(JobRecord.from_dict(job))
+    finally:
+        writer.close()
+
+
+LEGACY_DASHBOARD_QUERIES = (
+    'SELECT COUNT(*) FROM jobs',
+    'SELECT COUNT(DISTINCT skill) FROM job_skills',
+    'SELECT id, keywords, location, searched_at, total_jobs FROM search_sessions ORDER BY searched_at DESC LIMIT 10',
+)
+DASHBOARD_QUERIES = (
+    'SELECT COUNT(*) FROM jobs',
+    'SELECT COUNT(*) FROM skills',
+    'SELECT id, keywords, location, searched_at, total_jobs FROM search_sessions ORDER BY searched_at DESC LIMIT 10',
+)
+
+
+def run_readers(database, count, stop, stats, queries):
+    """Start reader threads that loop over the dashboard queries until stopped"""
+    def read():
+        conn = sqlite3.connect(database, timeout=30)
+        while not stop.is_set():
+            try:
+                for query in queries:
+                    conn.execute(query).fetchall()
+                stats['dashboards'] += 1
+            except sqlite3.OperationalError:
+                stats['errors'] += 1
+        conn.close()
+    threads = [threading.Thread(target=read, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def measure(save, database, readers, queries):
+    stop = threading.Event()
+    stats = {'dashboards': 0, 'errors': 0}
+    threads = run_readers(database, readers, stop, stats, queries) if readers else []
+    start = time.perf_counter()
+    save()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return elapsed, stats
+
+
+def legacy_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    return path
+
+
+def fresh_database(path):
+    app.DATABASE = path
+    app.init_database()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=10000)
+    parser.add_argument('--skills', type=int, default=6, help='skills per job')
+    parser.add_argument('--readers', type=int, default=2, help='concurrent dashboard readers')
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.jobs, args.skills)
+    rows = args.jobs * (1 + args.skills)
+    print(f"{args.jobs} jobs, {rows} rows including skills")
+    with tempfile.TemporaryDirectory() as directory:
+        for readers in (0, args.readers):
+            database = legacy_database(os.path.join(directory, f'legacy-{readers}.db'))
+            legacy, legacy_reads = measure(lambda: legacy_save(database, 'legacy', jobs), database, readers,
+                                           LEGACY_DASHBOARD_QUERIES)
+
+            database = fresh_database(os.path.join(directory, f'bulk-{readers}.db'))
+            bulk, bulk_reads = measure(lambda: bulk_save('bulk', jobs), database, readers, DASHBOARD_QUERIES)
+
+            print(f"-- {readers} concurrent readers")
+            print(f"legacy per-row inserts : {legacy:.2f}s  {rows / legacy:,.0f} rows/s  "
+                  f"dashboards served: {legacy_reads['dashboards']} (errors: {legacy_reads['errors']})")
+            print(f"bulk executemany + WAL : {bulk:.2f}s  {rows / bulk:,.0f} rows/s  ({legacy / bulk:.1f}x)  "
+                  f"dashboards served: {bulk_reads['dashboards']} (errors: {bulk_reads['errors']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: /jobs/search latency over a large synthetic job history.
+
+Loads --jobs postings through DatabaseWriter (so the FTS triggers do the
+indexing), then times ranked full-text queries against the equivalent
+LIKE scan that finding the same matches takes without the index.
+
+Usage: python benchmarks/bench_fulltext.py [--jobs 200000] [--words 250]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import fulltext  # noqa: E402
+from pipeline import DatabaseWriter  # noqa: E402
+from records import JobRecord  # noqa: E402
+
+VOCABULARY = ('build maintain scalable data pipelines services platform team customers product cloud '
+              'distributed systems reliability observability testing mentoring design review agile '
+              'stakeholders analytics dashboards reporting machine learning models deployment security '
+              'compliance automation infrastructure networking storage latency throughput api backend '
+              'frontend mobile payments logistics healthcare retail banking insurance startup remote hybrid').split()
+RARE_TERMS = ['kubernetes', 'terraform', 'snowflake', 'airflow', 'graphql', 'rust', 'elixir', 'clickhouse']
+TITLES = ['Data Engineer', 'Backend Engineer', 'Site Reliability Engineer', 'ML Engineer', 'Analyst']
+QUERIES = ['kubernetes', 'terraform airflow', '"data pipelines"', 'graph*', 'elixir clickhouse', 'platform']
+
+
+def make_job(i, rng, words):
+    text = [rng.choice(VOCABULARY) for _ in range(words)]
+    for term in rng.sample(RARE_TERMS, 2):
+        if rng.random() < 0.1:
+            text.insert(rng.randrange(len(text)), term)
+    return {
+        'title': f'{rng.choice(TITLES)} {i}',
+        'company': f'Company {i % 2000}',
+        'location': f'City {i % 80}',
+        'url': f'https://www.linkedin.com/jobs/view/{i}',
+        'scraped_at': datetime.now().isoformat(),
+        'source': 'public_api',
+        'details': {'description': ' '.join(text), 'industry': 'Software Development', 'skills': []}
+    }
+
+
+def timed(fn, repeat=10):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=200000)
+    parser.add_argument('--words', type=int, default=250, help='words per description')
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as directory:
+        app.DATABASE = os.path.join(directory, 'fulltext.db')
+        app.init_database()
+        start = time.perf_counter()
+        writer = DatabaseWriter(app.get_db_connection, 'bench', 'bench', '', args.jobs, False, batch_size=2000)
+        writer.open()
+        for i in range(args.jobs):
+            writer.write(JobRecord.from_dict(make_job(i, rng, args.words)))
+        writer.close()
+        load = time.perf_counter() - start
+        conn = app.get_db_connection()
+        print(f"loaded {args.jobs} postings with FTS triggers in {load:.1f}s "
+              f"({os.path.getsize(app.DATABASE) / 1e6:.0f} MB)")
+
+        print(f"{'query':22}{'matches':>9}{'relevance':>11}{'page 5':>10}{'recent':>10}{'LIKE scan':>11}")
+        for query in QUERIES:
+            matches = conn.execute('SELECT COUNT(*) FROM jobs_fts WHERE jobs_fts MATCH ?',
+                                   (fulltext.match_query(query),)).fetchone()[0]
+            first, _ = timed(lambda: fulltext.search(conn, query, limit=20))
+            fifth, _ = timed(lambda: fulltext.search(conn, query, limit=20, offset=80))
+            recent, _ = timed(lambda: fulltext.search(conn, query, limit=20, sort='recent'))
+            # What answering the same question without the index costs: every
+            # description has to be scanned to find (and then rank) the matches
+            words = [f'%{word}%' for word in query.strip('"*').split()]
+            where = ' AND '.join('description LIKE ?' for _ in words)
+            like, _ = timed(lambda: conn.execute(f'SELECT COUNT(*) FROM jobs WHERE {where}', words).fetchall(),
+                            repeat=1)
+            print(f"{query:22}{matches:>9}{first:>9.1f}ms{fifth:>8.1f}ms{recent:>8.1f}ms{like:>9.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
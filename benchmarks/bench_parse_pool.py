@@ -0,0 +1,91 @@
+"""Benchmark: detail page parsing and skill extraction in-process vs across parse worker processes.
+
+Feeds the full-page fixture detail pages, their descriptions padded with
+--kb of text like real postings, through parse_pool.run from --threads
+threads as the enrichment workers do: once in-process, then once per worker
+count. Every configuration must return the same details; pages/s, the
+speed-up over in-process and the pool start-up time are reported. The
+speed-up is bounded by the cores available (cpu_count is printed).
+
+Usage: python benchmarks/bench_parse_pool.py [--pages 400] [--workers 1,2,4] [--threads 8]
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parse_pool  # noqa: E402
+from skill_matcher import get_skill_matcher  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DESCRIPTION_MARKER = 'class="description__text'
+FILLER = ('the team builds reliable services for customers across regions and owns delivery end to end '
+          'you will collaborate with product design and data partners to ship features quickly').split()
+
+
+def make_pages(count, kilobytes, seed=7):
+    """Full-page fixtures with an extra description paragraph mentioning random skills"""
+    templates = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, 'detail_*.html'))):
+        with open(path, encoding='utf-8') as f:
+            page = f.read()
+        if DESCRIPTION_MARKER in page:
+            templates.append(page)
+    rng = random.Random(seed)
+    skills = get_skill_matcher().skills
+    pages = []
+    for i in range(count):
+        words = []
+        while sum(len(word) + 1 for word in words) < kilobytes * 1024:
+            words.append(rng.choice(skills) if rng.random() < 0.03 else rng.choice(FILLER))
+        page = templates[i % len(templates)]
+        # Right after the description element's opening tag
+        at = page.index('>', page.index(DESCRIPTION_MARKER)) + 1
+        pages.append(page[:at] + f"<p>{' '.join(words)}</p>" + page[at:])
+    return pages
+
+
+def run(pages, workers, threads):
+    """(seconds, details) of parsing every page with workers processes (0: in-process)"""
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        started = time.perf_counter()
+        results = list(executor.map(lambda html: parse_pool.run(parse_pool.parse_details, html, workers)[0], pages))
+        return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=400)
+    parser.add_argument('--kb', type=int, default=20, help='description padding per page, in KB')
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})),
+                        help='comma-separated worker counts to measure')
+    parser.add_argument('--threads', type=int, default=8, help='threads submitting pages, like enrichment')
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.kb)
+    megabytes = sum(len(page) for page in pages) / 1e6
+    print(f"{args.pages} detail pages ({megabytes:.1f} MB), {args.threads} threads, cpu_count {os.cpu_count()}")
+
+    baseline, expected = run(pages, 0, args.threads)
+    print(f"{'in-process':>12}: {baseline:6.2f}s  {args.pages / baseline:8.1f} pages/s")
+    for workers in (int(n) for n in args.workers.split(',')):
+        started = time.perf_counter()
+        parse_pool.get_pool(workers)
+        startup = time.perf_counter() - started
+        try:
+            seconds, results = run(pages, workers, args.threads)
+        finally:
+            parse_pool.shutdown_pool()
+        if results != expected:
+            sys.exit(f"{workers} workers returned different details than in-process parsing")
+        print(f"{workers:>3} workers : {seconds:6.2f}s  {args.pages / seconds:8.1f} pages/s  "
+              f"({baseline / seconds:.2f}x, start-up {startup * 1000:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark: HTML parser backends on the fixture corpus, checked against the legacy parser.
+
+Every installed backend must reproduce, field for field, what the original
+full-tree BeautifulSoup/html.parser code extracted from each fixture in
+benchmarks/fixtures; then cards/s and detail pages/s are measured.
+
+Usage: python benchmarks/bench_parsers.py [--seconds 2]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parsers  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_cards(html):
+    """The original search page parsing: full html.parser tree, then find()"""
+    cards = []
+    for card in BeautifulSoup(html, 'html.parser').find_all('div', class_='base-card'):
+        try:
+            title_elem = card.find('h3', class_='base-search-card__title')
+            company_elem = card.find('h4', class_='base-search-card__subtitle')
+            location_elem = card.find('span', class_='job-search-card__location')
+            if not all([title_elem, company_elem, location_elem]):
+                cards.append(None)
+                continue
+            link_elem = card.find('a', class_='base-card__full-link')
+            time_elem = card.find('time', class_='job-search-card__listdate')
+            cards.append({
+                'title': title_elem.text.strip(),
+                'company': company_elem.text.strip(),
+                'location': location_elem.text.strip(),
+                'url': link_elem['href'] if link_elem else None,
+                'post_date': time_elem['datetime'] if time_elem else None
+            })
+        except Exception:
+            cards.append(None)
+    return cards
+
+
+def legacy_details(html):
+    """The original detail page parsing: full html.parser tree, then select_one()"""
+    soup = BeautifulSoup(html, 'html.parser')
+    description = ''
+    for selector in parsers.DESCRIPTION_SELECTORS:
+        desc_elem = soup.select_one(selector)
+        if desc_elem:
+            description = desc_elem.get_text(separator='\n').strip()
+            if description:
+                break
+    if not description:
+        main_content = soup.find('main') or soup.find('body')
+        if main_content:
+            description = main_content.get_text(separator='\n').strip()[:2000]
+    industry = 'Not specified'
+    for item in soup.find_all('li', class_='description__job-criteria-item'):
+        subtitle = item.find('h3', class_='description__job-criteria-subtitle')
+        text = item.find('span', class_='description__job-criteria-text')
+        if subtitle and text and 'industry' in subtitle.text.lower():
+            industry = text.text.strip()
+            break
+    return description, industry
+
+
+def load(pattern):
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, pattern))):
+        with open(path, encoding='utf-8') as f:
+            fixtures[os.path.basename(path)] = f.read()
+    return fixtures
+
+
+def check(backend, search_pages, detail_pages):
+    """Names of fixtures where backend disagrees with the legacy parser"""
+    mismatches = []
+    for name, html in search_pages.items():
+        if backend.job_cards(html) != legacy_cards(html):
+            mismatches.append(name)
+    for name, html in detail_pages.items():
+        if backend.job_details(html) != legacy_details(html):
+            mismatches.append(name)
+    return mismatches
+
+
+def rate(fn, pages, seconds):
+    """Pages processed per second over roughly `seconds` of work"""
+    done = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for html in pages:
+            fn(html)
+        done += len(pages)
+    return done / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=2.0, help='time budget per measurement')
+    args = parser.parse_args()
+
+    search_pages = load('search_*.html')
+    detail_pages = load('detail_*.html')
+    cards_per_page = sum(len(legacy_cards(html)) for html in search_pages.values()) / len(search_pages)
+    print(f"{len(search_pages)} search pages ({cards_per_page:.0f} cards each), {len(detail_pages)} detail pages")
+
+    legacy_card_rate = rate(legacy_cards, list(search_pages.values()), args.seconds) * cards_per_page
+    legacy_detail_rate = rate(legacy_details, list(detail_pages.values()), args.seconds)
+    print(f"{'backend':14}{'cards/s':>10}{'details/s':>11}  matches legacy")
+    print(f"{'legacy':14}{legacy_card_rate:>10.0f}{legacy_detail_rate:>11.0f}")
+    for name in parsers.available_backends():
+        backend = parsers.create_backend(name)
+        mismatches = check(backend, search_pages, detail_pages)
+        card_rate = rate(backend.job_cards, list(search_pages.values()), args.seconds) * cards_per_page
+        detail_rate = rate(backend.job_details, list(detail_pages.values()), args.seconds)
+        verdict = 'yes' if not mismatches else 'NO: ' + ', '.join(mismatches)
+        print(f"{name:14}{card_rate:>10.0f}{detail_rate:>11.0f}  {verdict}  "
+              f"({card_rate / legacy_card_rate:.1f}x / {detail_rate / legacy_detail_rate:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark: dashboard latency under concurrent viewers, with and without the query cache.
+
+Loads --jobs postings over a year of days and --keywords searches, then has
+--viewers threads load the dashboard views (/database, windowed top skills
+and locations, /results) for --seconds, while a writer flushes a small batch
+every --write-every seconds, as a running search or crawl would. Requests
+per second and latency percentiles are reported with the cache disabled,
+per process, and shared through a SQLite file.
+
+Usage: python benchmarks/bench_query_cache.py [--jobs 100000] [--viewers 8] [--seconds 10]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from pipeline import DatabaseWriter  # noqa: E402
+from query_cache import QueryCache, SQLiteStore  # noqa: E402
+from records import JobRecord  # noqa: E402
+from skill_matcher import get_skill_matcher  # noqa: E402
+
+VIEWS = ['/database', '/api/analytics/top-skills?since={since}&limit=20',
+         '/api/analytics/top-locations?days=45&limit=20', '/results']
+
+
+def make_job(i, rng, skills, started):
+    return {
+        'title': f'Engineer {i}',
+        'company': f'Company {i % 3000}',
+        'location': f'City {rng.randrange(400)}',
+        'url': f'https://www.linkedin.com/jobs/view/{i}',
+        'scraped_at': (started + timedelta(days=rng.randrange(365))).isoformat(),
+        'source': 'public_api',
+        'details': {'description': 'Build things.', 'skills': rng.sample(skills, 6), 'industry': ''}
+    }
+
+
+def load(jobs, keywords, rng):
+    skills = get_skill_matcher().skills
+    started = datetime.now() - timedelta(days=365)
+    per_session = max(1, jobs // keywords)
+    for number in range(keywords):
+        writer = DatabaseWriter(app.get_db_connection, f'bench-{number}', f'keyword {number}', '', per_session,
+                                False, batch_size=2000)
+        writer.open()
+        for i in range(number * per_session, (number + 1) * per_session):
+            writer.write(JobRecord.from_dict(make_job(i, rng, skills, started)))
+        writer.close()
+
+
+def percentile(samples, share):
+    return samples[min(len(samples) - 1, int(len(samples) * share))] * 1000
+
+
+def run(viewers, seconds, write_every, jobs):
+    """(requests, latencies in seconds) of viewers threads reading the dashboard while a writer flushes"""
+    since = (datetime.now() - timedelta(days=75)).date().isoformat()
+    urls = [view.format(since=since) for view in VIEWS]
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def view(number):
+        client = app.app.test_client()
+        samples = []
+        i = number
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = client.get(urls[i % len(urls)])
+            samples.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+            i += 1
+        with lock:
+            latencies.extend(samples)
+
+    def write():
+        rng = random.Random(11)
+        skills = get_skill_matcher().skills
+        writer = DatabaseWriter(app.get_db_connection, 'bench-writer', 'keyword 0', '', 0, False, append=True)
+        writer.open()
+        i = jobs
+        while time.monotonic() < deadline:
+            for _ in range(5):
+                writer.write(JobRecord.from_dict(make_job(i, rng, skills, datetime.now() - timedelta(days=1))))
+                i += 1
+            writer.flush()
+            time.sleep(write_every)
+        writer.close()
+
+    threads = [threading.Thread(target=view, args=(n,)) for n in range(viewers)]
+    if write_every > 0:
+        threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=100000)
+    parser.add_argument('--keywords', type=int, default=50)
+    parser.add_argument('--viewers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-every', type=float, default=1.0, help='seconds between writer flushes, 0: none')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app.DATABASE = os.path.join(directory, 'dashboard.db')
+        app.init_database()
+        start = time.perf_counter()
+        load(args.jobs, args.keywords, random.Random(5))
+        print(f"loaded {args.jobs} postings in {args.keywords} searches in {time.perf_counter() - start:.1f}s; "
+              f"{args.viewers} viewers, a write every {args.write_every}s")
+
+        caches = [
+            ('no cache', QueryCache('queries', ttl=0)),
+            ('per process', QueryCache('queries', ttl=app.QUERY_CACHE_TTL)),
+            ('shared store', QueryCache('queries', ttl=app.QUERY_CACHE_TTL,
+                                        store=SQLiteStore(os.path.join(directory, 'cache.db'), 256))),
+        ]
+        print(f"{'cache':14}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'hit rate':>10}")
+        for label, cache in caches:
+            app.query_cache = cache
+            requests, latencies = run(args.viewers, args.seconds, args.write_every, args.jobs)
+            print(f"{label:14}{requests / args.seconds:>9.0f}{percentile(latencies, 0.5):>8.1f}ms"
+                  f"{percentile(latencies, 0.95):>8.1f}ms{percentile(latencies, 0.99):>8.1f}ms"
+                  f"{cache.stats()['hit_rate']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
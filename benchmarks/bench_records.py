@@ -0,0 +1,123 @@
+"""Benchmark: memory and serialization cost of per-job dicts vs slotted JobRecords.
+
+Builds --jobs enriched postings twice, once as the nested dicts the scraper
+used to pass around and once as JobRecords, and reports the bytes each set
+holds (tracemalloc, after the source strings are allocated) and the time to
+turn every job into SQLite parameters, a CSV row and JSON. Descriptions are
+shared by both sets and left out of the memory figure, which is about the
+per-job overhead a long crawl keeps alive.
+
+Usage: python benchmarks/bench_records.py [--jobs 100000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import CSV_FIELDNAMES  # noqa: E402
+from records import CSV_DESCRIPTION_CHARS, JobRecord, parse_scraped_at  # noqa: E402
+from schema import job_key  # noqa: E402
+from skill_matcher import get_skill_matcher  # noqa: E402
+
+TITLES = ['Data Engineer', 'Backend Engineer', 'Site Reliability Engineer', 'ML Engineer', 'Analyst']
+INDUSTRIES = ['Software Development', 'Financial Services', 'IT Services and IT Consulting', 'Retail']
+
+
+def make_fields(count, seed=7):
+    """Card and details values as they arrive from parsing: fresh strings per job"""
+    rng = random.Random(seed)
+    skills = get_skill_matcher().skills
+    description = 'We build reliable data services for customers across regions. ' * 40
+    fields = []
+    for i in range(count):
+        fields.append((
+            f'{rng.choice(TITLES)} {i}', ''.join(f'Company {i % 500}'), ''.join(f'City {i % 60}, Country'),
+            f'https://www.linkedin.com/jobs/view/{4000000000 + i}', 4000000000 + i, '2026-10-01',
+            datetime.now().isoformat(), ''.join('public_api'),
+            {'description': description, 'skills': [''.join(skill) for skill in rng.sample(skills, 8)],
+             'industry': ''.join(rng.choice(INDUSTRIES))}
+        ))
+    return fields
+
+
+def as_dict(title, company, location, url, job_id, post_date, scraped_at, source, details):
+    return {'title': title, 'company': company, 'location': location, 'url': url, 'job_id': job_id,
+            'post_date': post_date, 'scraped_at': scraped_at, 'source': source, 'details': dict(details)}
+
+
+def as_record(title, company, location, url, job_id, post_date, scraped_at, source, details):
+    job = JobRecord(title, company, location, url, job_id, post_date, scraped_at, source)
+    job.set_details(details)
+    return job
+
+
+def build(fields, factory):
+    """(jobs, bytes allocated building them)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    jobs = [factory(*values) for values in fields]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return jobs, allocated
+
+
+def serialize_dict(job):
+    # What DatabaseWriter, CsvStreamWriter and JsonStreamWriter built per dict
+    details = job.get('details', {})
+    scraped_at = parse_scraped_at(job.get('scraped_at'))
+    row = (job_key(job.get('url', '')[:1000]), job.get('job_id'), job.get('title', '')[:1000],
+           job.get('company', '')[:500], job.get('location', '')[:500], job.get('post_date'),
+           job.get('source', 'unknown'), details.get('description', '')[:65000],
+           details.get('industry', '')[:500], scraped_at, scraped_at)
+    csv_row = {
+        'title': job.get('title', ''), 'company': job.get('company', ''), 'location': job.get('location', ''),
+        'url': job.get('url', ''), 'post_date': job.get('post_date', ''), 'scraped_at': job.get('scraped_at', ''),
+        'source': job.get('source', ''), 'description': details.get('description', '')[:CSV_DESCRIPTION_CHARS],
+        'industry': details.get('industry', ''), 'skills': ', '.join(details.get('skills', []))
+    }
+    return row, [csv_row[name] for name in CSV_FIELDNAMES], json.dumps(job, ensure_ascii=False)
+
+
+def serialize_record(job):
+    return job.db_row(), job.csv_row(), json.dumps(job.to_json(), ensure_ascii=False)
+
+
+def timed(jobs, serialize):
+    started = time.perf_counter()
+    results = [serialize(job) for job in jobs]
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=100000)
+    args = parser.parse_args()
+
+    fields = make_fields(args.jobs)
+    dicts, dict_bytes = build(fields, as_dict)
+    records, record_bytes = build(fields, as_record)
+    print(f"{args.jobs} enriched jobs")
+    print(f"  dicts      : {dict_bytes / 1e6:8.1f} MB  ({dict_bytes / args.jobs:6.0f} B/job)")
+    print(f"  JobRecords : {record_bytes / 1e6:8.1f} MB  ({record_bytes / args.jobs:6.0f} B/job, "
+          f"{dict_bytes / record_bytes:.1f}x smaller)")
+
+    dict_seconds, expected = timed(dicts, serialize_dict)
+    record_seconds, results = timed(records, serialize_record)
+    # Same rows apart from the scraped_at datetimes, which are parsed again each time
+    if [(row[:9], csv_row, text) for row, csv_row, text in results] != \
+            [(row[:9], csv_row, text) for row, csv_row, text in expected]:
+        sys.exit("JobRecords serialized differently from dicts")
+    print("serialize (db row, csv row, json) per job")
+    print(f"  dicts      : {dict_seconds:6.2f}s  {args.jobs / dict_seconds:10.0f} jobs/s")
+    print(f"  JobRecords : {record_seconds:6.2f}s  {args.jobs / record_seconds:10.0f} jobs/s "
+          f"({dict_seconds / record_seconds:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Micro-benchmark: compiled single-pass SkillMatcher vs the legacy ten-regex scan.
+
+Usage: python benchmarks/bench_skill_matcher.py [--docs 200] [--words 5000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_matcher import SkillMatcher, DEFAULT_TAXONOMY_FILE  # noqa: E402
+
+LEGACY_PATTERNS = [
+    r'\b(?:Python|Java|JavaScript|TypeScript|SQL|R|Scala|C\+\+|C#|Go|Ruby|PHP|Swift|Kotlin)\b',
+    r'\b(?:AWS|Azure|GCP|Google Cloud Platform|Amazon Web Services|Microsoft Azure)\b',
+    r'\b(?:Docker|Kubernetes|Terraform|Ansible|Jenkins|GitLab CI|GitHub Actions)\b',
+    r'\b(?:Spark|Hadoop|Kafka|Airflow|Tableau|Power BI|Looker|Snowflake)\b',
+    r'\b(?:TensorFlow|PyTorch|Keras|scikit-learn|MLlib|OpenCV|NLTK|spaCy)\b',
+    r'\b(?:React|Angular|Vue\.js|Node\.js|Django|Flask|Spring Boot|Express\.js)\b',
+    r'\b(?:MySQL|PostgreSQL|MongoDB|Redis|Cassandra|Elasticsearch|DynamoDB)\b',
+    r'\b(?:Git|SVN|Mercurial|JIRA|Confluence|Slack|Trello|Asana)\b',
+    r'\b(?:REST|GraphQL|SOAP|JSON|XML|Microservices|API)\b',
+    r'\b(?:Agile|Scrum|Kanban|Waterfall|DevOps|CI/CD)\b'
+]
+
+FILLER = ('the team builds reliable services for customers across regions and owns delivery end to end '
+          'you will collaborate with product design and data partners to ship features quickly').split()
+
+
+def legacy_extract(text):
+    """The original AdvancedLinkedInScraper._extract_skills_from_text"""
+    skills = set()
+    for pattern in LEGACY_PATTERNS:
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        skills.update(match for match in matches)
+    return list(skills)
+
+
+def make_corpus(docs, words, matcher, seed=7):
+    rng = random.Random(seed)
+    terms = matcher.skills
+    corpus = []
+    for _ in range(docs):
+        tokens = []
+        for _ in range(words):
+            if rng.random() < 0.03:
+                term = rng.choice(terms)
+                # Real postings mix casings ("python", "Python")
+                tokens.append(term.lower() if rng.random() < 0.3 else term)
+            else:
+                tokens.append(rng.choice(FILLER))
+        corpus.append(' '.join(tokens))
+    return corpus
+
+
+def timed(func, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--words', type=int, default=5000, help='words per description')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--taxonomy', default=DEFAULT_TAXONOMY_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matcher = SkillMatcher.from_file(args.taxonomy)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    corpus = make_corpus(args.docs, args.words, matcher)
+    megabytes = sum(len(text) for text in corpus) / 1e6
+
+    legacy = timed(legacy_extract, corpus, args.repeat)
+    compiled = timed(matcher.extract, corpus, args.repeat)
+
+    legacy_duplicates = 0
+    for text in corpus:
+        found = legacy_extract(text)
+        if len({skill.casefold() for skill in found}) < len(found):
+            legacy_duplicates += 1
+
+    print(f"corpus: {args.docs} descriptions x {args.words} words ({megabytes:.1f} MB)")
+    print(f"matcher compile: {compile_ms:.1f} ms for {len(matcher.skills)} skills")
+    print(f"legacy  : {legacy:.3f}s  {megabytes / legacy:.1f} MB/s")
+    print(f"compiled: {compiled:.3f}s  {megabytes / compiled:.1f} MB/s  ({legacy / compiled:.1f}x)")
+    print(f"descriptions where legacy reported case-duplicate skills: {legacy_duplicates}/{args.docs}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: storage size and dashboard query time as the same postings are searched repeatedly.
+
+Simulates --sessions searches that each return --per-session postings drawn
+from a pool of --unique postings, saved with the legacy one-row-per-sighting
+schema and with the normalized schema (unique jobs, skills dictionary).
+
+Usage: python benchmarks/bench_storage.py [--sessions 50] [--per-session 500] [--unique 2000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_db_writes import (DASHBOARD_QUERIES, LEGACY_DASHBOARD_QUERIES, bulk_save, fresh_database,  # noqa: E402
+                             legacy_database, legacy_save, make_jobs)
+
+
+def database_size(path):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    return os.path.getsize(path)
+
+
+def query_time(path, queries, repeat=20):
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            conn.execute(query).fetchall()
+    conn.close()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--per-session', type=int, default=500)
+    parser.add_argument('--unique', type=int, default=2000, help='size of the posting pool')
+    parser.add_argument('--skills', type=int, default=6, help='skills per job')
+    args = parser.parse_args()
+
+    pool = make_jobs(args.unique, args.skills)
+    rng = random.Random(5)
+    searches = [rng.sample(pool, min(args.per_session, args.unique)) for _ in range(args.sessions)]
+    sightings = sum(len(jobs) for jobs in searches)
+    print(f"{args.sessions} searches, {sightings} sightings of {args.unique} unique postings")
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = legacy_database(os.path.join(directory, 'legacy.db'))
+        start = time.perf_counter()
+        for i, jobs in enumerate(searches):
+            legacy_save(legacy_path, f'legacy-{i}', jobs)
+        legacy_write = time.perf_counter() - start
+
+        path = fresh_database(os.path.join(directory, 'normalized.db'))
+        start = time.perf_counter()
+        for i, jobs in enumerate(searches):
+            bulk_save(f'bulk-{i}', jobs)
+        write = time.perf_counter() - start
+
+        legacy_size, size = database_size(legacy_path), database_size(path)
+        legacy_query, query = query_time(legacy_path, LEGACY_DASHBOARD_QUERIES), query_time(path, DASHBOARD_QUERIES)
+
+    print(f"{'':12}{'size':>10}{'save all':>11}{'/database':>12}")
+    print(f"{'legacy':12}{legacy_size / 1e6:>8.1f}MB{legacy_write:>10.2f}s{legacy_query * 1000:>10.2f}ms")
+    print(f"{'normalized':12}{size / 1e6:>8.1f}MB{write:>10.2f}s{query * 1000:>10.2f}ms")
+    print(f"{'ratio':12}{legacy_size / size:>9.1f}x{legacy_write / write:>10.1f}x{legacy_query / query:>11.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""Benchmark suite: the full search pipeline replayed offline from recorded fixtures.
+
+Runs --searches complete searches through run_search_task (search pages,
+card parsing, detail enrichment, skill extraction and database writes)
+with LinkedIn replaced by a ReplayAdapter that serves the fixture corpus
+with the given latency and error rates. Reports end-to-end
+throughput and latency percentiles per stage, and saves everything as JSON.
+With --baseline, the run is compared against an earlier results file and
+the exit status is 1 if anything regressed by more than --tolerance.
+
+Usage: python benchmarks/run_benchmarks.py [--searches 20] [--latency 0.05] [--error-rate 0.02]
+                                           [--fixtures DIR] [--output FILE] [--baseline FILE]
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import parse_pool  # noqa: E402
+import pipeline  # noqa: E402
+from parsers import get_parser  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+from replay import FixtureStore, ReplayAdapter  # noqa: E402
+from skill_matcher import get_skill_matcher  # noqa: E402
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+STAGES = ('search', 'fetch_search', 'parse_cards', 'fetch_detail', 'parse_details', 'skill_extraction', 'db_flush')
+PERCENTILES = (50, 90, 99)
+
+
+class StageTimer:
+    """Wall-clock samples per pipeline stage, collected by wrapping the stage functions"""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self._patched = []
+
+    def wrap(self, owner, attribute, stage):
+        """Time every call of owner.attribute; stage may be a function of the call arguments"""
+        original = getattr(owner, attribute)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                name = stage(*args, **kwargs) if callable(stage) else stage
+                self.samples[name].append(time.perf_counter() - started)
+
+        self._patched.append((owner, attribute, owner.__dict__.get(attribute)))
+        setattr(owner, attribute, timed)
+
+    def restore(self):
+        for owner, attribute, original in reversed(self._patched):
+            if original is None:
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, original)
+        self._patched = []
+
+    def summary(self):
+        return {stage: summarize(samples) for stage, samples in self.samples.items()}
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    summary = {'count': len(ordered), 'total_s': round(sum(ordered), 4)}
+    if not ordered:
+        return summary
+    summary['mean_ms'] = round(sum(ordered) / len(ordered) * 1000, 3)
+    for percentile in PERCENTILES:
+        # Nearest-rank percentile
+        index = max(0, -(-percentile * len(ordered) // 100) - 1)
+        summary[f'p{percentile}_ms'] = round(ordered[index] * 1000, 3)
+    summary['max_ms'] = round(ordered[-1] * 1000, 3)
+    return summary
+
+
+class BenchContext:
+    """Stands in for a task queue context: progress updates go nowhere"""
+
+    def update(self, **fields):
+        pass
+
+    def check_cancelled(self):
+        pass
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARKS, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args):
+    store = FixtureStore(args.fixtures, vary=True)
+    transport = ReplayAdapter(store, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                              throttle_rate=args.throttle_rate, retry_after=0, seed=args.seed)
+    timer = StageTimer()
+    timer.wrap(app.AdvancedLinkedInScraper, '_request',
+               lambda self, url, endpoint, *a, **k: 'fetch_search' if endpoint == 'search' else 'fetch_detail')
+    timer.wrap(get_parser(), 'job_cards', 'parse_cards')
+    timer.wrap(get_parser(), 'job_details', 'parse_details')
+    timer.wrap(get_skill_matcher(), 'extract', 'skill_extraction')
+    timer.wrap(pipeline.DatabaseWriter, 'flush', 'db_flush')
+    timer.wrap(app, 'run_search_task', 'search')
+    original_scraper = app.AdvancedLinkedInScraper.__init__
+
+    def replayed(self, *a, **k):
+        k['transport'] = transport
+        original_scraper(self, *a, **k)
+
+    app.AdvancedLinkedInScraper.__init__ = replayed
+    # Measure the pipeline, not the politeness budget
+    unlimited = (1e9, 1e9)
+    app.rate_limiter = RateLimiter({}, default_limit=unlimited)
+    app.detail_cache = None
+    app.PARSE_WORKERS = args.parse_workers
+    if args.parse_workers:
+        # Started before the clock, as the server starts it with its task workers
+        parse_pool.get_pool(args.parse_workers)
+    jobs = []
+    lock = threading.Lock()
+
+    def search(i):
+        result = app.run_search_task({'keywords': f'benchmark {i}', 'location': 'Replay City',
+                                      'max_results': args.max_results}, {}, BenchContext())
+        with lock:
+            jobs.append(result.get('jobs_count', 0))
+
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            app.DATABASE = os.path.join(directory, 'benchmark.db')
+            app.init_database()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                list(executor.map(search, range(args.searches)))
+            elapsed = time.perf_counter() - started
+            db_bytes = os.path.getsize(app.DATABASE)
+            app.get_db_connection().release()
+            app._db_local.conn = None
+    finally:
+        os.chdir(cwd)
+        app.AdvancedLinkedInScraper.__init__ = original_scraper
+        parse_pool.shutdown_pool()
+        timer.restore()
+
+    stages = timer.summary()
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'html_parser': get_parser().name,
+            'git_commit': git_commit()
+        },
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'throughput': {
+            'wall_seconds': round(elapsed, 3),
+            'searches': args.searches,
+            'jobs': sum(jobs),
+            'jobs_per_second': round(sum(jobs) / elapsed, 2),
+            'searches_per_second': round(args.searches / elapsed, 3),
+            'search_pages': stages['fetch_search']['count'],
+            'detail_pages': stages['fetch_detail']['count'],
+            'database_mb': round(db_bytes / 1e6, 2)
+        },
+        'transport': transport.stats(),
+        'stages': stages
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print changes against a baseline run, return the list of regressions"""
+    regressions = []
+    old, new = baseline['throughput']['jobs_per_second'], results['throughput']['jobs_per_second']
+    change = (new - old) / old if old else 0.0
+    print(f"\nvs baseline {baseline.get('created_at')} ({baseline['environment'].get('git_commit')})")
+    print(f"{'jobs/s':26}{old:>10.1f}{new:>10.1f}{change:>+9.0%}")
+    if change < -tolerance:
+        regressions.append('jobs_per_second')
+    for stage in STAGES:
+        for metric in ('p50_ms', 'p90_ms'):
+            old = baseline['stages'].get(stage, {}).get(metric)
+            new = results['stages'][stage].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            print(f"{stage + ' ' + metric:26}{old:>10.2f}{new:>10.2f}{change:>+9.0%}")
+            if change > tolerance:
+                regressions.append(f'{stage} {metric}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=os.path.join(BENCHMARKS, 'fixtures'),
+                        help='directory of search_*.html/detail_*.html pages or a recording')
+    parser.add_argument('--searches', type=int, default=20)
+    parser.add_argument('--max-results', type=int, default=70, help='max_results of every search')
+    parser.add_argument('--concurrency', type=int, default=app.SEARCH_WORKERS, help='searches running at once')
+    parser.add_argument('--parse-workers', type=int, default=app.PARSE_WORKERS,
+                        help='parse worker processes (their parse stages are not timed here)')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.02, help='up to this many extra seconds per response')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='share of requests answered with 503')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before failing')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    results = run(args)
+    throughput = results['throughput']
+    print(f"{throughput['searches']} searches, {throughput['jobs']} jobs, {throughput['detail_pages']} detail pages "
+          f"in {throughput['wall_seconds']:.1f}s: {throughput['jobs_per_second']:.1f} jobs/s "
+          f"(transport: {results['transport']})")
+    print(f"{'stage':18}{'count':>7}" + ''.join(f"{'p' + str(p):>9}" for p in PERCENTILES) + f"{'total':>10}")
+    for stage, summary in results['stages'].items():
+        if summary['count']:
+            print(f"{stage:18}{summary['count']:>7}"
+                  + ''.join(f"{summary[f'p{p}_ms']:>7.2f}ms" for p in PERCENTILES)
+                  + f"{summary['total_s']:>9.2f}s")
+
+    output = args.output or os.path.join(BENCHMARKS, 'results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"saved {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"regressed more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""Keyset-paginated browsing of stored jobs and search sessions.
+
+A page is read as "the next LIMIT rows after the last one shown", seeking
+straight to it in an index on the sort key, instead of with OFFSET, which
+has SQLite step over every row before the page. The thousandth page costs
+what the first one does. The cursor handed to clients is the sort key of
+the last row shown, base64-encoded: (searched_at, id) for sessions, and the
+id alone for jobs, which are listed newest stored first. A job's
+scraped_at moves on every re-sighting, so a cursor on it would let jobs
+seen again mid-paging jump pages and repeat or go missing.
+"""
+import base64
+import binascii
+import json
+
+from rollups import keyword_key
+
+DESCRIPTION_PREVIEW_CHARS = 500
+# A skill with at most this many jobs has them all sorted for a page; a more
+# common one is found by walking the newest jobs, which soon fills a page
+SKILL_SORT_MAX_JOBS = 5000
+
+
+# Cursor shapes: [id] for jobs, also [scraped_at, id] as handed out before;
+# [searched_at, id] for sessions, whose ids are text
+JOB_CURSOR = ((int,), (str, int))
+SESSION_CURSOR = ((str, str),)
+SQLITE_MIN_INT, SQLITE_MAX_INT = -2 ** 63, 2 ** 63 - 1
+
+
+def create_indexes(cursor):
+    # The rowid is the last column of every index, so it breaks scraped_at ties for free
+    cursor.execute('CREATE INDEX idx_jobs_scraped_at ON jobs(scraped_at)')
+    cursor.execute('CREATE INDEX idx_jobs_company ON jobs(company COLLATE NOCASE, scraped_at)')
+    cursor.execute('CREATE INDEX idx_jobs_location ON jobs(location COLLATE NOCASE, scraped_at)')
+    # search_sessions.id is TEXT, not the rowid, so it has to be in the index to order ties
+    cursor.execute('DROP INDEX IF EXISTS idx_sessions_searched_at')
+    cursor.execute('CREATE INDEX idx_sessions_searched_at_id ON search_sessions(searched_at, id)')
+
+
+def create_id_order_indexes(cursor):
+    # Equal company or location values sit in rowid (job id) order, the order jobs are paged in
+    cursor.execute('DROP INDEX IF EXISTS idx_jobs_company')
+    cursor.execute('DROP INDEX IF EXISTS idx_jobs_location')
+    cursor.execute('CREATE INDEX idx_jobs_company ON jobs(company COLLATE NOCASE)')
+    cursor.execute('CREATE INDEX idx_jobs_location ON jobs(location COLLATE NOCASE)')
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(value, shapes):
+    """The sort key of a cursor, None for the first page
+
+    shapes lists the element types a cursor may have, e.g. ((str, int),);
+    ValueError if the cursor is malformed or has none of them.
+    """
+    if not value:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+    # type() rather than isinstance, so that true and false are not taken for ids
+    if not isinstance(key, list) or tuple(type(v) for v in key) not in shapes or \
+            any(type(v) is int and not SQLITE_MIN_INT <= v <= SQLITE_MAX_INT for v in key):
+        raise ValueError('Invalid cursor')
+    return key
+
+
+def _page(rows, limit, key):
+    """The rows of a page and the cursor of the next one (None on the last page)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+
+def _skills_of(conn, job_ids):
+    skills = {}
+    for job_id, name in conn.execute('''
+        SELECT js.job_id, s.name FROM job_skills js JOIN skills s ON s.id = js.skill_id
+        WHERE js.job_id IN (SELECT value FROM json_each(?))
+        ORDER BY s.name
+    ''', (json.dumps(job_ids),)):
+        skills.setdefault(job_id, []).append(name)
+    return skills
+
+
+def list_jobs(conn, limit, cursor=None, company=None, location=None, skill=None, session_id=None,
+              since=None, until=None):
+    """One page of jobs, newest stored first, and the cursor of the next page
+
+    company, location and skill match whole values, ignoring case; since and
+    until bound when the job was last scraped.
+    """
+    conditions = []
+    params = []
+    if company:
+        conditions.append('j.company = ? COLLATE NOCASE')
+        params.append(company)
+    if location:
+        conditions.append('j.location = ? COLLATE NOCASE')
+        params.append(location)
+    if skill:
+        row = conn.execute('SELECT id FROM skills WHERE name = ? COLLATE NOCASE', (skill,)).fetchone()
+        if row is None:
+            return [], None
+        jobs_with_skill = conn.execute('SELECT COUNT(*) FROM (SELECT 1 FROM job_skills WHERE skill_id = ? LIMIT ?)',
+                                       (row[0], SKILL_SORT_MAX_JOBS + 1)).fetchone()[0]
+        if jobs_with_skill <= SKILL_SORT_MAX_JOBS:
+            conditions.append('j.id IN (SELECT job_id FROM job_skills WHERE skill_id = ?)')
+        else:
+            conditions.append('EXISTS (SELECT 1 FROM job_skills js WHERE js.job_id = j.id AND js.skill_id = ?)')
+        params.append(row[0])
+    if session_id:
+        conditions.append('j.id IN (SELECT job_id FROM session_jobs WHERE session_id = ?)')
+        params.append(session_id)
+    if since:
+        conditions.append('j.scraped_at >= ?')
+        params.append(since.isoformat(sep=' '))
+    if until:
+        conditions.append('j.scraped_at < ?')
+        params.append(until.isoformat(sep=' '))
+    if cursor:
+        # The id is the last value of every jobs cursor, including the (scraped_at, id) ones handed out before
+        conditions.append('j.id < ?')
+        params.append(cursor[-1])
+    where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+    rows = conn.execute(f'''
+        SELECT j.id, j.linkedin_job_id, j.title, j.company, j.location, j.url, j.post_date, j.scraped_at,
+               j.source, j.industry, substr(j.description, 1, {DESCRIPTION_PREVIEW_CHARS}) AS description
+        FROM jobs j
+        {where}
+        ORDER BY j.id DESC
+        LIMIT ?
+    ''', (*params, limit + 1)).fetchall()
+    rows, next_cursor = _page(rows, limit, lambda row: [row['id']])
+    skills = _skills_of(conn, [row['id'] for row in rows])
+    jobs = [{
+        'job_id': row['linkedin_job_id'],
+        'title': row['title'],
+        'company': row['company'],
+        'location': row['location'],
+        'url': row['url'],
+        'post_date': row['post_date'],
+        'scraped_at': row['scraped_at'],
+        'source': row['source'],
+        'industry': row['industry'] or '',
+        'description': row['description'] or '',
+        'skills': skills.get(row['id'], [])
+    } for row in rows]
+    return jobs, next_cursor
+
+
+def list_sessions(conn, limit, cursor=None, keyword=None, location=None, since=None, until=None):
+    """One page of search sessions, most recent first, and the cursor of the next page"""
+    conditions = []
+    params = []
+    if keyword:
+        conditions.append('lower(trim(keywords)) = ?')
+        params.append(keyword_key(keyword))
+    if location:
+        conditions.append('location = ? COLLATE NOCASE')
+        params.append(location)
+    if since:
+        conditions.append('searched_at >= ?')
+        params.append(since.isoformat(sep=' '))
+    if until:
+        conditions.append('searched_at < ?')
+        params.append(until.isoformat(sep=' '))
+    if cursor:
+        conditions.append('(searched_at, id) < (?, ?)')
+        params.extend(cursor)
+    where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+    rows = conn.execute(f'''
+        SELECT id, keywords, location, max_results, use_auth, searched_at, total_jobs
+        FROM search_sessions
+        {where}
+        ORDER BY searched_at DESC, id DESC
+        LIMIT ?
+    ''', (*params, limit + 1)).fetchall()
+    rows, next_cursor = _page(rows, limit, lambda row: [row['searched_at'], row['id']])
+    sessions = [{
+        'session_id': row['id'],
+        'keywords': row['keywords'],
+        'location': row['location'],
+        'max_results': row['max_results'],
+        'use_auth': bool(row['use_auth']),
+        'searched_at': row['searched_at'],
+        'total_jobs': row['total_jobs']
+    } for row in rows]
+    return sessions, next_cursor
@@ -0,0 +1,79 @@
+import zlib
+from datetime import datetime
+
+# A query is 'pending' until a worker picks it up, 'running' while pages are
+# being fetched, then 'done' (results exhausted or limit reached) or
+# 'failed' (too many errors). Everything but 'done' is picked up again on resume.
+UNFINISHED = ('pending', 'running', 'failed')
+
+
+def create_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+            crawl_id TEXT NOT NULL,
+            keywords TEXT NOT NULL,
+            location TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            next_start INTEGER NOT NULL DEFAULT 0,
+            pages INTEGER NOT NULL DEFAULT 0,
+            jobs INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            error TEXT,
+            updated_at DATETIME,
+            PRIMARY KEY (crawl_id, keywords, location)
+        ) WITHOUT ROWID
+    ''')
+
+
+def query_hash(keywords, location):
+    return zlib.crc32(f'{keywords}\n{location}'.encode('utf-8'))
+
+
+def shard_of(keywords, location, shards):
+    """Stable shard of a query, the same in every process and on every run"""
+    return query_hash(keywords, location) % max(1, shards)
+
+
+def register(conn, crawl_id, queries):
+    """Add a crawl's (keywords, location) queries, keeping progress of ones already known
+
+    Returns the number of queries that were new.
+    """
+    cursor = conn.cursor()
+    before = conn.total_changes
+    cursor.executemany('''
+        INSERT OR IGNORE INTO crawl_checkpoints (crawl_id, keywords, location, session_id, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(crawl_id, keywords, location, f'{crawl_id}-{query_hash(keywords, location):08x}', datetime.now())
+          for keywords, location in queries])
+    conn.commit()
+    return conn.total_changes - before
+
+
+def unfinished(conn, crawl_id, shard=None, shards=1):
+    """Checkpoints of a crawl still to be fetched, optionally only those of one shard"""
+    rows = conn.execute(f'''
+        SELECT * FROM crawl_checkpoints
+        WHERE crawl_id = ? AND status IN ({', '.join('?' for _ in UNFINISHED)})
+        ORDER BY keywords, location
+    ''', (crawl_id, *UNFINISHED)).fetchall()
+    if shard is None:
+        return rows
+    return [row for row in rows if shard_of(row['keywords'], row['location'], shards) == shard]
+
+
+def save(cursor, crawl_id, keywords, location, next_start, pages, jobs, status, error=None):
+    cursor.execute('''
+        UPDATE crawl_checkpoints
+        SET next_start = ?, pages = ?, jobs = ?, status = ?, error = ?, updated_at = ?
+        WHERE crawl_id = ? AND keywords = ? AND location = ?
+    ''', (next_start, pages, jobs, status, error, datetime.now(), crawl_id, keywords, location))
+
+
+def summary(conn, crawl_id):
+    """Queries, pages and jobs of a crawl per status"""
+    return {row['status']: {'queries': row['queries'], 'pages': row['pages'], 'jobs': row['jobs']}
+            for row in conn.execute('''
+                SELECT status, COUNT(*) AS queries, SUM(pages) AS pages, SUM(jobs) AS jobs
+                FROM crawl_checkpoints WHERE crawl_id = ? GROUP BY status
+            ''', (crawl_id,))}
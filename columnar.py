@@ -0,0 +1,273 @@
+"""Columnar export: job sightings as partitioned Parquet or Arrow IPC files for analytics.
+
+Each row is one job as seen by one search session, with the full
+description and the skill list kept as a list column. Files are laid out
+hive-style by the day the job was seen and the search keyword:
+
+    <out>/scrape_date=2026-10-18/keyword=python%20developer/part-20261018T120000-0.parquet
+
+Company, location, source, industry, session and skill columns are
+dictionary encoded. Runs are incremental: _watermark.json in the output
+directory holds the sighting time exported up to, and each run appends new
+part files for the sightings after it. Sightings younger than --lag are
+left for the next run, so batches still being written are not cut in half.
+
+Usage:
+    python columnar.py --out exports/columnar
+    python columnar.py --out exports/arrow --format arrow --full
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import metrics
+from rollups import keyword_key
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+BATCH_ROWS = 10000  # rows buffered per partition before a row group is written
+DEFAULT_LAG_SECONDS = 300
+WATERMARK_FILE = '_watermark.json'
+EMPTY_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+_SKILL_SEPARATOR = '\x1f'
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # what SQLite's datetime() returns
+
+
+def create_index(cursor):
+    # Sightings in time order, for the export window; datetime() evens out
+    # the ISO 'T' and space separated timestamps stored over the years
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_jobs_seen_at ON session_jobs(datetime(seen_at))')
+
+
+def _schema():
+    labels = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('session_id', labels),
+        ('keywords', labels),
+        ('search_location', labels),
+        ('seen_at', pa.timestamp('us')),
+        ('job_id', pa.int64()),
+        ('linkedin_job_id', pa.int64()),
+        ('title', pa.string()),
+        ('company', labels),
+        ('location', labels),
+        ('url', pa.string()),
+        ('post_date', pa.string()),
+        ('source', labels),
+        ('industry', labels),
+        ('description', pa.string()),
+        ('skills', pa.list_(labels)),
+        ('first_seen_at', pa.timestamp('us')),
+    ])
+
+
+def _timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def iter_sightings(conn, since, until):
+    """Sightings with since <= datetime(seen_at) < until, oldest first"""
+    cursor = conn.execute('''
+        SELECT sj.session_id, s.keywords, s.location AS search_location, sj.seen_at,
+               date(sj.seen_at) AS day, j.id AS job_id, j.linkedin_job_id, j.title, j.company, j.location,
+               j.url, j.post_date, j.source, j.industry, j.description, j.first_seen_at,
+               (SELECT group_concat(name, ?) FROM (
+                    SELECT k.name FROM job_skills js JOIN skills k ON k.id = js.skill_id
+                    WHERE js.job_id = j.id ORDER BY k.name
+               )) AS skills
+        FROM session_jobs sj
+        JOIN search_sessions s ON s.id = sj.session_id
+        JOIN jobs j ON j.id = sj.job_id
+        WHERE datetime(sj.seen_at) >= ? AND datetime(sj.seen_at) < ?
+        ORDER BY datetime(sj.seen_at)
+    ''', (_SKILL_SEPARATOR, since, until))
+    while True:
+        rows = cursor.fetchmany(1000)
+        if not rows:
+            break
+        yield from rows
+
+
+class _Partition:
+    """Buffered writer of one scrape_date/keyword part file"""
+
+    def __init__(self, path, fmt, schema):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.schema = schema
+        self.rows = []
+        self.written = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if fmt == 'parquet':
+            self.writer = pq.ParquetWriter(self.tmp_path, schema, compression='zstd')
+        else:
+            self.writer = pa.ipc.new_file(self.tmp_path, schema)
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        columns = {name: [row[name] for row in self.rows] for name in self.schema.names}
+        self.writer.write_table(pa.table(columns, schema=self.schema))
+        self.written += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def commit(self):
+        os.replace(self.tmp_path, self.path)
+
+
+def read_watermark(directory):
+    try:
+        with open(os.path.join(directory, WATERMARK_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_watermark(directory, state):
+    path = os.path.join(directory, WATERMARK_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def export(conn, directory, fmt='parquet', full=False, lag_seconds=DEFAULT_LAG_SECONDS):
+    """Append the sightings stored since the last run to the dataset in directory
+
+    Part files only become visible (renamed from .tmp) once the whole run
+    has been written, and the watermark moves after that, so an interrupted
+    run is simply repeated. full=True starts the dataset over.
+    """
+    if pa is None:
+        raise RuntimeError("Columnar export needs pyarrow (pip install pyarrow)")
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(COLUMNAR_FORMATS)}")
+    os.makedirs(directory, exist_ok=True)
+    for leftover in glob.glob(os.path.join(directory, '**', '*.tmp'), recursive=True):
+        os.remove(leftover)
+
+    state = None if full else read_watermark(directory)
+    if state and state['format'] != fmt:
+        raise ValueError(f"{directory} holds a {state['format']} dataset, use --full to rewrite it as {fmt}")
+    # A full rewrite drops the old part files only once the new ones are in place
+    stale = glob.glob(os.path.join(directory, 'scrape_date=*', '*', 'part-*')) if full else []
+    since = state['exported_until'] if state else '0000-01-01 00:00:00'
+    until = (datetime.now() - timedelta(seconds=lag_seconds)).strftime(_TIME_FORMAT)
+    if until <= since:
+        return {'rows': 0, 'files': 0, 'exported_until': since}
+
+    run_id = datetime.now().strftime('%Y%m%dT%H%M%S')
+    started = time.perf_counter()
+    schema = _schema()
+    finished = []
+    partitions = {}
+    current_day = None
+    try:
+        for row in iter_sightings(conn, since, until):
+            if row['day'] != current_day:
+                # Sightings arrive in time order: a day's files are complete once the next day starts
+                for partition in partitions.values():
+                    partition.close()
+                finished.extend(partitions.values())
+                partitions = {}
+                current_day = row['day']
+            keyword = keyword_key(row['keywords'])
+            partition = partitions.get(keyword)
+            if partition is None:
+                folder = os.path.join(directory, f"scrape_date={current_day or EMPTY_PARTITION}",
+                                      f"keyword={quote(keyword, safe='') or EMPTY_PARTITION}")
+                path = os.path.join(folder, f'part-{run_id}-{len(finished) + len(partitions)}{COLUMNAR_FORMATS[fmt]}')
+                partition = partitions[keyword] = _Partition(path, fmt, schema)
+            partition.add({
+                'session_id': row['session_id'],
+                'keywords': row['keywords'],
+                'search_location': row['search_location'],
+                'seen_at': _timestamp(row['seen_at']),
+                'job_id': row['job_id'],
+                'linkedin_job_id': row['linkedin_job_id'],
+                'title': row['title'],
+                'company': row['company'],
+                'location': row['location'],
+                'url': row['url'],
+                'post_date': row['post_date'],
+                'source': row['source'],
+                'industry': row['industry'] or None,
+                'description': row['description'],
+                'skills': row['skills'].split(_SKILL_SEPARATOR) if row['skills'] else [],
+                'first_seen_at': _timestamp(row['first_seen_at']),
+            })
+        for partition in partitions.values():
+            partition.close()
+        finished.extend(partitions.values())
+    except BaseException:
+        for partition in partitions.values():
+            partition.writer.close()
+        for partition in list(partitions.values()) + finished:
+            os.remove(partition.tmp_path)
+        raise
+
+    for partition in finished:
+        partition.commit()
+    for path in set(stale) - {partition.path for partition in finished}:
+        os.remove(path)
+    rows = sum(partition.written for partition in finished)
+    _write_watermark(directory, {'format': fmt, 'exported_until': until, 'last_run': run_id,
+                                 'last_run_rows': rows})
+    metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage='columnar_export')
+    metrics.STAGE_ITEMS.inc(rows, stage='columnar_export')
+    logger.info(f"Exported {rows} sightings in {len(finished)} {fmt} files to {directory} (up to {until})")
+    return {'rows': rows, 'files': len(finished), 'exported_until': until}
+
+
+def main():
+    import app
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--out', required=True, help='dataset directory')
+    parser.add_argument('--format', choices=sorted(COLUMNAR_FORMATS), default='parquet')
+    parser.add_argument('--full', action='store_true', help='rewrite the dataset from scratch')
+    parser.add_argument('--lag', type=int, default=DEFAULT_LAG_SECONDS,
+                        help='seconds a sighting must be old before it is exported')
+    parser.add_argument('--database', default=app.DATABASE)
+    args = parser.parse_args()
+
+    app.DATABASE = args.database
+    app.init_database()
+    conn = app.open_read_connection()
+    try:
+        result = export(conn, args.out, args.format, full=args.full, lag_seconds=args.lag)
+    except (RuntimeError, ValueError) as e:
+        parser.exit(1, f"{e}\n")
+    finally:
+        conn.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Batch crawl: run a keyword x location query matrix, sharded across worker processes.
+
+Every query gets its own search session and a checkpoint row holding its
+pagination cursor. The cursor advances in the same transaction that stores
+a page's jobs, so an interrupted crawl started again with the same --crawl
+name resumes each query at the first page it has not stored yet.
+All worker processes draw from one shared rate limit (ENDPOINT_RATE_LIMITS).
+
+Usage:
+    python crawl.py --keywords "python developer,data engineer" --locations "London,Berlin,Remote"
+    python crawl.py --matrix queries.csv --crawl weekly --shards 8 --workers 4
+    python crawl.py --crawl weekly --status
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+import app
+import checkpoints
+from pipeline import DatabaseWriter
+from rate_limiter import SharedRateLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PAGES = 40
+DEFAULT_MAX_JOBS = 1000
+
+
+def load_matrix(path):
+    """(keywords, location) pairs from a CSV with keywords,location columns or a JSON list"""
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith('.json'):
+            rows = json.load(f)
+            return [(row['keywords'], row.get('location') or '') if isinstance(row, dict) else tuple(row)
+                    for row in rows]
+        return [(row['keywords'], row.get('location') or '') for row in csv.DictReader(f)]
+
+
+def build_queries(args):
+    queries = []
+    if args.matrix:
+        queries.extend(load_matrix(args.matrix))
+    if args.keywords:
+        keywords = [k.strip() for k in args.keywords.split(',') if k.strip()]
+        locations = [l.strip() for l in (args.locations or '').split(',')] or ['']
+        queries.extend(product(keywords, locations))
+    # Keep the first occurrence of each query
+    return list(dict.fromkeys((k.strip(), (l or '').strip()) for k, l in queries if k and k.strip()))
+
+
+def default_crawl_id(queries):
+    digest = hashlib.sha1(json.dumps(sorted(queries)).encode('utf-8')).hexdigest()
+    return f'crawl-{digest[:8]}'
+
+
+def crawl_query(crawl_id, checkpoint, max_pages, max_jobs, max_details):
+    """Fetch one query's remaining pages, storing each page together with its cursor"""
+    keywords, location = checkpoint['keywords'], checkpoint['location']
+    start, pages, jobs = checkpoint['next_start'], checkpoint['pages'], checkpoint['jobs']
+    scraper = app.AdvancedLinkedInScraper()
+    writer = DatabaseWriter(app.get_db_connection, checkpoint['session_id'], keywords, location,
+                            max_jobs, False, append=True)
+    writer.open()
+    status, error = 'running', None
+    page_errors = 0
+    try:
+        writer.flush(lambda cursor: checkpoints.save(cursor, crawl_id, keywords, location,
+                                                     start, pages, jobs, status))
+        while pages < max_pages and jobs < max_jobs:
+            try:
+                page_jobs, cards = scraper.fetch_search_page(keywords, location, start)
+            except Exception as e:
+                page_errors += 1
+                logger.warning(f"Page at {start} of '{keywords}' in '{location}' failed: {e}")
+                if page_errors >= app.MAX_CONSECUTIVE_PAGE_ERRORS:
+                    status, error = 'failed', str(e)[:500]
+                    break
+                # Back off first: every worker shares the rate limit an immediate retry would spend
+                time.sleep(app.page_retry_delay(page_errors))
+                continue
+            page_errors = 0
+            if not cards:
+                break
+            page_jobs = page_jobs[:max_jobs - jobs]
+            if max_details:
+                # Each page gets the whole budget; one scraper serves every page of the query
+                enriched = scraper.iter_enriched(page_jobs, max_details=max(0, max_details - jobs),
+                                                 deadline=time.time() + app.ENRICH_TIME_BUDGET)
+                page_jobs = [job for job, _ in enriched]
+            for job in page_jobs:
+                writer.write(job)
+            start, pages, jobs = start + cards, pages + 1, jobs + len(page_jobs)
+            writer.flush(lambda cursor: checkpoints.save(cursor, crawl_id, keywords, location,
+                                                         start, pages, jobs, status))
+        if status == 'running':
+            status = 'done'
+        writer.flush(lambda cursor: checkpoints.save(cursor, crawl_id, keywords, location,
+                                                     start, pages, jobs, status, error))
+    finally:
+        writer.close()
+    logger.info(f"Crawled '{keywords}' in '{location}': {pages} pages, {jobs} jobs ({status})")
+    return status, pages, jobs
+
+
+def run_shard(crawl_id, shard, shards, max_pages, max_jobs, max_details):
+    """Crawl every unfinished query of one shard, returns (queries done, queries failed)"""
+    done = failed = 0
+    for checkpoint in checkpoints.unfinished(app.get_db_connection(), crawl_id, shard, shards):
+        try:
+            status, _, _ = crawl_query(crawl_id, checkpoint, max_pages, max_jobs, max_details)
+        except Exception as e:
+            logger.error(f"Crawl of '{checkpoint['keywords']}' in '{checkpoint['location']}' failed: {e}")
+            status = 'failed'
+        done += status == 'done'
+        failed += status == 'failed'
+    return done, failed
+
+
+def init_worker(database, limiter):
+    """Point a worker process at the crawl database and the shared rate limit"""
+    app.DATABASE = database
+    app.rate_limiter = limiter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--keywords', help='comma-separated keywords, crossed with --locations')
+    parser.add_argument('--locations', help='comma-separated locations')
+    parser.add_argument('--matrix', help='CSV (keywords,location columns) or JSON file of queries')
+    parser.add_argument('--crawl', help='crawl name; reuse it to resume (default: derived from the queries)')
+    parser.add_argument('--shards', type=int, default=None, help='number of shards (default: --workers)')
+    parser.add_argument('--shard', type=int, help='run only this shard (e.g. one per machine)')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes')
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_MAX_PAGES, help='pages per query')
+    parser.add_argument('--max-jobs', type=int, default=DEFAULT_MAX_JOBS, help='jobs per query')
+    parser.add_argument('--details', type=int, default=0, help='jobs per query to enrich with details')
+    parser.add_argument('--database', default=app.DATABASE)
+    parser.add_argument('--status', action='store_true', help='print crawl progress and exit')
+    args = parser.parse_args()
+
+    app.DATABASE = args.database
+    app.init_database()
+    conn = app.get_db_connection()
+    queries = build_queries(args)
+    crawl_id = args.crawl or (default_crawl_id(queries) if queries else None)
+    if not crawl_id:
+        parser.error('give --keywords or --matrix for a new crawl, or --crawl to resume one')
+    if args.status:
+        print(json.dumps({'crawl': crawl_id, 'status': checkpoints.summary(conn, crawl_id)}, indent=2))
+        return
+    added = checkpoints.register(conn, crawl_id, queries)
+    shards = max(1, args.shards or args.workers)
+    shard_ids = [args.shard] if args.shard is not None else list(range(shards))
+    logger.info(f"Crawl {crawl_id}: {added} new queries, "
+                f"{len(checkpoints.unfinished(conn, crawl_id))} to fetch in {shards} shards")
+
+    done = failed = 0
+    if args.workers <= 1:
+        for shard in shard_ids:
+            shard_done, shard_failed = run_shard(crawl_id, shard, shards, args.max_pages, args.max_jobs, args.details)
+            done, failed = done + shard_done, failed + shard_failed
+    else:
+        # Not fork: a forked worker would inherit this process's open SQLite connection
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        context = multiprocessing.get_context(method)
+        limiter = SharedRateLimiter(app.ENDPOINT_RATE_LIMITS, context=context)
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                                 initializer=init_worker, initargs=(app.DATABASE, limiter)) as executor:
+            futures = [executor.submit(run_shard, crawl_id, shard, shards, args.max_pages, args.max_jobs,
+                                       args.details) for shard in shard_ids]
+            for future in as_completed(futures):
+                shard_done, shard_failed = future.result()
+                done, failed = done + shard_done, failed + shard_failed
+
+    print(json.dumps({'crawl': crawl_id, 'done': done, 'failed': failed,
+                      'status': checkpoints.summary(conn, crawl_id)}, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
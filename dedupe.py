@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Descriptions get_job_details returns when a fetch fails, in place of real details
+TIMEOUT_DESCRIPTION = 'Timeout fetching details'
+ERROR_DESCRIPTION_PREFIX = 'Error: '
+
+
+def enriched_condition(column='description'):
+    """SQL test that column holds a real description, not a failed detail fetch"""
+    return (f"{column} <> '' AND {column} <> '{TIMEOUT_DESCRIPTION}' "
+            f"AND {column} NOT LIKE '{ERROR_DESCRIPTION_PREFIX}%'")
+
+
+def failed_fetch(description):
+    """Whether a description is get_job_details's placeholder for a failed fetch"""
+    return description == TIMEOUT_DESCRIPTION or (description or '').startswith(ERROR_DESCRIPTION_PREFIX)
+
+
+# Postings whose stored description is real, not a failed detail fetch
+ENRICHED_CONDITION = enriched_condition()
+
+_JOB_ID = re.compile(r'/jobs/view/(?:.*-)?(\d{6,})/?$')
+
+
+def linkedin_job_id(url):
+    """LinkedIn's numeric posting id from a job URL, or None"""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    match = _JOB_ID.search(parts.path)
+    if match:
+        return int(match.group(1))
+    current = parse_qs(parts.query).get('currentJobId')
+    if current and current[0].isdigit():
+        return int(current[0])
+    return None
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over non-negative integers
+
+    Membership tests never give false negatives and give false positives
+    at roughly false_positive_rate once capacity keys have been added.
+    """
+
+    def __init__(self, capacity, false_positive_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.false_positive_rate = false_positive_rate
+        self.bits = max(64, int(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from two halves of one digest
+        digest = hashlib.blake2b(key.to_bytes(8, 'little'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        array = self._array
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class JobDeduper:
+    """Knows which LinkedIn postings are already stored with their details
+
+    A bloom filter of stored posting ids answers "definitely new" without
+    touching the database; "maybe known" is confirmed through the unique
+    index on jobs.linkedin_job_id, which also returns the stored details.
+    Until the filter is loaded every lookup goes to the index.
+    """
+
+    def __init__(self, connect, false_positive_rate=0.01, min_capacity=100000):
+        self.connect = connect
+        self.false_positive_rate = false_positive_rate
+        self.min_capacity = min_capacity
+        self.filter = None
+        self._loading = False
+        self._lock = threading.Lock()
+        # Stats
+        self.checked = 0
+        self.hits = 0
+        self.false_positives = 0
+
+    def load(self, background=False):
+        """(Re)build the filter from the database, sized for twice what is stored"""
+        with self._lock:
+            if self._loading:
+                return self
+            self._loading = True
+        if background:
+            threading.Thread(target=self._load, name='dedupe-load', daemon=True).start()
+        else:
+            self._load()
+        return self
+
+    def _load(self):
+        try:
+            started = time.monotonic()
+            ids = [row[0] for row in self.connect().execute(
+                f'SELECT linkedin_job_id FROM jobs WHERE linkedin_job_id IS NOT NULL AND {ENRICHED_CONDITION}')]
+            bloom = BloomFilter(max(self.min_capacity, 2 * len(ids)), self.false_positive_rate)
+            for job_id in ids:
+                bloom.add(job_id)
+            with self._lock:
+                self.filter = bloom
+            logger.info(f"Dedupe filter loaded: {len(ids)} known postings, {bloom.bits // 8 // 1024} KB "
+                        f"in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"Loading the dedupe filter failed: {e}")
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def add(self, job_id):
+        """Remember a posting whose details were just fetched"""
+        if job_id is None:
+            return
+        with self._lock:
+            if self.filter is None:
+                return
+            self.filter.add(job_id)
+            grow = self.filter.full
+        if grow:
+            self.load(background=True)
+
+    def stored_details(self, job_id):
+        """Stored details of an already known posting, or None if it needs fetching"""
+        if job_id is None:
+            return None
+        with self._lock:
+            self.checked += 1
+            if self.filter is not None and job_id not in self.filter:
+                return None
+        conn = self.connect()
+        row = conn.execute(f'''
+            SELECT id, description, industry FROM jobs WHERE linkedin_job_id = ? AND {ENRICHED_CONDITION}
+        ''', (job_id,)).fetchone()
+        if row is None:
+            with self._lock:
+                self.false_positives += self.filter is not None
+            return None
+        skills = [name for (name,) in conn.execute('''
+            SELECT s.name FROM job_skills js JOIN skills s ON s.id = js.skill_id
+            WHERE js.job_id = ? ORDER BY s.name
+        ''', (row['id'],))]
+        with self._lock:
+            self.hits += 1
+        return {'description': row['description'], 'skills': skills, 'industry': row['industry']}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'known_postings': self.filter.count if self.filter else 0,
+                'capacity': self.filter.capacity if self.filter else 0,
+                'checked': self.checked,
+                'hits': self.hits,
+                'false_positives': self.false_positives,
+                'hit_rate': round(self.hits / self.checked, 3) if self.checked else 0.0
+            }
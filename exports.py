@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+import time
+import zlib
+from datetime import datetime
+
+import metrics
+from pipeline import CSV_FIELDNAMES
+from records import JobRecord
+from rollups import keyword_key
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+}
+FETCH_ROWS = 500  # rows pulled from the cursor at a time
+CHUNK_BYTES = 64 * 1024  # text buffered before a chunk is sent
+_SKILL_SEPARATOR = '\x1f'
+
+
+def _job_query(filters):
+    """SQL and parameters selecting the jobs matching filters, in a stable order"""
+    conditions = []
+    params = [_SKILL_SEPARATOR]
+    if filters.get('session_id'):
+        # A session's export reports when that session saw each job
+        source = 'session_jobs sj JOIN jobs j ON j.id = sj.job_id'
+        scraped_at = 'sj.seen_at'
+        conditions.append('sj.session_id = ?')
+        params.append(filters['session_id'])
+        order = 'sj.job_id'
+    else:
+        source = 'jobs j'
+        scraped_at = 'j.scraped_at'
+        order = 'j.id'
+    if filters.get('keyword'):
+        conditions.append('''j.id IN (
+            SELECT k.job_id FROM session_jobs k JOIN search_sessions s ON s.id = k.session_id
+            WHERE lower(trim(s.keywords)) = ?
+        )''')
+        params.append(keyword_key(filters['keyword']))
+    if filters.get('location'):
+        conditions.append("j.location LIKE ? ESCAPE '\\'")
+        escaped = filters['location'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        params.append(f'%{escaped}%')
+    if filters.get('since'):
+        conditions.append(f'{scraped_at} >= ?')
+        params.append(filters['since'])
+    if filters.get('until'):
+        conditions.append(f'{scraped_at} < ?')
+        params.append(filters['until'])
+    where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+    sql = f'''
+        SELECT j.title, j.company, j.location, j.url, j.linkedin_job_id AS job_id, j.post_date, {scraped_at} AS scraped_at, j.source,
+               j.description, j.industry,
+               (SELECT group_concat(name, ?) FROM (
+                    SELECT s.name FROM job_skills js JOIN skills s ON s.id = js.skill_id
+                    WHERE js.job_id = j.id ORDER BY s.name
+               )) AS skills
+        FROM {source}
+        {where}
+        ORDER BY {order}
+    '''
+    return sql, params
+
+
+def iter_jobs(conn, filters):
+    """Yield matching jobs one at a time as enriched JobRecords"""
+    sql, params = _job_query(filters)
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(FETCH_ROWS)
+        if not rows:
+            break
+        for row in rows:
+            job = JobRecord(row['title'], row['company'], row['location'], row['url'], row['job_id'],
+                            row['post_date'], row['scraped_at'], row['source'])
+            job.set_details({
+                'description': row['description'],
+                'skills': row['skills'].split(_SKILL_SEPARATOR) if row['skills'] else (),
+                'industry': row['industry']
+            })
+            yield job
+
+
+def _csv_pieces(jobs):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDNAMES)
+    for job in jobs:
+        writer.writerow(job.csv_row())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_pieces(jobs):
+    for job in jobs:
+        yield json.dumps(job.to_json(), ensure_ascii=False) + '\n'
+
+
+def _json_pieces(jobs):
+    """The same {"jobs": [...], "metadata": {...}} document the per-search files used to hold"""
+    total = with_details = 0
+    yield '{"jobs": ['
+    for job in jobs:
+        yield (',\n  ' if total else '\n  ') + json.dumps(job.to_json(), ensure_ascii=False)
+        total += 1
+        with_details += bool(job.description)
+    metadata = {
+        'exported_at': datetime.now().isoformat(),
+        'total_jobs': total,
+        'total_with_details': with_details
+    }
+    yield ('\n' if total else '') + '], "metadata": ' + json.dumps(metadata) + '}\n'
+
+
+_PIECES = {'csv': _csv_pieces, 'ndjson': _ndjson_pieces, 'json': _json_pieces}
+
+
+def _chunked(pieces):
+    """Join small text pieces into encoded chunks of about CHUNK_BYTES"""
+    parts = []
+    size = 0
+    for piece in pieces:
+        parts.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts).encode('utf-8')
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream(connect, fmt, filters, gzip=False):
+    """Byte chunks of an export, read from a private connection that is closed at the end
+
+    Memory stays flat however many jobs match: rows are fetched FETCH_ROWS at
+    a time and sent on in chunks of about CHUNK_BYTES.
+    """
+    conn = connect()
+    started = time.perf_counter()
+    try:
+        chunks = _chunked(_PIECES[fmt](iter_jobs(conn, filters)))
+        for chunk in (_gzipped(chunks) if gzip else chunks):
+            metrics.EXPORT_BYTES.inc(len(chunk), format=fmt)
+            yield chunk
+    finally:
+        conn.close()
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage='export')
@@ -0,0 +1,137 @@
+import html
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Column weights for bm25 ranking: title, company, description
+RANK_WEIGHTS = (5.0, 2.0, 1.0)
+SNIPPET_TOKENS = 24
+# bm25 has to score every match before it can sort, so broad queries rank
+# only their most recently stored matches to keep latency bounded; the
+# search reports when older matches were left out
+RANK_CANDIDATES = 5000
+# Private-use characters mark matches inside snippets until they are HTML-escaped
+_MATCH_START = '\ue000'
+_MATCH_END = '\ue001'
+
+_TOKEN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def fts5_available(cursor):
+    try:
+        return bool(cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+    except Exception:
+        return False
+
+
+def index_exists(conn):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'").fetchone()
+    return row is not None
+
+
+def create_index(cursor):
+    """Create the external-content FTS5 table, its sync triggers, and index existing jobs"""
+    cursor.execute('''
+        CREATE VIRTUAL TABLE jobs_fts USING fts5(
+            title, company, description,
+            content='jobs', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    cursor.execute("INSERT INTO jobs_fts (jobs_fts, rank) VALUES ('rank', ?)", (f'bm25({weights})',))
+    cursor.execute('''
+        CREATE TRIGGER jobs_fts_insert AFTER INSERT ON jobs BEGIN
+            INSERT INTO jobs_fts (rowid, title, company, description)
+            VALUES (new.id, new.title, new.company, new.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER jobs_fts_delete AFTER DELETE ON jobs BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, title, company, description)
+            VALUES ('delete', old.id, old.title, old.company, old.description);
+        END
+    ''')
+    # Re-sightings rewrite the card fields on every upsert; only reindex
+    # when the indexed text actually changed
+    cursor.execute('''
+        CREATE TRIGGER jobs_fts_update AFTER UPDATE OF title, company, description ON jobs
+        WHEN old.title IS NOT new.title OR old.company IS NOT new.company OR old.description IS NOT new.description
+        BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, title, company, description)
+            VALUES ('delete', old.id, old.title, old.company, old.description);
+            INSERT INTO jobs_fts (rowid, title, company, description)
+            VALUES (new.id, new.title, new.company, new.description);
+        END
+    ''')
+    cursor.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+
+def match_query(text):
+    """Turn free text into a safe FTS5 query
+
+    Every word must match (implicit AND). "Quoted words" match as a phrase
+    and a trailing * on a word makes it a prefix search. Everything else is
+    quoted, so user input can never be an FTS5 syntax error.
+    """
+    terms = []
+    for phrase, word in _TOKEN.findall(text or ''):
+        prefix = False
+        if word:
+            prefix = word.endswith('*')
+            phrase = word.rstrip('*')
+        phrase = phrase.replace('"', '').strip()
+        if not phrase:
+            continue
+        terms.append('"' + phrase + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+def _highlight(snippet):
+    escaped = html.escape(snippet or '')
+    return escaped.replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+
+
+def _rank_cutoff(conn, query):
+    """Lowest rowid among the newest RANK_CANDIDATES matches, or 0 if there are fewer"""
+    row = conn.execute('''
+        SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?
+    ''', (query, RANK_CANDIDATES - 1)).fetchone()
+    return row[0] if row else 0
+
+
+def search(conn, text, limit=20, offset=0, sort='relevance'):
+    """Postings matching text, best (or newest) first, returns (results, has_more, truncated)
+
+    truncated is True when relevance ranking covered only the newest
+    RANK_CANDIDATES matches; sort='recent' pages through all of them.
+    """
+    query = match_query(text)
+    if not query:
+        return [], False, False
+    if sort == 'recent':
+        order, cutoff = 'jobs_fts.rowid DESC', 0
+    else:
+        order, cutoff = 'rank', _rank_cutoff(conn, query)
+    rows = conn.execute(f'''
+        SELECT j.id, j.title, j.company, j.location, j.url, j.post_date, j.scraped_at,
+               snippet(jobs_fts, 2, ?, ?, '…', {SNIPPET_TOKENS}) AS snippet,
+               -rank AS score
+        FROM jobs_fts JOIN jobs j ON j.id = jobs_fts.rowid
+        WHERE jobs_fts MATCH ? AND jobs_fts.rowid >= ?
+        ORDER BY {order}
+        LIMIT ? OFFSET ?
+    ''', (_MATCH_START, _MATCH_END, query, cutoff, limit + 1, offset)).fetchall()
+    results = [{
+        'id': row['id'],
+        'title': row['title'],
+        'company': row['company'],
+        'location': row['location'],
+        'url': row['url'],
+        'post_date': row['post_date'],
+        'scraped_at': row['scraped_at'],
+        'snippet': _highlight(row['snippet']),
+        'score': round(row['score'], 6)
+    } for row in rows[:limit]]
+    return results, len(rows) > limit, cutoff > 0
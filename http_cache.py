@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_url(url):
+    """Canonical form of a job URL: no query string, fragment or trailing slash"""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, '', ''))
+
+
+class CacheEntry:
+    """A cached response body plus its validators and parsed details"""
+
+    def __init__(self, key, meta, body, ttl):
+        self.key = key
+        self.meta = meta
+        self.body = body
+        self.ttl = ttl
+
+    @property
+    def truncated(self):
+        """The body stops early, after what the parser of its details needed"""
+        return self.meta.get('truncated', False)
+
+    @property
+    def fresh(self):
+        return time.time() - self.meta.get('fetched_at', 0) < self.ttl
+
+    def details(self, parser_version):
+        """Parsed details, if they were produced by the current parser"""
+        if self.meta.get('parser_version') == parser_version:
+            return self.meta.get('details')
+        return None
+
+    def validators(self):
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+
+class DetailCache:
+    """On-disk, content-addressed cache of job detail pages with TTL and LRU eviction"""
+
+    def __init__(self, directory, ttl=86400, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> size on disk, least recently used first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def key(self, url):
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        folder = os.path.join(self.directory, key[:2])
+        return os.path.join(folder, f"{key}.html"), os.path.join(folder, f"{key}.json")
+
+    def _load_index(self):
+        entries = []
+        for folder, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                key = name[:-5]
+                body_path, meta_path = self._paths(key)
+                try:
+                    size = os.path.getsize(body_path) + os.path.getsize(meta_path)
+                    entries.append((os.path.getmtime(meta_path), key, size))
+                except OSError:
+                    continue
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        logger.info(f"Detail cache loaded: {len(self._index)} entries, {self._total_bytes / 1e6:.1f} MB")
+
+    def lookup(self, url):
+        """Return the cached entry for url (fresh or stale), or None"""
+        key = self.key(url)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, encoding='utf-8') as f:
+                body = f.read()
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                self._forget(key)
+            return None
+        entry = CacheEntry(key, meta, body, self.ttl)
+        with self._lock:
+            if entry.fresh:
+                self.hits += 1
+            else:
+                self.stale += 1
+            if key in self._index:
+                self._index.move_to_end(key)
+        return entry
+
+    def store(self, url, body, headers=None, details=None, parser_version=None, truncated=False):
+        """Write a response body and its validators to the cache; truncated marks a body read only in part"""
+        headers = headers or {}
+        key = self.key(url)
+        meta = {
+            'url': normalize_url(url),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'parser_version': parser_version,
+            'details': details,
+            'truncated': truncated
+        }
+        body_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False))
+        size = os.path.getsize(body_path) + os.path.getsize(meta_path)
+        with self._lock:
+            self._forget(key)
+            self._index[key] = size
+            self._total_bytes += size
+            self._evict()
+
+    def mark_revalidated(self, entry, details=None, parser_version=None):
+        """Refresh an entry after a 304 Not Modified response"""
+        entry.meta['fetched_at'] = time.time()
+        if details is not None:
+            entry.meta['details'] = details
+            entry.meta['parser_version'] = parser_version
+        _, meta_path = self._paths(entry.key)
+        try:
+            self._write_atomic(meta_path, json.dumps(entry.meta, ensure_ascii=False))
+        except OSError as e:
+            logger.warning(f"Could not refresh cache entry: {e}")
+        with self._lock:
+            self.revalidated += 1
+
+    def _write_atomic(self, path, text):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _forget(self, key):
+        size = self._index.pop(key, None)
+        if size:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'revalidated': self.revalidated,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
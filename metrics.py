@@ -0,0 +1,207 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a parsed card to a slow detail fetch
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(f'{name}{labels} {_number(value)}' for name, labels, value in self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """Current value per label set, or read from a function when rendered"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self):
+        if self.function is not None:
+            try:
+                return [(self.name, '', self.function())]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _labels(self.labelnames, key), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the with block took"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', _labels(self.labelnames, key, [('le', _number(bound))]),
+                                cumulative))
+            samples.append((f'{self.name}_sum', _labels(self.labelnames, key), total))
+            samples.append((f'{self.name}_count', _labels(self.labelnames, key), cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), function=None):
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+# Metrics are per process: with several gunicorn workers, each one serves its own
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'scraper_http_requests_total', 'Requests made to LinkedIn by endpoint and status', ('endpoint', 'status'))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'scraper_http_request_duration_seconds', 'LinkedIn request latency, without rate limit waits', ('endpoint',))
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    'scraper_http_response_bytes', 'LinkedIn response body sizes', ('endpoint',), buckets=BYTES_BUCKETS)
+HTTP_TTFB_SECONDS = REGISTRY.histogram(
+    'scraper_http_time_to_first_byte_seconds', 'Time from sending a LinkedIn request to its response headers',
+    ('endpoint',))
+HTTP_CONNECTIONS_OPENED = REGISTRY.counter(
+    'scraper_http_connections_opened_total', 'New connections opened (requests minus these were reused)', ('host',))
+HTTP_VERSIONS = REGISTRY.counter(
+    'scraper_http_responses_by_version_total', 'LinkedIn responses by HTTP version', ('version',))
+HTTP_EARLY_STOPS = REGISTRY.counter(
+    'scraper_http_early_stops_total', 'Response bodies whose rest was skipped once the needed part was read',
+    ('endpoint',))
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.counter(
+    'scraper_rate_limit_wait_seconds_total', 'Time spent waiting for the rate limiter', ('endpoint',))
+DETAIL_LOOKUPS = REGISTRY.counter(
+    'scraper_job_details_total', 'Where job details came from: stored, cache, revalidated, fetched or failed',
+    ('source',))
+STAGE_SECONDS = REGISTRY.histogram(
+    'scraper_stage_duration_seconds', 'Time spent per pipeline stage', ('stage',))
+STAGE_ITEMS = REGISTRY.counter(
+    'scraper_stage_items_total', 'Items processed per pipeline stage (cards, pages, skills, rows)', ('stage',))
+TASKS = REGISTRY.counter(
+    'app_tasks_total', 'Background tasks finished, by status', ('status',))
+TASK_SECONDS = REGISTRY.histogram(
+    'app_task_duration_seconds', 'Background task run time, by status', ('status',))
+QUERY_CACHE_LOOKUPS = REGISTRY.counter(
+    'app_query_cache_lookups_total', 'Query cache lookups by cache and result (hit, shared_hit, miss)',
+    ('cache', 'result'))
+EXPORT_BYTES = REGISTRY.counter(
+    'scraper_export_bytes_total', 'Bytes streamed by exports', ('format',))
+SERVER_REQUESTS = REGISTRY.counter(
+    'app_http_requests_total', 'Requests served by route, method and status', ('route', 'method', 'status'))
+SERVER_REQUEST_SECONDS = REGISTRY.histogram(
+    'app_http_request_duration_seconds', 'Time to respond per route (streamed bodies: until the first byte)',
+    ('route',))
@@ -0,0 +1,136 @@
+"""Optional process pool for the CPU-bound half of scraping: HTML parsing and skill extraction.
+
+Threads overlap network waits, but parsing and regex matching hold the GIL,
+so one process tops out at one core however idle the network is. With a
+pool, the raw page text is sent to a worker process and only the compact
+result (card fields, or description, industry and skills) comes back.
+
+Workers are started up front from a forkserver that has already imported
+the main script and the parser and matcher modules, and each one builds
+its parser and compiles the skill matcher before taking work, so the first
+pages are not slowed by process start-up. The pool is started lazily, once
+per process, so a process forked after importing this module (gunicorn
+--preload workers, crawl workers) starts its own instead of inheriting one
+without its manager thread.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from parsers import get_parser
+from skill_matcher import get_skill_matcher
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION_CHARS = 5000  # description length kept with a job
+START_TIMEOUT = 60  # seconds for all workers to start
+
+
+_started = None
+
+
+def _warm_up(started):
+    """Worker initializer: build the parser and compile the skill matcher before the first page"""
+    global _started
+    _started = started
+    get_parser()
+    get_skill_matcher()
+
+
+def _ready(_):
+    # Held until every worker holds one, so each start-up task lands on a different worker
+    _started.wait(START_TIMEOUT)
+    return multiprocessing.current_process().pid
+
+
+def parse_cards(html):
+    """(card fields, parse seconds) of a search results page"""
+    started = time.perf_counter()
+    cards = get_parser().job_cards(html)
+    return cards, time.perf_counter() - started
+
+
+def parse_details(html):
+    """(details, parse seconds, skill extraction seconds) of a job detail page"""
+    started = time.perf_counter()
+    description, industry = get_parser().job_details(html)
+    parsed = time.perf_counter()
+    skills = get_skill_matcher().extract(description)
+    details = {'description': description[:DESCRIPTION_CHARS], 'skills': skills, 'industry': industry}
+    return details, parsed - started, time.perf_counter() - parsed
+
+
+class ParsePool:
+    """Worker processes, all started and warmed up before the pool is used"""
+
+    def __init__(self, workers, forked=False):
+        self.workers = workers
+        self.pid = os.getpid()
+        started = time.perf_counter()
+        # A process forked from one that started its forkserver cannot use that server
+        if not forked and 'forkserver' in multiprocessing.get_all_start_methods():
+            # Forking threaded servers is unsafe; a forkserver is clean and still starts workers cheaply
+            context = multiprocessing.get_context('forkserver')
+            # The main script is imported once, in the server, rather than again in every worker
+            context.set_forkserver_preload(['__main__', 'parse_pool'])
+        else:
+            context = multiprocessing.get_context('spawn')
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_warm_up,
+                                            initargs=(context.Barrier(workers),))
+        # Submitted together, these make the executor start every worker now; none is started later
+        pids = set(self.executor.map(_ready, range(workers)))
+        logger.info(f"Started {len(pids)} parse workers in {time.perf_counter() - started:.2f}s")
+
+    def run(self, function, html):
+        return self.executor.submit(function, html).result()
+
+    def shutdown(self, wait=False):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """This process's ParsePool, started on first use (again in a forked child, or after a worker died)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ParsePool(workers, forked=_pool is not None)
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the pool and wait for its threads"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.shutdown(wait=True)
+        _pool = None
+
+
+def run(function, html, workers=0):
+    """function(html) in a pool worker, or in this process when workers is 0
+
+    A worker that dies takes the pool down with it; the error is raised
+    (a page that crashes the parser should not crash the server too) and
+    the next call starts a new pool.
+    """
+    global _pool
+    if workers <= 0:
+        return function(html)
+    pool = get_pool(workers)
+    try:
+        return pool.run(function, html)
+    except BrokenProcessPool:
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown()
+        logger.error("A parse worker died, restarting the pool")
+        raise
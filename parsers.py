@@ -0,0 +1,238 @@
+import logging
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional dependency
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401  (only needed as a BeautifulSoup tree builder)
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Fastest first; 'auto' picks the first one that is installed
+PARSER_BACKENDS = ('selectolax', 'lxml', 'html.parser')
+
+DESCRIPTION_SELECTORS = [
+    'div.description__text',
+    'section.description',
+    'div.description',
+    'div.job-details',
+    'div.job-description'
+]
+FALLBACK_DESCRIPTION_CHARS = 2000
+
+# BeautifulSoup keeps the text of these tags out of get_text()
+NON_TEXT_TAGS = ['script', 'style', 'template', 'rt', 'rp']
+
+# BeautifulSoup collapses whitespace-only strings outside these tags
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+PRESERVE_WHITESPACE_TAGS = ('pre', 'textarea')
+_BODY_TAG = re.compile(r'<body[\s>/]', re.IGNORECASE)
+
+
+def _has_class(*names):
+    """SoupStrainer class test; the raw, unsplit attribute is seen while parsing"""
+    names = set(names)
+    return lambda value: bool(value) and not names.isdisjoint(str(value).split())
+
+
+# Only the subtrees the scraper reads are built into a tree
+CARD_STRAINER = SoupStrainer('div', class_=_has_class('base-card'))
+DETAIL_STRAINER = SoupStrainer(
+    ['div', 'section', 'li'],
+    class_=_has_class('description__text', 'description', 'job-details', 'job-description',
+                      'description__job-criteria-item')
+)
+
+
+def _card_fields(title, company, location, url, post_date):
+    """Card fields, or None when a required element is missing (as the scraper always did)"""
+    if title is None or company is None or location is None:
+        return None
+    return {
+        'title': title.strip(),
+        'company': company.strip(),
+        'location': location.strip(),
+        'url': url,
+        'post_date': post_date
+    }
+
+
+class SoupBackend:
+    """BeautifulSoup with html.parser or lxml, parsing only the strained subtrees"""
+
+    def __init__(self, features='html.parser'):
+        self.name = features
+        self.features = features
+
+    def job_cards(self, html):
+        """Raw fields of every job card on a search results page (None for unusable cards)"""
+        soup = BeautifulSoup(html, self.features, parse_only=CARD_STRAINER)
+        return [self._card(card) for card in soup.find_all('div', class_='base-card')]
+
+    def _card(self, card):
+        # Tags with no children are falsy, keep treating them as missing
+        title = card.find('h3', class_='base-search-card__title')
+        company = card.find('h4', class_='base-search-card__subtitle')
+        location = card.find('span', class_='job-search-card__location')
+        link = card.find('a', class_='base-card__full-link')
+        time_elem = card.find('time', class_='job-search-card__listdate')
+        try:
+            return _card_fields(title.text if title else None,
+                                company.text if company else None,
+                                location.text if location else None,
+                                link['href'] if link else None,
+                                time_elem['datetime'] if time_elem else None)
+        except KeyError as e:
+            logger.error(f"Error parsing job card: missing attribute {e}")
+            return None
+
+    def job_details(self, html):
+        """(description, industry) from a job detail page, description untruncated"""
+        soup = BeautifulSoup(html, self.features, parse_only=DETAIL_STRAINER)
+        description = ''
+        for selector in DESCRIPTION_SELECTORS:
+            desc_elem = soup.select_one(selector)
+            if desc_elem:
+                description = desc_elem.get_text(separator='\n').strip()
+                if description:
+                    break
+        if not description:
+            # Rare layout without a known container: fall back to the whole page.
+            # Tree builders disagree on broken markup outside the containers,
+            # so this path always uses html.parser
+            full = BeautifulSoup(html, 'html.parser')
+            main_content = full.find('main') or full.find('body')
+            if main_content:
+                description = main_content.get_text(separator='\n').strip()[:FALLBACK_DESCRIPTION_CHARS]
+        return description, self._industry(soup)
+
+    def _industry(self, soup):
+        for item in soup.find_all('li', class_='description__job-criteria-item'):
+            subtitle = item.find('h3', class_='description__job-criteria-subtitle')
+            text = item.find('span', class_='description__job-criteria-text')
+            if subtitle and text and 'industry' in subtitle.text.lower():
+                return text.text.strip()
+        return 'Not specified'
+
+
+class LexborBackend:
+    """selectolax's Lexbor engine: a full parse in C, then CSS queries"""
+
+    name = 'selectolax'
+
+    def job_cards(self, html):
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(NON_TEXT_TAGS)
+        return [self._card(card) for card in tree.css('div.base-card')]
+
+    @staticmethod
+    def _present(node):
+        # Mirror BeautifulSoup, where a tag without children is falsy
+        return node is not None and node.child is not None
+
+    @staticmethod
+    def _text(node, separator=''):
+        """get_text() as BeautifulSoup builds it, whitespace-only strings collapsed"""
+        strings = []
+        for child in node.traverse(include_text=True):
+            if child.tag != '-text':
+                continue
+            text = child.text_content
+            if not text.strip(ASCII_SPACES):
+                parent = child.parent
+                while parent is not None and parent.tag not in PRESERVE_WHITESPACE_TAGS:
+                    parent = parent.parent
+                if parent is None:
+                    text = '\n' if '\n' in text else ' '
+            strings.append(text)
+        return separator.join(strings)
+
+    def _card(self, card):
+        title = card.css_first('h3.base-search-card__title')
+        company = card.css_first('h4.base-search-card__subtitle')
+        location = card.css_first('span.job-search-card__location')
+        link = card.css_first('a.base-card__full-link')
+        time_elem = card.css_first('time.job-search-card__listdate')
+        attributes = {}
+        for key, node, attribute in (('url', link, 'href'), ('post_date', time_elem, 'datetime')):
+            attributes[key] = None
+            if self._present(node):
+                if attribute not in node.attributes:
+                    logger.error(f"Error parsing job card: missing attribute '{attribute}'")
+                    return None
+                attributes[key] = node.attributes[attribute] or ''
+        return _card_fields(self._text(title) if self._present(title) else None,
+                            self._text(company) if self._present(company) else None,
+                            self._text(location) if self._present(location) else None,
+                            attributes['url'], attributes['post_date'])
+
+    def job_details(self, html):
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(NON_TEXT_TAGS)
+        description = ''
+        for selector in DESCRIPTION_SELECTORS:
+            desc_elem = tree.css_first(selector)
+            if self._present(desc_elem):
+                description = self._text(desc_elem, '\n').strip()
+                if description:
+                    break
+        if not description:
+            main_content = tree.css_first('main')
+            if not self._present(main_content):
+                # Lexbor always synthesizes a <body>, BeautifulSoup only finds a real one
+                main_content = tree.body if _BODY_TAG.search(html) else None
+            if self._present(main_content):
+                description = self._text(main_content, '\n').strip()[:FALLBACK_DESCRIPTION_CHARS]
+        return description, self._industry(tree)
+
+    def _industry(self, tree):
+        for item in tree.css('li.description__job-criteria-item'):
+            subtitle = item.css_first('h3.description__job-criteria-subtitle')
+            text = item.css_first('span.description__job-criteria-text')
+            if self._present(subtitle) and self._present(text) and 'industry' in self._text(subtitle).lower():
+                return self._text(text).strip()
+        return 'Not specified'
+
+
+def available_backends():
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append('selectolax')
+    if LXML_AVAILABLE:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+
+def create_backend(name='auto'):
+    """Build a parser backend by name, falling back to html.parser if it is not installed"""
+    installed = available_backends()
+    if name in ('', 'auto'):
+        name = installed[0]
+    elif name not in installed:
+        logger.warning(f"HTML parser '{name}' is not available, using html.parser")
+        name = 'html.parser'
+    if name == 'selectolax':
+        return LexborBackend()
+    return SoupBackend(name)
+
+
+_default_backend = None
+
+
+def get_parser():
+    """Process-wide parser backend selected by the HTML_PARSER environment variable"""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = create_backend(os.environ.get('HTML_PARSER', 'auto'))
+        logger.info(f"Using HTML parser backend: {_default_backend.name}")
+    return _default_backend
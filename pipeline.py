@@ -0,0 +1,322 @@
+import csv
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+
+import metrics
+import rollups
+from records import SKILLS
+from schema import INSERT_JOB, UPSERT_JOB, lookup_ids, resolve_skill_ids
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDNAMES = ['title', 'company', 'location', 'url', 'post_date', 'scraped_at', 'source',
+                  'description', 'industry', 'skills']
+
+
+class JobAnalytics:
+    """Incremental skill (by id) and location counters"""
+
+    def __init__(self):
+        self.skills = Counter()
+        self.locations = Counter()
+        self.total_jobs = 0
+        self.jobs_with_details = 0
+
+    def add(self, job):
+        self.total_jobs += 1
+        if job.enriched:
+            self.jobs_with_details += 1
+            self.skills.update(job.skill_ids)
+        self.locations[job.location or 'Unknown'] += 1
+
+    def skills_frequency(self):
+        names = SKILLS.names
+        return sorted(((names[skill_id], count) for skill_id, count in self.skills.items()),
+                      key=lambda x: x[1], reverse=True)
+
+    def geographic_trends(self):
+        return sorted(self.locations.items(), key=lambda x: x[1], reverse=True)
+
+
+class DatabaseWriter:
+    """Upsert jobs for one search session in small committed batches"""
+
+    def __init__(self, connect, session_id, keywords, location, max_results, use_auth,
+                 batch_size=500, flush_interval=2.0, append=False):
+        self.connect = connect
+        self.session_id = session_id
+        self.keywords = keywords
+        self.location = location
+        self.max_results = max_results
+        self.use_auth = use_auth
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.append = append
+        self.conn = None
+        self.skipped = False
+        self.jobs_saved = 0
+        self.skills_saved = 0
+        self.new_jobs = 0
+        self.jobs_seen = 0
+        self._batch = []
+        self._skill_ids = {}
+        self._last_flush = time.monotonic()
+
+    def open(self):
+        """Create the search session row, skipping sessions that already exist
+        unless appending to them (resumed crawls)"""
+        self.conn = self.connect()
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT total_jobs FROM search_sessions WHERE id = ?", (self.session_id,))
+        existing = cursor.fetchone()
+        if existing and self.append:
+            self.jobs_seen = existing[0] or 0
+            return self
+        if existing:
+            logger.info(f"Session {self.session_id} already exists, skipping duplicate")
+            self.skipped = True
+            return self
+        cursor.execute('''
+            INSERT INTO search_sessions (id, keywords, location, max_results, use_auth, searched_at, total_jobs)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (self.session_id, self.keywords, self.location, self.max_results, self.use_auth, datetime.now(), 0))
+        rollups.record_session(cursor)
+        self.conn.commit()
+        logger.info(f"Saved search session: {self.session_id}")
+        return self
+
+    def write(self, job):
+        if self.skipped:
+            return
+        self.jobs_seen += 1
+        self._batch.append(job)
+        if len(self._batch) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self, before_commit=None):
+        """Upsert the buffered jobs and link them to the session in one transaction
+
+        before_commit(cursor) runs inside the same transaction, so callers can
+        record their own progress atomically with the jobs.
+        """
+        if self.skipped:
+            return
+        if not self._batch:
+            if before_commit:
+                with self.conn:
+                    before_commit(self.conn.cursor())
+            return
+        records = []
+        for job in self._batch:
+            try:
+                # Only enriched jobs carry a skill list; others keep the skills stored earlier
+                records.append((job.db_row(), job.db_skills()))
+            except Exception as job_error:
+                logger.error(f"Failed to save job '{job.title}': {job_error}")
+
+        started = time.perf_counter()
+        cursor = self.conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            records = self._route_by_posting_id(cursor, records)
+            urls = {row[0] for row, _ in records if row[0] is not None}
+            known = lookup_ids(cursor, 'jobs', 'url', urls)
+            cursor.executemany(UPSERT_JOB, [row for row, _ in records if row[0] is not None])
+            job_ids = lookup_ids(cursor, 'jobs', 'url', urls)
+            # A posting can show up twice in one search (overlapping pages), count it once
+            linked = {row[0] for row in cursor.execute('''
+                SELECT job_id FROM session_jobs
+                WHERE session_id = ? AND job_id IN (SELECT value FROM json_each(?))
+            ''', (self.session_id, json.dumps(list(job_ids.values()))))}
+            links = []
+            sightings = []
+            job_skills = {}
+            for row, skills in records:
+                if row[0] is None:
+                    cursor.execute(INSERT_JOB, row)
+                    job_id = cursor.lastrowid
+                else:
+                    job_id = job_ids[row[0]]
+                if job_id not in linked:
+                    linked.add(job_id)
+                    links.append((self.session_id, job_id, row[-1]))
+                    sightings.append((job_id, row[4], row[-1]))
+                if skills is not None:
+                    job_skills[job_id] = skills
+            cursor.executemany('INSERT INTO session_jobs (session_id, job_id, seen_at) VALUES (?, ?, ?)', links)
+
+            resolve_skill_ids(cursor, {skill for skills in job_skills.values() for skill in skills}, self._skill_ids)
+            skill_rows = [(job_id, self._skill_ids[skill]) for job_id, skills in job_skills.items() for skill in skills]
+            cursor.executemany('DELETE FROM job_skills WHERE job_id = ?', [(job_id,) for job_id in job_skills])
+            cursor.executemany('INSERT OR IGNORE INTO job_skills (job_id, skill_id) VALUES (?, ?)', skill_rows)
+            new_jobs = len(urls) - len(known) + sum(1 for row, _ in records if row[0] is None)
+            rollups.record_sightings(cursor, self.session_id, self.keywords, sightings, new_jobs)
+            rollups.record_write(cursor)
+            cursor.execute('UPDATE search_sessions SET total_jobs = ? WHERE id = ?', (self.jobs_seen, self.session_id))
+            if before_commit:
+                before_commit(cursor)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage='db_flush')
+        metrics.STAGE_ITEMS.inc(len(records), stage='db_flush')
+        self.jobs_saved += len(records)
+        self.new_jobs += new_jobs
+        self.skills_saved += len(skill_rows)
+        self._batch = []
+        self._last_flush = time.monotonic()
+        logger.info(f"Progress: {self.jobs_saved} jobs saved")
+
+    def _route_by_posting_id(self, cursor, records):
+        """Point sightings of an already stored LinkedIn posting at the URL it is stored under"""
+        posting_ids = {row[1] for row, _ in records if row[1] is not None}
+        if not posting_ids:
+            return records
+        stored = dict(cursor.execute('''
+            SELECT linkedin_job_id, url FROM jobs WHERE linkedin_job_id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(list(posting_ids)),)))
+        routed = []
+        for row, skills in records:
+            if row[1] is not None:
+                url = stored.setdefault(row[1], row[0])
+                if url != row[0]:
+                    row = (url,) + row[1:]
+            routed.append((row, skills))
+        return routed
+
+    def close(self):
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+            self.conn = None
+        if not self.skipped:
+            logger.info(f"Database save completed: {self.jobs_saved} jobs ({self.new_jobs} new), "
+                        f"{self.skills_saved} skills saved")
+
+
+class JsonStreamWriter:
+    """Write jobs into a JSON document one at a time"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = None
+        self.total_jobs = 0
+        self.total_with_details = 0
+
+    def open(self):
+        self.file = open(self.filename, 'w', encoding='utf-8')
+        self.file.write('{\n  "jobs": [')
+        return self
+
+    def write(self, job):
+        prefix = '\n    ' if self.total_jobs == 0 else ',\n    '
+        body = json.dumps(job.to_json(), indent=2, ensure_ascii=False, default=str).replace('\n', '\n    ')
+        self.file.write(prefix + body)
+        self.total_jobs += 1
+        self.total_with_details += job.enriched
+
+    def close(self):
+        if self.file is None:
+            return
+        metadata = {
+            'scraped_at': datetime.now().isoformat(),
+            'total_jobs': self.total_jobs,
+            'total_with_details': self.total_with_details
+        }
+        closing = '\n  ],\n' if self.total_jobs else '],\n'
+        self.file.write(closing + '  "metadata": ' + json.dumps(metadata, indent=2).replace('\n', '\n  ') + '\n}')
+        self.file.close()
+        self.file = None
+        logger.info(f"Saved {self.total_jobs} jobs to {self.filename}")
+
+
+class CsvStreamWriter:
+    """Write jobs to a CSV file one row at a time"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = None
+        self.writer = None
+        self.total_jobs = 0
+
+    def open(self):
+        self.file = open(self.filename, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CSV_FIELDNAMES)
+        return self
+
+    def write(self, job):
+        self.writer.writerow(job.csv_row())
+        self.total_jobs += 1
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        logger.info(f"Saved {self.total_jobs} jobs to {self.filename}")
+
+
+class JobPipeline:
+    """Fan jobs out to a set of sinks as they arrive, isolating sink failures
+
+    Sinks are opened lazily on the first job, so an empty search leaves no
+    session row or files behind.
+    """
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+        self.failed = []
+        self.analytics = JobAnalytics()
+        self._opened = False
+
+    def __enter__(self):
+        return self
+
+    def feed(self, job):
+        if not self._opened:
+            self._open()
+        self.analytics.add(job)
+        for sink in list(self.sinks):
+            try:
+                sink.write(job)
+            except Exception as e:
+                self._fail(sink, e)
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._opened:
+            return False
+        for sink in list(self.sinks):
+            try:
+                sink.close()
+            except Exception as e:
+                self._fail(sink, e, close=False)
+        return False
+
+    def ok(self, sink):
+        return self._opened and sink not in self.failed
+
+    def _open(self):
+        self._opened = True
+        for sink in list(self.sinks):
+            try:
+                sink.open()
+            except Exception as e:
+                self._fail(sink, e)
+
+    def _fail(self, sink, error, close=True):
+        logger.error(f"{type(sink).__name__} failed: {error}")
+        self.sinks.remove(sink)
+        self.failed.append(sink)
+        if close:
+            try:
+                sink.close()
+            except Exception:
+                pass
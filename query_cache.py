@@ -0,0 +1,210 @@
+"""Cache of aggregate and analytics query results.
+
+An entry is valid until its TTL runs out or the stored data changes,
+whichever comes first. The data's generation is the analytics_totals row
+set: every DatabaseWriter flush and every new search session bumps it
+inside its own transaction. So a write by any worker, or by a crawl in
+another process, invalidates every worker's entries on their next lookup,
+at the cost of one small read per lookup.
+
+Entries live in an in-process LRU. With a store path, they are also kept
+in a small SQLite file that all workers on the host share, so a result one
+worker computed is served by the others too; values stored there must be
+JSON-serializable. Concurrent lookups of the same missing key in a process
+wait for one build instead of all running the query.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+import rollups
+
+logger = logging.getLogger(__name__)
+
+STORE_BUSY_TIMEOUT = 1  # seconds; a busy store is skipped rather than waited on
+STORE_PRUNE_EVERY = 64  # puts between trims of the shared store
+
+
+def generation(conn):
+    """Version of the stored data; changes with every committed write"""
+    return json.dumps(sorted(rollups.totals(conn).items()))
+
+
+class SQLiteStore:
+    """Cache entries shared by the worker processes of one host"""
+
+    def __init__(self, path, entries):
+        self.path = path
+        self.entries = entries
+        self._local = threading.local()
+        self._puts = 0
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS query_cache (
+                    key TEXT PRIMARY KEY,
+                    generation TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    value TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_query_cache_stored_at ON query_cache(stored_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=STORE_BUSY_TIMEOUT, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """(generation, stored_at, value) of key, or None"""
+        try:
+            row = self._connect().execute('SELECT generation, stored_at, value FROM query_cache WHERE key = ?',
+                                          (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Query cache store read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def put(self, key, entry):
+        generation, stored_at, value = entry
+        try:
+            encoded = json.dumps(value)
+        except (TypeError, ValueError):
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO query_cache (key, generation, stored_at, value) VALUES (?, ?, ?, ?)
+                ''', (key, generation, stored_at, encoded))
+                self._puts += 1
+                if self._puts % STORE_PRUNE_EVERY == 0:
+                    conn.execute('''
+                        DELETE FROM query_cache WHERE stored_at < (
+                            SELECT stored_at FROM query_cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?
+                        )
+                    ''', (self.entries,))
+        except sqlite3.Error as e:
+            logger.warning(f"Query cache store write failed: {e}")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM query_cache')
+
+
+class QueryCache:
+    """LRU of query results, checked against the data generation and a TTL
+
+    ttl None keeps entries until the data changes; ttl 0 (or no entries)
+    disables the cache, every lookup runs its query.
+    """
+
+    def __init__(self, name, entries=256, ttl=60, store=None):
+        self.name = name
+        self.entries = entries
+        self.ttl = ttl
+        self.store = store
+        self._entries = OrderedDict()  # key -> (generation, stored_at, value), least recently used first
+        self._lock = threading.Lock()
+        self._builds = {}  # key -> lock held while one thread builds it
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.entries > 0 and self.ttl != 0
+
+    def _valid(self, entry, current, now, stale):
+        entry_generation, stored_at, _ = entry
+        if self.ttl is not None and now - stored_at >= self.ttl:
+            return False
+        return entry_generation == current or now - stored_at < stale
+
+    def _lookup(self, key, current, now, stale):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._valid(entry, current, now, stale):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        return None
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.entries:
+                self._entries.popitem(last=False)
+
+    def get(self, conn, key, build, stale=0):
+        """The cached result for key, or build()'s, cached
+
+        key is any JSON-serializable value (dates are written as strings).
+        stale allows serving an entry for that many seconds after the data
+        changed, for results too costly to rebuild on every write.
+        """
+        if not self.enabled:
+            return build()
+        key = json.dumps(key, default=str, sort_keys=True)
+        current = generation(conn)
+        entry = self._lookup(key, current, time.time(), stale)
+        if entry is not None:
+            metrics.QUERY_CACHE_LOOKUPS.inc(cache=self.name, result='hit')
+            return entry[2]
+
+        with self._lock:
+            building = self._builds.setdefault(key, threading.Lock())
+        try:
+            with building:
+                # Built by the thread this one waited for
+                entry = self._lookup(key, current, time.time(), stale)
+                if entry is not None:
+                    metrics.QUERY_CACHE_LOOKUPS.inc(cache=self.name, result='hit')
+                    return entry[2]
+                if self.store is not None:
+                    entry = self.store.get(key)
+                    if entry is not None and self._valid(entry, current, time.time(), stale):
+                        self._remember(key, entry)
+                        with self._lock:
+                            self.shared_hits += 1
+                        metrics.QUERY_CACHE_LOOKUPS.inc(cache=self.name, result='shared_hit')
+                        return entry[2]
+                with self._lock:
+                    self.misses += 1
+                metrics.QUERY_CACHE_LOOKUPS.inc(cache=self.name, result='miss')
+                entry = (current, time.time(), build())
+                self._remember(key, entry)
+                if self.store is not None:
+                    self.store.put(key, entry)
+                return entry[2]
+        finally:
+            with self._lock:
+                if self._builds.get(key) is building:
+                    del self._builds[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.shared_hits) / lookups, 3) if lookups else 0.0,
+                'shared': self.store is not None
+            }
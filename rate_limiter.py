@@ -0,0 +1,208 @@
+import logging
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# Adaptive backoff tuning
+THROTTLE_RATE_FACTOR = 0.5      # multiplicative decrease on 429/503
+SERVER_ERROR_RATE_FACTOR = 0.75  # multiplicative decrease on other 5xx
+RECOVERY_STEP = 0.05            # additive increase (fraction of base rate) per success
+MIN_RATE_FRACTION = 0.05        # never go below 5% of the configured rate
+MAX_BACKOFF_SECONDS = 120
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to server feedback"""
+
+    def __init__(self, name, rate, capacity=1):
+        self.name = name
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+        # Stats
+        self.requests = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+        self.server_errors = 0
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def acquire(self):
+        """Take a token, sleeping as long as needed, and return seconds waited"""
+        waited = 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Reserve a token up front so concurrent callers queue fairly;
+            # refill is paused until a backoff ends (updated lies in the future)
+            self.tokens -= 1
+            delay = max(0.0, self.updated - now, self.blocked_until - now)
+            if self.tokens < 0:
+                delay += -self.tokens / self.rate
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            # A backoff may have been triggered while we slept
+            with self._lock:
+                delay = self.blocked_until - time.monotonic()
+        with self._lock:
+            self.requests += 1
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def record(self, status_code, retry_after=None):
+        """Adapt the refill rate to a response status"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            min_rate = self.base_rate * MIN_RATE_FRACTION
+            if status_code == 429 or status_code == 503:
+                self.throttled += 1
+                self.consecutive_failures += 1
+                self.rate = max(min_rate, self.rate * THROTTLE_RATE_FACTOR)
+                backoff = retry_after if retry_after is not None else 2 ** self.consecutive_failures
+                self.blocked_until = max(self.blocked_until, now + min(backoff, MAX_BACKOFF_SECONDS))
+                # Drain the bucket and pause refills so nobody bursts after the pause
+                self.tokens = min(self.tokens, 0.0)
+                self.updated = max(self.updated, self.blocked_until)
+                logger.warning(f"Rate limited on '{self.name}' (HTTP {status_code}), "
+                               f"backing off {min(backoff, MAX_BACKOFF_SECONDS):.1f}s at {self.rate:.2f} req/s")
+            elif status_code is None or status_code >= 500:
+                self.server_errors += 1
+                self.consecutive_failures += 1
+                self.rate = max(min_rate, self.rate * SERVER_ERROR_RATE_FACTOR)
+                backoff = retry_after if retry_after is not None else 2 ** (self.consecutive_failures - 1)
+                self.blocked_until = max(self.blocked_until, now + min(backoff, MAX_BACKOFF_SECONDS))
+            else:
+                self.consecutive_failures = 0
+                if self.rate < self.base_rate:
+                    self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': round(self.rate, 3),
+                'base_rate': self.base_rate,
+                'requests': self.requests,
+                'wait_seconds': round(self.wait_time, 3),
+                'max_wait_seconds': round(self.max_wait, 3),
+                'throttled': self.throttled,
+                'server_errors': self.server_errors,
+                'blocked_for': round(max(0.0, self.blocked_until - time.monotonic()), 3)
+            }
+
+
+class RateLimiter:
+    """Process-wide collection of per-endpoint token buckets"""
+
+    def __init__(self, endpoint_limits, default_limit=(1.0, 1)):
+        self.endpoint_limits = dict(endpoint_limits)
+        self.default_limit = default_limit
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint):
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                rate, capacity = self.endpoint_limits.get(endpoint, self.default_limit)
+                bucket = TokenBucket(endpoint, rate, capacity)
+                self._buckets[endpoint] = bucket
+            return bucket
+
+    def acquire(self, endpoint):
+        """Wait for permission to call endpoint, return seconds waited"""
+        return self.bucket(endpoint).acquire()
+
+    def record(self, endpoint, status_code, headers=None):
+        """Feed a response (or None for a connection failure) back to the bucket"""
+        retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+        self.bucket(endpoint).record(status_code, retry_after)
+
+    def stats(self):
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {endpoint: bucket.stats() for endpoint, bucket in buckets.items()}
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose budget and backoff state live in shared memory
+
+    Every process holding the bucket draws from the same tokens and sees the
+    same backoff; the request and wait statistics stay per process.
+    """
+
+    SHARED_FIELDS = ('tokens', 'updated', 'rate', 'blocked_until', 'consecutive_failures')
+
+    def __init__(self, name, rate, capacity=1, context=None):
+        context = context or multiprocessing.get_context()
+        self._state = context.Array('d', len(self.SHARED_FIELDS), lock=False)
+        super().__init__(name, rate, capacity)
+        self._lock = context.Lock()
+
+
+def _shared_field(index):
+    return property(lambda self: self._state[index],
+                    lambda self, value: self._state.__setitem__(index, value))
+
+
+for _index, _field in enumerate(SharedTokenBucket.SHARED_FIELDS):
+    setattr(SharedTokenBucket, _field, _shared_field(_index))
+
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter for worker processes: one shared bucket per configured endpoint
+
+    Buckets must exist before the workers start, so endpoints without a
+    configured limit share a single 'default' bucket. Pass the limiter to
+    the workers when they are created (e.g. a pool initializer).
+    """
+
+    def __init__(self, endpoint_limits, default_limit=(1.0, 1), context=None):
+        super().__init__(endpoint_limits, default_limit)
+        for endpoint, (rate, capacity) in self.endpoint_limits.items():
+            self._buckets[endpoint] = SharedTokenBucket(endpoint, rate, capacity, context)
+        self._default = SharedTokenBucket('default', *default_limit, context=context)
+
+    def bucket(self, endpoint):
+        return self._buckets.get(endpoint, self._default)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
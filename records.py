@@ -0,0 +1,174 @@
+"""Compact job records.
+
+A job travels from its search card through enrichment to the database,
+CSV and JSON sinks as one slotted JobRecord, rather than a dict holding a
+nested details dict. Company, location, source and industry strings are
+interned, so the jobs of a large crawl share one copy of each value, and
+skills are held as a tuple of small int ids into the process-wide SKILLS
+table. The serializers produce the exact SQLite parameters, CSV row and
+JSON shape the dict-based writers used to build field by field.
+"""
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from dedupe import linkedin_job_id
+from schema import job_key
+
+# Column limits of the jobs table
+URL_CHARS = 1000
+TITLE_CHARS = 1000
+COMPANY_CHARS = 500
+LOCATION_CHARS = 500
+DESCRIPTION_CHARS = 65000
+INDUSTRY_CHARS = 500
+SKILL_CHARS = 255
+CSV_DESCRIPTION_CHARS = 1000
+
+
+def parse_scraped_at(value):
+    """Convert an ISO timestamp from a job card into a datetime"""
+    if isinstance(value, datetime):
+        return value
+    if value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (ValueError, TypeError, AttributeError):
+            pass
+    return datetime.now()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class SkillNames:
+    """Skill name <-> small int id, assigned on first sight and shared by every record"""
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def id(self, name):
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            with self._lock:
+                skill_id = self._ids.get(name)
+                if skill_id is None:
+                    skill_id = self._ids[name] = len(self.names)
+                    self.names.append(sys.intern(name))
+        return skill_id
+
+    def ids(self, names):
+        return tuple(dict.fromkeys(self.id(name) for name in names if name))
+
+    def lookup(self, ids):
+        names = self.names
+        return [names[skill_id] for skill_id in ids]
+
+
+SKILLS = SkillNames()
+
+
+@dataclass(slots=True, eq=False)
+class JobRecord:
+    """One posting: its search card fields, then its details once enriched
+
+    description stays None until details are attached, which is what tells
+    an enriched job (even one whose description came back empty) from a
+    card-only one.
+    """
+    title: str
+    company: str
+    location: str
+    url: str | None = None
+    job_id: int | None = None
+    post_date: str | None = None
+    scraped_at: str | None = None
+    source: str = 'public_api'
+    description: str | None = None
+    industry: str = ''
+    skill_ids: tuple = ()
+
+    def __post_init__(self):
+        self.company = _intern(self.company)
+        self.location = _intern(self.location)
+        self.source = _intern(self.source)
+
+    @classmethod
+    def from_dict(cls, job):
+        """Record of a job dict as the scraper used to build them, details nested or not"""
+        record = cls(job.get('title'), job.get('company'), job.get('location'), job.get('url'),
+                     job.get('job_id', linkedin_job_id(job.get('url'))), job.get('post_date'),
+                     job.get('scraped_at'), job.get('source', 'unknown'))
+        if job.get('details'):
+            record.set_details(job['details'])
+        return record
+
+    @property
+    def enriched(self):
+        return self.description is not None
+
+    @property
+    def skills(self):
+        return SKILLS.lookup(self.skill_ids)
+
+    def set_details(self, details):
+        """Attach a {'description', 'skills', 'industry'} dict from parsing, the cache or the database"""
+        self.description = details.get('description') or ''
+        self.industry = _intern(details.get('industry') or '')
+        self.skill_ids = SKILLS.ids(details.get('skills') or ())
+
+    def details(self):
+        """The nested details dict of the JSON shape, or None if not enriched"""
+        if self.description is None:
+            return None
+        return {'description': self.description, 'skills': self.skills, 'industry': self.industry}
+
+    def to_json(self):
+        """The job as the scraper's JSON files always held it"""
+        job = {
+            'title': self.title,
+            'company': self.company,
+            'location': self.location,
+            'url': self.url,
+            'job_id': self.job_id,
+            'post_date': self.post_date,
+            'scraped_at': self.scraped_at,
+            'source': self.source
+        }
+        if self.description is not None:
+            job['details'] = self.details()
+        return job
+
+    def summary(self):
+        """Compact representation for progress polling"""
+        return {
+            'title': self.title,
+            'company': self.company,
+            'location': self.location,
+            'url': self.url,
+            'post_date': self.post_date,
+            'skills': self.skills
+        }
+
+    def db_row(self):
+        """Parameters for schema.INSERT_JOB/UPSERT_JOB, cut to the column limits"""
+        scraped_at = parse_scraped_at(self.scraped_at)
+        return (job_key((self.url or '')[:URL_CHARS]), self.job_id, (self.title or '')[:TITLE_CHARS],
+                (self.company or '')[:COMPANY_CHARS], (self.location or '')[:LOCATION_CHARS], self.post_date,
+                self.source or 'unknown', (self.description or '')[:DESCRIPTION_CHARS],
+                self.industry[:INDUSTRY_CHARS], scraped_at, scraped_at)
+
+    def db_skills(self):
+        """Skill names to store, or None to keep the ones stored earlier (not enriched)"""
+        if self.description is None:
+            return None
+        return [name for name in self.skills if len(name) <= SKILL_CHARS]
+
+    def csv_row(self):
+        """Values in pipeline.CSV_FIELDNAMES order"""
+        return [self.title, self.company, self.location, self.url, self.post_date, self.scraped_at, self.source,
+                (self.description or '')[:CSV_DESCRIPTION_CHARS], self.industry, ', '.join(self.skills)]
@@ -0,0 +1,246 @@
+import glob
+import hashlib
+import http
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from parsers import get_parser
+from transport import PooledAdapter
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PATH = '/jobs-guest/jobs/api/seeMoreJobPostings/search'
+DETAIL_PATH = '/jobs/view/'
+MANIFEST = 'manifest.json'
+# Response headers worth keeping in a recording
+RECORDED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Retry-After')
+
+_JOB_LINK = re.compile(r'(/jobs/view/[^"?\s]*?-)(\d+)')
+
+
+def request_key(method, url):
+    """Stable identity of a request: method, host, path and sorted query"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} " + urlunsplit(('', parts.netloc.lower(), parts.path, query, ''))
+
+
+def _etag(body):
+    return '"' + hashlib.sha1(body.encode('utf-8')).hexdigest()[:16] + '"'
+
+
+class FixtureStore:
+    """Recorded pages to replay, looked up by exact request or by route
+
+    A recording directory holds a manifest of exact requests. Loose
+    search_*.html and detail_*.html files (like benchmarks/fixtures) serve
+    any search or job detail request that was not recorded: search pages
+    by their `start` offset (page n starts at n times the cards on the
+    first one), detail pages picked by job URL.
+    With vary=True the search pages repeat forever and every card gets its
+    own job id, so one small corpus can stand in for any number of postings.
+    """
+
+    def __init__(self, directory, vary=False):
+        self.directory = directory
+        self.vary = vary
+        self.recorded = {}
+        manifest = os.path.join(directory, MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest, encoding='utf-8') as f:
+                self.recorded = json.load(f)
+        self.search_pages = self._load('search_*.html')
+        self.detail_pages = self._load('detail_*.html')
+        # Pages are picked by offset, not by arrival, so prefetched pages get the right one
+        self.page_size = len(get_parser().job_cards(self.search_pages[0])) if self.search_pages else 0
+        if not (self.recorded or self.search_pages or self.detail_pages):
+            raise ValueError(f"No replay fixtures found in {directory}")
+        logger.info(f"Replay fixtures: {len(self.recorded)} recorded requests, "
+                    f"{len(self.search_pages)} search pages, {len(self.detail_pages)} detail pages")
+
+    def _load(self, pattern):
+        pages = []
+        for path in sorted(glob.glob(os.path.join(self.directory, pattern))):
+            with open(path, encoding='utf-8') as f:
+                pages.append(f.read())
+        return pages
+
+    def _read(self, name):
+        with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+            return f.read()
+
+    def lookup(self, method, url):
+        """(status, headers, body) for a request, or None if nothing matches"""
+        entry = self.recorded.get(request_key(method, url))
+        if entry:
+            return entry['status'], dict(entry.get('headers', {})), self._read(entry['body'])
+        parts = urlsplit(url)
+        if parts.path == SEARCH_PATH and self.search_pages:
+            body = self._search_page(dict(parse_qsl(parts.query)))
+        elif parts.path.startswith(DETAIL_PATH) and self.detail_pages:
+            digest = hashlib.sha1(parts.path.encode('utf-8')).digest()
+            body = self.detail_pages[int.from_bytes(digest[:4], 'big') % len(self.detail_pages)]
+        else:
+            return None
+        return 200, {'Content-Type': 'text/html; charset=utf-8', 'ETag': _etag(body)}, body
+
+    def _search_page(self, params):
+        query = (params.get('keywords', ''), params.get('location', ''))
+        start = int(params.get('start') or 0)
+        page = start // max(self.page_size, 1)
+        if not self.vary:
+            # Past the last recorded page LinkedIn answers with an empty page
+            return self.search_pages[page] if page < len(self.search_pages) else ''
+        body = self.search_pages[page % len(self.search_pages)]
+        salt = f"{query}|{start}|"
+        return _JOB_LINK.sub(
+            lambda m: m.group(1) + str(int(hashlib.sha1((salt + m.group(2)).encode('utf-8')).hexdigest()[:12], 16)),
+            body
+        )
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport that answers from a FixtureStore instead of the network
+
+    Every response is delayed by latency seconds plus up to jitter more, and
+    a share of requests fail on purpose: error_rate answers 503,
+    throttle_rate answers 429 (both with Retry-After: retry_after when set)
+    and connection_error_rate raises ConnectionError. If-None-Match is
+    honoured, so the detail cache revalidation path can be exercised too.
+    """
+
+    def __init__(self, store, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 connection_error_rate=0.0, retry_after=None, seed=None):
+        super().__init__()
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.connection_error_rate = connection_error_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # Stats
+        self.requests = 0
+        self.not_found = 0
+        self.not_modified = 0
+        self.injected_errors = 0
+        self.bytes_served = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._random.random()
+        if delay:
+            time.sleep(delay)
+
+        if roll < self.connection_error_rate:
+            self._count('injected_errors')
+            raise requests.exceptions.ConnectionError(f"Injected connection error for {request.url}", request=request)
+        roll -= self.connection_error_rate
+        if roll < self.error_rate + self.throttle_rate:
+            self._count('injected_errors')
+            status = 503 if roll < self.error_rate else 429
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else {}
+            return self._response(request, status, headers, '')
+
+        found = self.store.lookup(request.method, request.url)
+        if found is None:
+            self._count('not_found')
+            return self._response(request, 404, {}, '')
+        status, headers, body = found
+        etag = CaseInsensitiveDict(headers).get('ETag')
+        if status == 200 and etag and request.headers.get('If-None-Match') == etag:
+            self._count('not_modified')
+            return self._response(request, 304, {'ETag': etag}, '')
+        return self._response(request, status, headers, body)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _response(self, request, status, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = 'utf-8'
+        response._content = body.encode('utf-8')
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.reason = http.HTTPStatus(status).phrase
+        response.connection = self
+        with self._lock:
+            self.bytes_served += len(response._content)
+        return response
+
+    def close(self):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'not_found': self.not_found,
+                'not_modified': self.not_modified,
+                'injected_errors': self.injected_errors,
+                'bytes_served': self.bytes_served
+            }
+
+
+class RecordingAdapter(PooledAdapter):
+    """PooledAdapter that saves successful GETs into a replayable fixture directory
+
+    The scraper hands over each body as read_body left it (see record), so
+    recording does not read past an early stop. A body cut short is marked
+    truncated in the manifest.
+    """
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._manifest_path = os.path.join(directory, MANIFEST)
+        self.recorded = {}
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, encoding='utf-8') as f:
+                self.recorded = json.load(f)
+
+    def record(self, response, body):
+        """Save a response with the Body read from it, if it is a successful GET"""
+        if response.request.method != 'GET' or response.status_code != 200:
+            return
+        try:
+            self._record(response.request, response, body)
+        except OSError as e:
+            logger.warning(f"Could not record {response.request.url[:100]}: {e}")
+
+    def _record(self, request, response, body):
+        key = request_key(request.method, request.url)
+        kind = 'search' if urlsplit(request.url).path == SEARCH_PATH else 'page'
+        name = f"{kind}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.body"
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as f:
+            f.write(body.text)
+        headers = {header: response.headers[header] for header in RECORDED_HEADERS if header in response.headers}
+        entry = {'status': response.status_code, 'headers': headers, 'body': name}
+        if body.truncated:
+            entry['truncated'] = True
+        with self._lock:
+            self.recorded[key] = entry
+            temp_path = self._manifest_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.recorded, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self._manifest_path)
@@ -0,0 +1,293 @@
+import json
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Counts are per sighting: a posting returned by two searches counts in both.
+# Skills come from the posting's stored skill list at the time it is seen.
+UPSERT_DAILY_SKILLS = '''
+    INSERT INTO daily_skill_counts (day, keyword, skill_id, jobs) VALUES (?, ?, ?, ?)
+    ON CONFLICT(day, keyword, skill_id) DO UPDATE SET jobs = jobs + excluded.jobs
+'''
+UPSERT_DAILY_LOCATIONS = '''
+    INSERT INTO daily_location_counts (day, keyword, location, jobs) VALUES (?, ?, ?, ?)
+    ON CONFLICT(day, keyword, location) DO UPDATE SET jobs = jobs + excluded.jobs
+'''
+UPSERT_MONTHLY_SKILLS = '''
+    INSERT INTO monthly_skill_counts (month, keyword, skill_id, jobs) VALUES (?, ?, ?, ?)
+    ON CONFLICT(month, keyword, skill_id) DO UPDATE SET jobs = jobs + excluded.jobs
+'''
+UPSERT_MONTHLY_LOCATIONS = '''
+    INSERT INTO monthly_location_counts (month, keyword, location, jobs) VALUES (?, ?, ?, ?)
+    ON CONFLICT(month, keyword, location) DO UPDATE SET jobs = jobs + excluded.jobs
+'''
+UPSERT_SESSION_SKILLS = '''
+    INSERT INTO session_skill_counts (session_id, skill_id, jobs) VALUES (?, ?, ?)
+    ON CONFLICT(session_id, skill_id) DO UPDATE SET jobs = jobs + excluded.jobs
+'''
+UPSERT_SESSION_LOCATIONS = '''
+    INSERT INTO session_location_counts (session_id, location, jobs) VALUES (?, ?, ?)
+    ON CONFLICT(session_id, location) DO UPDATE SET jobs = jobs + excluded.jobs
+'''
+UPSERT_TOTAL = '''
+    INSERT INTO analytics_totals (name, value) VALUES (?, ?)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+'''
+
+
+def keyword_key(keywords):
+    """Rollup key for a search's keywords"""
+    return (keywords or '').strip().lower()
+
+
+def day_key(value):
+    """Calendar day (YYYY-MM-DD) of a datetime or ISO timestamp"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return str(value or '')[:10]
+
+
+def create_tables(cursor):
+    # Daily rows answer arbitrary windows; monthly rows cover the whole
+    # months inside a long window so it reads a few rows per month, not per day
+    for period in ('day', 'month'):
+        table = 'daily' if period == 'day' else 'monthly'
+        cursor.execute(f'''
+            CREATE TABLE {table}_skill_counts (
+                {period} TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                skill_id INTEGER NOT NULL REFERENCES skills(id),
+                jobs INTEGER NOT NULL,
+                PRIMARY KEY ({period}, keyword, skill_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(f'''
+            CREATE TABLE {table}_location_counts (
+                {period} TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                location TEXT NOT NULL,
+                jobs INTEGER NOT NULL,
+                PRIMARY KEY ({period}, keyword, location)
+            ) WITHOUT ROWID
+        ''')
+    cursor.execute('''
+        CREATE TABLE session_skill_counts (
+            session_id TEXT NOT NULL REFERENCES search_sessions(id),
+            skill_id INTEGER NOT NULL REFERENCES skills(id),
+            jobs INTEGER NOT NULL,
+            PRIMARY KEY (session_id, skill_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE session_location_counts (
+            session_id TEXT NOT NULL REFERENCES search_sessions(id),
+            location TEXT NOT NULL,
+            jobs INTEGER NOT NULL,
+            PRIMARY KEY (session_id, location)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE analytics_totals (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+
+
+def backfill(cursor):
+    """Rebuild every rollup from the stored sessions, postings and skills"""
+    for table, width in (('daily', 10), ('monthly', 7)):
+        period = 'day' if table == 'daily' else 'month'
+        cursor.execute(f'''
+            INSERT INTO {table}_skill_counts ({period}, keyword, skill_id, jobs)
+            SELECT substr(sj.seen_at, 1, {width}), lower(trim(COALESCE(ss.keywords, ''))), js.skill_id, COUNT(*)
+            FROM session_jobs sj
+            JOIN search_sessions ss ON ss.id = sj.session_id
+            JOIN job_skills js ON js.job_id = sj.job_id
+            GROUP BY 1, 2, 3
+        ''')
+        cursor.execute(f'''
+            INSERT INTO {table}_location_counts ({period}, keyword, location, jobs)
+            SELECT substr(sj.seen_at, 1, {width}), lower(trim(COALESCE(ss.keywords, ''))),
+                   COALESCE(j.location, ''), COUNT(*)
+            FROM session_jobs sj
+            JOIN search_sessions ss ON ss.id = sj.session_id
+            JOIN jobs j ON j.id = sj.job_id
+            GROUP BY 1, 2, 3
+        ''')
+    cursor.execute('''
+        INSERT INTO session_skill_counts (session_id, skill_id, jobs)
+        SELECT sj.session_id, js.skill_id, COUNT(*)
+        FROM session_jobs sj JOIN job_skills js ON js.job_id = sj.job_id
+        GROUP BY 1, 2
+    ''')
+    cursor.execute('''
+        INSERT INTO session_location_counts (session_id, location, jobs)
+        SELECT sj.session_id, COALESCE(j.location, ''), COUNT(*)
+        FROM session_jobs sj JOIN jobs j ON j.id = sj.job_id
+        GROUP BY 1, 2
+    ''')
+    cursor.execute("INSERT INTO analytics_totals (name, value) SELECT 'jobs', COUNT(*) FROM jobs")
+    cursor.execute("INSERT INTO analytics_totals (name, value) SELECT 'sessions', COUNT(*) FROM search_sessions")
+
+
+def record_sightings(cursor, session_id, keywords, sightings, new_jobs=0):
+    """Add newly linked (job_id, location, seen_at) sightings of a session to the rollups
+
+    Runs inside the caller's transaction, so rollups never disagree with
+    the rows they summarise.
+    """
+    if new_jobs:
+        cursor.execute(UPSERT_TOTAL, ('jobs', new_jobs))
+    if not sightings:
+        return
+    keyword = keyword_key(keywords)
+    job_skills = {}
+    job_ids = json.dumps(sorted({job_id for job_id, _, _ in sightings}))
+    for job_id, skill_id in cursor.execute(
+            'SELECT job_id, skill_id FROM job_skills WHERE job_id IN (SELECT value FROM json_each(?))', (job_ids,)):
+        job_skills.setdefault(job_id, []).append(skill_id)
+
+    daily_skills = Counter()
+    daily_locations = Counter()
+    session_skills = Counter()
+    session_locations = Counter()
+    for job_id, location, seen_at in sightings:
+        day = day_key(seen_at)
+        location = location or ''
+        daily_locations[day, location] += 1
+        session_locations[location] += 1
+        for skill_id in job_skills.get(job_id, ()):
+            daily_skills[day, skill_id] += 1
+            session_skills[skill_id] += 1
+
+    monthly_skills = Counter()
+    for (day, skill_id), count in daily_skills.items():
+        monthly_skills[day[:7], skill_id] += count
+    monthly_locations = Counter()
+    for (day, location), count in daily_locations.items():
+        monthly_locations[day[:7], location] += count
+
+    cursor.executemany(UPSERT_DAILY_SKILLS, [(day, keyword, skill_id, count)
+                                             for (day, skill_id), count in daily_skills.items()])
+    cursor.executemany(UPSERT_DAILY_LOCATIONS, [(day, keyword, location, count)
+                                                for (day, location), count in daily_locations.items()])
+    cursor.executemany(UPSERT_MONTHLY_SKILLS, [(month, keyword, skill_id, count)
+                                               for (month, skill_id), count in monthly_skills.items()])
+    cursor.executemany(UPSERT_MONTHLY_LOCATIONS, [(month, keyword, location, count)
+                                                  for (month, location), count in monthly_locations.items()])
+    cursor.executemany(UPSERT_SESSION_SKILLS, [(session_id, skill_id, count)
+                                               for skill_id, count in session_skills.items()])
+    cursor.executemany(UPSERT_SESSION_LOCATIONS, [(session_id, location, count)
+                                                  for location, count in session_locations.items()])
+
+
+def record_session(cursor):
+    cursor.execute(UPSERT_TOTAL, ('sessions', 1))
+
+
+def record_write(cursor):
+    # Not a row count: bumped by every flush, so cached results notice re-sightings too
+    cursor.execute(UPSERT_TOTAL, ('writes', 1))
+
+
+def totals(conn):
+    """Maintained counters, keyed by name ('jobs', 'sessions', 'writes')"""
+    return dict(conn.execute('SELECT name, value FROM analytics_totals').fetchall())
+
+
+def _as_date(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _window_ranges(since=None, until=None):
+    """Split an inclusive day window into (period, first, last) ranges
+
+    Whole months are read from the monthly rollups, the partial months at
+    either end from the daily ones. Open ends are unbounded.
+    """
+    since = _as_date(since)
+    until = _as_date(until)
+    first_month = since if since is None or since.day == 1 else _next_month(since)
+    end = until + timedelta(days=1) if until else None
+    last_month = end if end is None or end.day == 1 else _month_start(end)
+    if first_month is not None and last_month is not None and first_month >= last_month:
+        return [('day', since, until)]
+    ranges = []
+    if since is not None and since < first_month:
+        ranges.append(('day', since, first_month - timedelta(days=1)))
+    ranges.append(('month', first_month, last_month - timedelta(days=1) if last_month else None))
+    if last_month is not None and until >= last_month:
+        ranges.append(('day', last_month, until))
+    return ranges
+
+
+def _windowed_counts(kind, since, until, keyword):
+    """SQL and parameters summing one kind of rollup ('skill' or 'location') over a window"""
+    column = 'skill_id' if kind == 'skill' else 'location'
+    parts = []
+    params = []
+    for period, first, last in _window_ranges(since, until):
+        table = 'daily' if period == 'day' else 'monthly'
+        width = 10 if period == 'day' else 7
+        clauses = []
+        if first is not None:
+            clauses.append(f'{period} >= ?')
+            params.append(first.isoformat()[:width])
+        if last is not None:
+            clauses.append(f'{period} <= ?')
+            params.append(last.isoformat()[:width])
+        if keyword:
+            clauses.append('keyword = ?')
+            params.append(keyword_key(keyword))
+        where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        parts.append(f'SELECT {column}, jobs FROM {table}_{kind}_counts{where}')
+    sql = f'SELECT {column}, SUM(jobs) AS jobs FROM ({" UNION ALL ".join(parts)}) GROUP BY {column}'
+    return sql, params
+
+
+def top_skills(conn, limit=10, since=None, until=None, keyword=None, session_id=None):
+    """Most frequent skills in a day window (inclusive), optionally for one keyword or session"""
+    if session_id:
+        rows = conn.execute('''
+            SELECT s.name, c.jobs FROM session_skill_counts c JOIN skills s ON s.id = c.skill_id
+            WHERE c.session_id = ? ORDER BY c.jobs DESC, s.name LIMIT ?
+        ''', (session_id, limit))
+        return [(name, jobs) for name, jobs in rows]
+    counts, params = _windowed_counts('skill', since, until, keyword)
+    rows = conn.execute(f'''
+        SELECT s.name, t.jobs FROM ({counts}) t JOIN skills s ON s.id = t.skill_id
+        ORDER BY t.jobs DESC, s.name LIMIT ?
+    ''', (*params, limit))
+    return [(name, jobs) for name, jobs in rows]
+
+
+def top_locations(conn, limit=10, since=None, until=None, keyword=None, session_id=None):
+    """Most frequent job locations in a day window (inclusive), optionally for one keyword or session"""
+    if session_id:
+        rows = conn.execute('''
+            SELECT location, jobs FROM session_location_counts
+            WHERE session_id = ? ORDER BY jobs DESC, location LIMIT ?
+        ''', (session_id, limit))
+        return [(location, jobs) for location, jobs in rows]
+    counts, params = _windowed_counts('location', since, until, keyword)
+    rows = conn.execute(f'''
+        SELECT location, jobs FROM ({counts}) ORDER BY jobs DESC, location LIMIT ?
+    ''', (*params, limit))
+    return [(location, jobs) for location, jobs in rows]
@@ -0,0 +1,150 @@
+import json
+import uuid
+from datetime import datetime
+
+from browse import encode_cursor
+
+# Most recent posting ids remembered per saved search
+SEEN_IDS_KEPT = 500
+# [searched_at, job id] of the last posting of a new_postings page
+POSTINGS_CURSOR = ((str, int),)
+SAVED_SEARCH_FIELDS = ('id', 'keywords', 'location', 'max_results', 'created_at', 'last_run_at', 'runs', 'new_jobs')
+
+
+def create_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS saved_searches (
+            id TEXT PRIMARY KEY,
+            keywords TEXT NOT NULL,
+            location TEXT NOT NULL DEFAULT '',
+            max_results INTEGER NOT NULL,
+            created_at DATETIME,
+            last_run_at DATETIME,
+            runs INTEGER NOT NULL DEFAULT 0,
+            new_jobs INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Each refresh is a search session; it records what the saved search had
+    # seen once it finished, which is where the next refresh stops paging
+    cursor.execute('ALTER TABLE search_sessions ADD COLUMN saved_search_id TEXT')
+    cursor.execute('ALTER TABLE search_sessions ADD COLUMN seen_job_ids TEXT')
+    cursor.execute('ALTER TABLE search_sessions ADD COLUMN newest_post_date TEXT')
+    cursor.execute('CREATE INDEX idx_sessions_saved_search ON search_sessions(saved_search_id, searched_at)')
+
+
+def _as_dict(row):
+    return {field: row[field] for field in SAVED_SEARCH_FIELDS} if row else None
+
+
+def create(conn, keywords, location, max_results):
+    saved_search_id = str(uuid.uuid4())[:8]
+    conn.execute('''
+        INSERT INTO saved_searches (id, keywords, location, max_results, created_at) VALUES (?, ?, ?, ?, ?)
+    ''', (saved_search_id, keywords, location, max_results, datetime.now()))
+    conn.commit()
+    return get(conn, saved_search_id)
+
+
+def get(conn, saved_search_id):
+    return _as_dict(conn.execute('SELECT * FROM saved_searches WHERE id = ?', (saved_search_id,)).fetchone())
+
+
+def list_all(conn):
+    return [_as_dict(row) for row in conn.execute('SELECT * FROM saved_searches ORDER BY created_at DESC')]
+
+
+def delete(conn, saved_search_id):
+    """Forget a saved search; its refresh sessions and their jobs stay in the history"""
+    deleted = conn.execute('DELETE FROM saved_searches WHERE id = ?', (saved_search_id,)).rowcount
+    conn.commit()
+    return bool(deleted)
+
+
+def watermark(conn, saved_search_id):
+    """(posting ids seen so far, newest post date seen) as of the last refresh"""
+    row = conn.execute('''
+        SELECT seen_job_ids, newest_post_date FROM search_sessions
+        WHERE saved_search_id = ? ORDER BY searched_at DESC LIMIT 1
+    ''', (saved_search_id,)).fetchone()
+    if row is None:
+        return [], None
+    return json.loads(row['seen_job_ids'] or '[]'), row['newest_post_date']
+
+
+def record_run(conn, saved_search_id, session_id, new_jobs):
+    """Attach a finished refresh session to its saved search and move the watermark past new_jobs"""
+    seen, newest_post_date = watermark(conn, saved_search_id)
+    new_ids = [job['job_id'] for job in new_jobs if job.get('job_id')]
+    seen = list(dict.fromkeys(new_ids + seen))[:SEEN_IDS_KEPT]
+    post_dates = [job['post_date'] for job in new_jobs if job.get('post_date')]
+    if post_dates:
+        newest_post_date = max(post_dates + ([newest_post_date] if newest_post_date else []))
+    # A refresh that found nothing new has no session row; the watermark stays put
+    conn.execute('''
+        UPDATE search_sessions SET saved_search_id = ?, seen_job_ids = ?, newest_post_date = ? WHERE id = ?
+    ''', (saved_search_id, json.dumps(seen), newest_post_date, session_id))
+    conn.execute('''
+        UPDATE saved_searches SET last_run_at = ?, runs = runs + 1, new_jobs = new_jobs + ? WHERE id = ?
+    ''', (datetime.now(), len(new_jobs), saved_search_id))
+    conn.commit()
+
+
+def new_postings(conn, saved_search_id, since=None, limit=100, cursor=None):
+    """Postings found by refreshes after since (default: the latest refresh), oldest refresh first
+
+    Returns (jobs, next cursor, next since). While the window has more
+    postings the cursor reads the next page and next since stays at since;
+    on the last page the cursor is None and next since is the latest
+    refresh time, to pass back as since to poll for what arrives next.
+    Refreshes that finish while a client pages sort after the postings
+    already returned, so they are read on later pages instead of skipped.
+    """
+    latest = conn.execute('''
+        SELECT MAX(searched_at) FROM search_sessions WHERE saved_search_id = ?
+    ''', (saved_search_id,)).fetchone()[0]
+    if latest is None:
+        return [], None, None
+    if cursor:
+        # The cursor is past since already, and past latest if since was not given
+        condition, params = '(s.searched_at, j.id) > (?, ?)', cursor
+    elif since is None:
+        condition, params = 's.searched_at >= ?', [latest]
+    else:
+        condition, params = 's.searched_at > ?', [since]
+    rows = conn.execute(f'''
+        SELECT j.id, j.linkedin_job_id, j.title, j.company, j.location, j.url, j.post_date,
+               s.id AS session_id, s.searched_at, sj.seen_at
+        FROM search_sessions s
+        JOIN session_jobs sj ON sj.session_id = s.id
+        JOIN jobs j ON j.id = sj.job_id
+        WHERE s.saved_search_id = ? AND {condition}
+        ORDER BY s.searched_at, j.id
+        LIMIT ?
+    ''', (saved_search_id, *params, limit + 1)).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]['searched_at'], rows[-1]['id']])
+        next_since = since.isoformat(sep=' ') if since else None
+    else:
+        # A refresh committed since latest was read may already be on this page
+        next_since = max([latest] + [row['searched_at'] for row in rows[-1:]])
+    skills = {}
+    for job_id, name in conn.execute('''
+        SELECT js.job_id, s.name FROM job_skills js JOIN skills s ON s.id = js.skill_id
+        WHERE js.job_id IN (SELECT value FROM json_each(?))
+        ORDER BY s.name
+    ''', (json.dumps([row['id'] for row in rows]),)):
+        skills.setdefault(job_id, []).append(name)
+    jobs = [{
+        'job_id': row['linkedin_job_id'],
+        'title': row['title'],
+        'company': row['company'],
+        'location': row['location'],
+        'url': row['url'],
+        'post_date': row['post_date'],
+        'skills': skills.get(row['id'], []),
+        'session_id': row['session_id'],
+        'seen_at': row['seen_at']
+    } for row in rows]
+    return jobs, next_cursor, next_since
@@ -0,0 +1,298 @@
+import logging
+import time
+
+import browse
+import checkpoints
+import columnar
+import fulltext
+import rollups
+import saved_searches
+from dedupe import enriched_condition, linkedin_job_id
+from http_cache import normalize_url
+from skill_matcher import get_skill_matcher
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of ? placeholders in one statement
+MAX_QUERY_PARAMS = 500
+
+INSERT_JOB = '''
+    INSERT INTO jobs (url, linkedin_job_id, title, company, location, post_date, source, description, industry,
+                      first_seen_at, scraped_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# A failed detail fetch (empty or placeholder description) keeps the description stored earlier
+UPSERT_JOB = INSERT_JOB + f'''
+    ON CONFLICT(url) DO UPDATE SET
+        linkedin_job_id = COALESCE(jobs.linkedin_job_id, excluded.linkedin_job_id),
+        title = excluded.title,
+        company = excluded.company,
+        location = excluded.location,
+        post_date = COALESCE(NULLIF(excluded.post_date, ''), jobs.post_date),
+        source = excluded.source,
+        description = CASE WHEN {enriched_condition('excluded.description')}
+                           THEN excluded.description ELSE jobs.description END,
+        industry = COALESCE(NULLIF(excluded.industry, ''), jobs.industry),
+        scraped_at = excluded.scraped_at
+'''
+
+
+def _create_sessions(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_sessions (
+            id TEXT PRIMARY KEY,
+            keywords TEXT,
+            location TEXT,
+            max_results INTEGER,
+            use_auth BOOLEAN,
+            searched_at DATETIME,
+            total_jobs INTEGER
+        )
+    ''')
+
+
+def _create_normalized_tables(cursor):
+    # One row per posting; url is the normalized posting URL. Jobs scraped
+    # without a URL cannot be matched up, they get a row per sighting (NULLs
+    # never collide in a UNIQUE column)
+    cursor.execute('''
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY,
+            url TEXT UNIQUE,
+            title TEXT,
+            company TEXT,
+            location TEXT,
+            post_date TEXT,
+            source TEXT,
+            description TEXT,
+            industry TEXT,
+            first_seen_at DATETIME,
+            scraped_at DATETIME,
+            linkedin_job_id INTEGER
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE session_jobs (
+            session_id TEXT NOT NULL REFERENCES search_sessions(id),
+            job_id INTEGER NOT NULL REFERENCES jobs(id),
+            seen_at DATETIME,
+            PRIMARY KEY (session_id, job_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE skills (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE job_skills (
+            job_id INTEGER NOT NULL REFERENCES jobs(id),
+            skill_id INTEGER NOT NULL REFERENCES skills(id),
+            PRIMARY KEY (job_id, skill_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX idx_session_jobs_job ON session_jobs(job_id)')
+    cursor.execute('CREATE INDEX idx_job_skills_skill ON job_skills(skill_id, job_id)')
+
+
+def _columns(cursor, table):
+    return [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+
+
+def _normalize_jobs(cursor):
+    """Skills dictionary, jobs unique by URL and a session/job link table"""
+    _create_sessions(cursor)
+    legacy = 'session_id' in _columns(cursor, 'jobs')
+    if legacy:
+        cursor.execute('ALTER TABLE jobs RENAME TO legacy_jobs')
+        cursor.execute('ALTER TABLE job_skills RENAME TO legacy_job_skills')
+        for index in ('idx_session_id', 'idx_skill', 'idx_job_id'):
+            cursor.execute(f'DROP INDEX IF EXISTS {index}')
+    _create_normalized_tables(cursor)
+    if not legacy:
+        return
+
+    started = time.monotonic()
+    job_ids = {}
+    rows = cursor.execute('''
+        SELECT id, session_id, title, company, location, url, post_date, scraped_at, source, description, industry
+        FROM legacy_jobs ORDER BY id
+    ''').fetchall()
+    for row in rows:
+        (legacy_id, session_id, title, company, location, url, post_date,
+         scraped_at, source, description, industry) = tuple(row)
+        job_ids[legacy_id] = upsert_job(cursor, {
+            'url': url, 'title': title, 'company': company, 'location': location,
+            'post_date': post_date, 'source': source, 'description': description,
+            'industry': industry, 'scraped_at': scraped_at
+        })
+        cursor.execute('INSERT OR IGNORE INTO session_jobs (session_id, job_id, seen_at) VALUES (?, ?, ?)',
+                       (session_id, job_ids[legacy_id], scraped_at))
+
+    # Fold case variants the old extractor produced onto canonical names
+    matcher = get_skill_matcher()
+    pairs = set()
+    skill_ids = {}
+    for legacy_job_id, skill in cursor.execute('SELECT job_id, skill FROM legacy_job_skills').fetchall():
+        if legacy_job_id not in job_ids or not skill:
+            continue
+        matched = matcher.skill_id(skill)
+        name = matcher.skills[matched] if matched is not None else skill
+        pairs.add((job_ids[legacy_job_id], name))
+    resolve_skill_ids(cursor, {name for _, name in pairs}, skill_ids)
+    cursor.executemany('INSERT OR IGNORE INTO job_skills (job_id, skill_id) VALUES (?, ?)',
+                       [(job_id, skill_ids[name]) for job_id, name in pairs])
+
+    cursor.execute('DROP TABLE legacy_job_skills')
+    cursor.execute('DROP TABLE legacy_jobs')
+    logger.info(f"Migrated {len(rows)} job rows into {len(set(job_ids.values()))} unique postings "
+                f"and {len(pairs)} skill links in {time.monotonic() - started:.1f}s")
+
+
+def _add_rollups(cursor):
+    """Incrementally maintained skill and location rollups per day, keyword and session"""
+    rollups.create_tables(cursor)
+    rollups.backfill(cursor)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_searched_at ON search_sessions(searched_at)')
+
+
+def _add_fulltext_index(cursor):
+    """FTS5 index over job titles, companies and descriptions"""
+    if not fulltext.fts5_available(cursor):
+        logger.warning("SQLite was built without FTS5, job full-text search is disabled")
+        return
+    fulltext.create_index(cursor)
+
+
+def _add_crawl_checkpoints(cursor):
+    """Pagination checkpoints for resumable batch crawls"""
+    checkpoints.create_table(cursor)
+
+
+def _add_linkedin_job_ids(cursor):
+    """LinkedIn posting ids on jobs, unique, for cross-session deduplication"""
+    if 'linkedin_job_id' not in _columns(cursor, 'jobs'):
+        cursor.execute('ALTER TABLE jobs ADD COLUMN linkedin_job_id INTEGER')
+    # The same posting can be stored under several URL slugs; the oldest row owns the id
+    owners = {}
+    for job_id, url in cursor.execute('SELECT id, url FROM jobs ORDER BY id').fetchall():
+        posting = linkedin_job_id(url)
+        if posting is not None:
+            owners.setdefault(posting, job_id)
+    cursor.execute('UPDATE jobs SET linkedin_job_id = NULL WHERE linkedin_job_id IS NOT NULL')
+    cursor.executemany('UPDATE jobs SET linkedin_job_id = ? WHERE id = ?', owners.items())
+    cursor.execute('CREATE UNIQUE INDEX idx_jobs_linkedin_job_id ON jobs(linkedin_job_id)')
+    logger.info(f"Tagged {len(owners)} postings with their LinkedIn job id")
+
+
+def _add_saved_searches(cursor):
+    """Saved searches and the per-refresh watermark their refreshes stop at"""
+    saved_searches.create_tables(cursor)
+
+
+def _add_sighting_time_index(cursor):
+    """Index of session sightings by time, for incremental columnar exports"""
+    columnar.create_index(cursor)
+
+
+def _add_browse_indexes(cursor):
+    """Indexes for keyset-paginated job and session browsing"""
+    browse.create_indexes(cursor)
+
+
+def _add_job_id_order_indexes(cursor):
+    """Company and location indexes in job id order, for the id-keyed job cursor"""
+    browse.create_id_order_indexes(cursor)
+
+
+# Schema migrations, applied in order; PRAGMA user_version holds the last one applied
+MIGRATIONS = [
+    (1, _normalize_jobs),
+    (2, _add_rollups),
+    (3, _add_fulltext_index),
+    (4, _add_crawl_checkpoints),
+    (5, _add_linkedin_job_ids),
+    (6, _add_saved_searches),
+    (7, _add_sighting_time_index),
+    (8, _add_browse_indexes),
+    (9, _add_job_id_order_indexes),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn):
+    """Bring the database schema up to SCHEMA_VERSION"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+    cursor = conn.cursor()
+    # Hold the write lock so concurrent workers migrate exactly once
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        for target, step in MIGRATIONS:
+            if target <= version:
+                continue
+            logger.info(f"Migrating database schema to version {target}: {step.__doc__}")
+            step(cursor)
+            cursor.execute(f'PRAGMA user_version = {target}')
+            version = target
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return version
+
+
+def job_key(url):
+    """Deduplication key for a posting URL"""
+    return normalize_url(url) if url else None
+
+
+def upsert_job(cursor, job):
+    """Insert or refresh one posting and return its id
+
+    Newer sightings win for the card fields; a description or industry is
+    only replaced by a non-empty one (and a description not by a failed
+    fetch's placeholder), so a run without enrichment keeps the details
+    fetched earlier.
+    """
+    params = job_row(job)
+    if params[0] is None:
+        cursor.execute(INSERT_JOB, params)
+        return cursor.lastrowid
+    cursor.execute(UPSERT_JOB, params)
+    return cursor.execute('SELECT id FROM jobs WHERE url = ?', (params[0],)).fetchone()[0]
+
+
+def job_row(job):
+    """Parameters for INSERT_JOB/UPSERT_JOB from a flat job dict"""
+    return (job_key(job.get('url')), linkedin_job_id(job.get('url')), job.get('title'), job.get('company'),
+            job.get('location'), job.get('post_date'), job.get('source'), job.get('description') or '',
+            job.get('industry') or '', job.get('scraped_at'), job.get('scraped_at'))
+
+
+def chunks(items, size=MAX_QUERY_PARAMS):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def lookup_ids(cursor, table, column, values):
+    """Map values of a UNIQUE column to row ids"""
+    found = {}
+    for chunk in chunks(values):
+        placeholders = ', '.join('?' * len(chunk))
+        found.update(cursor.execute(f'SELECT {column}, id FROM {table} WHERE {column} IN ({placeholders})', chunk))
+    return found
+
+
+def resolve_skill_ids(cursor, names, cache):
+    """Fill cache with ids for skill names, adding unknown skills to the dictionary"""
+    missing = [name for name in names if name not in cache]
+    if not missing:
+        return cache
+    cursor.executemany('INSERT OR IGNORE INTO skills (name) VALUES (?)', [(name,) for name in missing])
+    cache.update(lookup_ids(cursor, 'skills', 'name', missing))
+    return cache
@@ -0,0 +1,209 @@
+import itertools
+from datetime import date, timedelta
+
+import rollups
+from query_cache import QueryCache
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # optional dependencies
+    np = None
+
+CACHE_ENTRIES = 8
+# Cached results are reused while the stored data is unchanged, and for at
+# most this long after it changes, so a running crawl does not rebuild them on every request
+CACHE_STALE_SECONDS = 300
+
+# Matrices are numpy objects, kept in-process only
+_cache = QueryCache('skill_analytics', entries=CACHE_ENTRIES, ttl=None)
+
+
+def available():
+    return np is not None
+
+
+def _cached(conn, key, build):
+    return _cache.get(conn, key, build, stale=CACHE_STALE_SECONDS)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+class SkillMatrix:
+    """Jobs x skills incidence matrix (CSR) of the jobs with extracted skills
+
+    Columns are skill ids. The skill x skill co-occurrence counts are
+    computed once, on first use, as the sparse product X'X; its diagonal
+    holds how many jobs ask for each skill.
+    """
+
+    def __init__(self, job_ids, skill_ids, names):
+        jobs, rows = np.unique(job_ids, return_inverse=True)
+        width = int(skill_ids.max()) + 1 if len(skill_ids) else 0
+        self.jobs = len(jobs)
+        self.names = names
+        self.incidence = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, skill_ids)),
+                                           shape=(self.jobs, width))
+        self.skill_jobs = np.asarray(self.incidence.sum(axis=0)).ravel()
+        self._cooccurrence = None
+
+    @property
+    def cooccurrence(self):
+        if self._cooccurrence is None:
+            self._cooccurrence = (self.incidence.T @ self.incidence).tocsr()
+        return self._cooccurrence
+
+    def lift(self, pair_jobs, first, second):
+        """P(a and b) / (P(a) P(b)): above 1, the skills are asked for together more than by chance"""
+        return pair_jobs * self.jobs / (self.skill_jobs[first] * self.skill_jobs[second])
+
+    def pairs(self, limit=20, min_jobs=2, sort='jobs'):
+        """Most frequent (or, sort='lift', most associated) skill pairs"""
+        upper = sparse.triu(self.cooccurrence, k=1).tocoo()
+        keep = upper.data >= min_jobs
+        first, second, together = upper.row[keep], upper.col[keep], upper.data[keep]
+        lift = self.lift(together, first, second)
+        key = lift if sort == 'lift' else together
+        # Ties broken by the other measure
+        order = np.lexsort((-(together if sort == 'lift' else lift), -key))[:limit]
+        return [{
+            'skills': [self.names.get(int(first[i])), self.names.get(int(second[i]))],
+            'jobs': int(together[i]),
+            'lift': round(float(lift[i]), 3),
+            'confidence': [round(float(together[i] / self.skill_jobs[first[i]]), 3),
+                           round(float(together[i] / self.skill_jobs[second[i]]), 3)]
+        } for i in order]
+
+    def related(self, skill_id, limit=20, min_jobs=2, sort='lift'):
+        """Skills asked for together with one skill, or None if no job asks for it"""
+        if skill_id is None or skill_id >= len(self.skill_jobs) or not self.skill_jobs[skill_id]:
+            return None
+        row = self.cooccurrence.getrow(skill_id).tocoo()
+        keep = (row.col != skill_id) & (row.data >= min_jobs)
+        others, together = row.col[keep], row.data[keep]
+        lift = self.lift(together, np.full(len(others), skill_id), others)
+        key = lift if sort == 'lift' else together
+        order = np.lexsort((-(together if sort == 'lift' else lift), -key))[:limit]
+        return [{
+            'name': self.names.get(int(others[i])),
+            'jobs': int(together[i]),
+            'lift': round(float(lift[i]), 3),
+            'confidence': round(float(together[i] / self.skill_jobs[skill_id]), 3)
+        } for i in order]
+
+
+def _job_filter(since, until, keyword, session_id):
+    """Subquery of the job ids seen in a window, by a keyword or in a session (None: all jobs)"""
+    conditions = []
+    params = []
+    if session_id:
+        conditions.append('sj.session_id = ?')
+        params.append(session_id)
+    if keyword:
+        conditions.append('lower(trim(s.keywords)) = ?')
+        params.append(rollups.keyword_key(keyword))
+    if since:
+        conditions.append('datetime(sj.seen_at) >= ?')
+        params.append(since.isoformat())
+    if until:
+        conditions.append('datetime(sj.seen_at) < ?')
+        params.append((until + timedelta(days=1)).isoformat())
+    if not conditions:
+        return None, []
+    return f'''
+        SELECT sj.job_id FROM session_jobs sj JOIN search_sessions s ON s.id = sj.session_id
+        WHERE {' AND '.join(conditions)}
+    ''', params
+
+
+def skill_matrix(conn, since=None, until=None, keyword=None, session_id=None):
+    """The (cached) SkillMatrix of the jobs matching the filters"""
+    def build():
+        jobs, params = _job_filter(since, until, keyword, session_id)
+        sql = 'SELECT job_id, skill_id FROM job_skills'
+        if jobs:
+            sql += f' WHERE job_id IN ({jobs})'
+        flat = np.fromiter(itertools.chain.from_iterable(conn.execute(sql, params)), dtype=np.int64)
+        pairs = flat.reshape(-1, 2)
+        names = dict(conn.execute('SELECT id, name FROM skills').fetchall())
+        return SkillMatrix(pairs[:, 0], pairs[:, 1], names)
+
+    return _cached(conn, ('matrix', since, until, keyword, session_id), build)
+
+
+def skill_id(conn, name):
+    row = conn.execute('SELECT id FROM skills WHERE name = ? COLLATE NOCASE', (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def skill_trends(conn, weeks=8, limit=10, until=None, keyword=None, min_jobs=3):
+    """Week-over-week change in each skill's share of job sightings, from the daily rollups
+
+    Weeks start on Monday; the last one is the week of until (default
+    today) and may be partial, which is why shares are compared rather than
+    raw counts. Returns rising and falling skills by the change in share
+    between the last two weeks, each with its weekly series.
+    """
+    until = until or date.today()
+    last_week = _week_start(until)
+    first_week = last_week - timedelta(weeks=weeks - 1)
+
+    def build():
+        params = [first_week.isoformat(), until.isoformat()]
+        condition = 'day >= ? AND day <= ?'
+        if keyword:
+            condition += ' AND keyword = ?'
+            params.append(rollups.keyword_key(keyword))
+        skill_rows = conn.execute(f'SELECT day, skill_id, jobs FROM daily_skill_counts WHERE {condition}',
+                                  params).fetchall()
+        total_rows = conn.execute(f'''
+            SELECT day, SUM(jobs) FROM daily_location_counts WHERE {condition} GROUP BY day
+        ''', params).fetchall()
+        names = dict(conn.execute('SELECT id, name FROM skills').fetchall())
+
+        def week_index(days):
+            offsets = np.array([(date.fromisoformat(day) - first_week).days for day in days], dtype=np.int64)
+            return offsets // 7
+
+        counts = np.zeros((weeks, max(names, default=0) + 1), dtype=np.int64)
+        if skill_rows:
+            days, ids, jobs = zip(*skill_rows)
+            np.add.at(counts, (week_index(days), np.array(ids)), np.array(jobs))
+        sightings = np.zeros(weeks, dtype=np.int64)
+        if total_rows:
+            days, jobs = zip(*total_rows)
+            np.add.at(sightings, week_index(days), np.array(jobs))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares = np.where(sightings[:, None] > 0, counts / sightings[:, None], 0.0)
+        return counts, sightings, shares, names
+
+    counts, sightings, shares, names = _cached(
+        conn, ('trends', weeks, until, keyword), build)
+    weeks_list = [(first_week + timedelta(weeks=i)).isoformat() for i in range(weeks)]
+    result = {'weeks': weeks_list, 'sightings': sightings.tolist(), 'rising': [], 'falling': []}
+    if weeks < 2:
+        return result
+    delta = shares[-1] - shares[-2]
+    eligible = (counts[-1] + counts[-2]) >= min_jobs
+
+    def describe(ids):
+        return [{
+            'name': names.get(int(i)),
+            'jobs': counts[:, i].tolist(),
+            'share': round(float(shares[-1, i]), 4),
+            'previous_share': round(float(shares[-2, i]), 4),
+            'share_change': round(float(delta[i]), 4),
+            'jobs_change': int(counts[-1, i] - counts[-2, i])
+        } for i in ids]
+
+    candidates = np.flatnonzero(eligible)
+    order = candidates[np.argsort(-delta[candidates], kind='stable')]
+    result['rising'] = describe([i for i in order[:limit] if delta[i] > 0])
+    result['falling'] = describe([i for i in order[::-1][:limit] if delta[i] < 0])
+    return result
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skills_taxonomy.json')
+
+# A term only matches when it is not glued to other word characters
+TERM_START = r'(?<!\w)'
+TERM_END = r'(?!\w)'
+
+
+def _trie_pattern(terms):
+    """Build a prefix-factored regex alternation for terms
+
+    Sharing prefixes lets the regex engine dispatch on the first characters
+    instead of trying every alternative at each position; greedy optional
+    suffixes make longer terms win over their prefixes (JavaScript over Java).
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node):
+        terminal = '' in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            return '(?:' + body + ')?'
+        return body
+
+    return emit(trie)
+
+
+class SkillMatcher:
+    """Single-pass skill extractor compiled from a taxonomy of canonical names and aliases"""
+
+    def __init__(self, skills):
+        self.skills = []          # canonical names, index is the skill's id
+        self.categories = {}
+        self._folded = {}         # casefolded term -> skill id
+        self._exact = {}          # case-sensitive term -> skill id
+        for entry in skills:
+            self._add(entry)
+        self.pattern = self._compile()
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_TAXONOMY_FILE):
+        with open(path, encoding='utf-8') as f:
+            taxonomy = json.load(f)
+        matcher = cls(taxonomy['skills'])
+        logger.info(f"Loaded {len(matcher.skills)} skills from {path}")
+        return matcher
+
+    def _add(self, entry):
+        name = entry['name']
+        skill_id = len(self.skills)
+        self.skills.append(name)
+        self.categories[name] = entry.get('category')
+        case_sensitive = set(entry.get('case_sensitive', []))
+        for term in [name] + list(entry.get('aliases', [])):
+            if term in case_sensitive:
+                continue
+            existing = self._folded.setdefault(term.casefold(), skill_id)
+            if existing != skill_id:
+                raise ValueError(f"Term '{term}' maps to both '{self.skills[existing]}' and '{name}'")
+        for term in case_sensitive:
+            self._exact[term] = skill_id
+
+    def _compile(self):
+        alternatives = []
+        if self._exact:
+            alternatives.append('(?-i:' + _trie_pattern(self._exact) + ')')
+        if self._folded:
+            alternatives.append(_trie_pattern(self._folded))
+        if not alternatives:
+            return re.compile(r'(?!)')
+        return re.compile(TERM_START + '(?:' + '|'.join(alternatives) + ')' + TERM_END, re.IGNORECASE)
+
+    def skill_id(self, name):
+        """Id of a canonical skill name, or None"""
+        skill_id = self._folded.get(name.casefold())
+        if skill_id is None:
+            skill_id = self._exact.get(name)
+        return skill_id
+
+    def extract_ids(self, text):
+        """Ids of all skills mentioned in text, in order of first mention"""
+        if not text:
+            return []
+        found = {}
+        exact = self._exact
+        folded = self._folded
+        for match in self.pattern.finditer(text):
+            term = match.group()
+            skill_id = exact.get(term)
+            if skill_id is None:
+                skill_id = folded.get(term.casefold())
+            if skill_id is not None:
+                found.setdefault(skill_id, None)
+        return list(found)
+
+    def extract(self, text):
+        """Canonical names of all skills mentioned in text, in order of first mention"""
+        skills = self.skills
+        return [skills[skill_id] for skill_id in self.extract_ids(text)]
+
+
+_default_matcher = None
+_default_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher(path=None):
+    """Process-wide matcher compiled once from the configured taxonomy file"""
+    global _default_matcher
+    with _default_matcher_lock:
+        if _default_matcher is None:
+            _default_matcher = SkillMatcher.from_file(path or os.environ.get('SKILL_TAXONOMY_FILE', DEFAULT_TAXONOMY_FILE))
+        return _default_matcher
@@ -0,0 +1,274 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+TASK_QUEUED = 'queued'
+TASK_RUNNING = 'running'
+TASK_COMPLETED = 'completed'
+TASK_FAILED = 'failed'
+TASK_CANCELLED = 'cancelled'
+FINISHED_STATES = (TASK_COMPLETED, TASK_FAILED, TASK_CANCELLED)
+
+# Running tasks without a heartbeat for this long are assumed orphaned
+STALE_TASK_SECONDS = 600
+
+
+class TaskCancelled(Exception):
+    """Raised inside a running task once cancellation has been requested"""
+
+
+class TaskContext:
+    """Handle passed to a task handler for reporting progress"""
+
+    def __init__(self, queue, task_id):
+        self.queue = queue
+        self.task_id = task_id
+
+    def update(self, stage=None, progress=None, message=None, partial_results=None):
+        """Persist progress and raise TaskCancelled if the task was cancelled"""
+        fields = {'updated_at': datetime.now()}
+        if stage is not None:
+            fields['stage'] = stage
+        if progress is not None:
+            fields['progress'] = max(0.0, min(1.0, progress))
+        if message is not None:
+            fields['message'] = message
+        if partial_results is not None:
+            fields['partial_results'] = json.dumps(partial_results, default=str)
+        self.queue._update(self.task_id, **fields)
+        self.check_cancelled()
+
+    def is_cancelled(self):
+        return self.queue._cancel_requested(self.task_id)
+
+    def check_cancelled(self):
+        if self.is_cancelled():
+            raise TaskCancelled(f"Task {self.task_id} was cancelled")
+
+
+class TaskQueue:
+    """Persistent task queue backed by an SQLite table and a local worker pool"""
+
+    def __init__(self, connect, handler, workers=2, poll_interval=1.0):
+        self.connect = connect
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        # Secrets (e.g. session cookies) are never written to the database,
+        # so tasks carrying them stay pinned to the process that accepted them
+        self._secrets = {}
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def init_schema(cursor):
+        """Create the task table and its indexes"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_tasks (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                params TEXT,
+                owner TEXT,
+                worker TEXT,
+                stage TEXT,
+                progress REAL DEFAULT 0,
+                message TEXT,
+                partial_results TEXT,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                created_at DATETIME,
+                started_at DATETIME,
+                updated_at DATETIME,
+                finished_at DATETIME
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON search_tasks(status, created_at)')
+
+    def start(self):
+        """Recover orphaned tasks and start the worker threads"""
+        with self._lock:
+            if self._threads:
+                return
+            self._recover_stale_tasks()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"task-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Started {self.workers} task workers ({self.worker_id})")
+
+    def submit(self, params, secrets=None):
+        """Queue a new task and return its id"""
+        task_id = uuid.uuid4().hex[:12]
+        now = datetime.now()
+        owner = self.worker_id if secrets else None
+        if secrets:
+            self._secrets[task_id] = secrets
+        conn = self.connect()
+        try:
+            conn.execute('''
+                INSERT INTO search_tasks (id, status, params, owner, stage, progress, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+            ''', (task_id, TASK_QUEUED, json.dumps(params), owner, TASK_QUEUED, now, now))
+            conn.commit()
+        finally:
+            conn.close()
+        self._wakeup.set()
+        logger.info(f"Queued task {task_id}")
+        return task_id
+
+    def get(self, task_id):
+        """Return the task row as a dict, or None if it does not exist"""
+        conn = self.connect()
+        try:
+            row = conn.execute('SELECT * FROM search_tasks WHERE id = ?', (task_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        task = dict(row)
+        for key in ('params', 'partial_results', 'result'):
+            if task.get(key):
+                task[key] = json.loads(task[key])
+        return task
+
+    def cancel(self, task_id):
+        """Cancel a queued task or flag a running one, return False if already finished"""
+        now = datetime.now()
+        conn = self.connect()
+        try:
+            cursor = conn.execute('''
+                UPDATE search_tasks SET status = ?, cancel_requested = 1, finished_at = ?, updated_at = ?
+                WHERE id = ? AND status = ?
+            ''', (TASK_CANCELLED, now, now, task_id, TASK_QUEUED))
+            if cursor.rowcount == 0:
+                cursor = conn.execute('''
+                    UPDATE search_tasks SET cancel_requested = 1, updated_at = ?
+                    WHERE id = ? AND status = ?
+                ''', (now, task_id, TASK_RUNNING))
+            conn.commit()
+            cancelled = cursor.rowcount > 0
+        finally:
+            conn.close()
+        if cancelled:
+            logger.info(f"Cancellation requested for task {task_id}")
+        return cancelled
+
+    def _worker_loop(self):
+        while True:
+            try:
+                task = self._claim()
+            except Exception as e:
+                logger.error(f"Task queue error: {e}")
+                task = None
+            if task is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run(*task)
+
+    def _claim(self):
+        """Atomically move the oldest runnable task to the running state"""
+        now = datetime.now()
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('''
+                SELECT id, params FROM search_tasks
+                WHERE status = ? AND (owner IS NULL OR owner = ?)
+                ORDER BY created_at LIMIT 1
+            ''', (TASK_QUEUED, self.worker_id)).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute('''
+                UPDATE search_tasks SET status = ?, worker = ?, stage = ?, started_at = ?, updated_at = ?
+                WHERE id = ?
+            ''', (TASK_RUNNING, self.worker_id, 'starting', now, now, row['id']))
+            conn.commit()
+            return row['id'], json.loads(row['params'] or '{}')
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _run(self, task_id, params):
+        context = TaskContext(self, task_id)
+        secrets = self._secrets.pop(task_id, None) or {}
+        logger.info(f"Running task {task_id}")
+        started = time.perf_counter()
+        try:
+            result = self.handler(params, secrets, context)
+            status = TASK_COMPLETED
+            self._finish(task_id, status, result=result)
+        except TaskCancelled:
+            logger.info(f"Task {task_id} cancelled")
+            status = TASK_CANCELLED
+            self._finish(task_id, status)
+        except Exception as e:
+            logger.error(f"Task {task_id} failed: {e}")
+            status = TASK_FAILED
+            self._finish(task_id, status, error=str(e))
+        metrics.TASKS.inc(status=status)
+        metrics.TASK_SECONDS.observe(time.perf_counter() - started, status=status)
+
+    def _finish(self, task_id, status, result=None, error=None):
+        now = datetime.now()
+        self._update(task_id, status=status, stage=status,
+                     progress=1.0 if status == TASK_COMPLETED else None,
+                     message=result.get('message') if isinstance(result, dict) else None,
+                     result=json.dumps(result, default=str) if result is not None else None,
+                     error=error, finished_at=now, updated_at=now)
+
+    def _update(self, task_id, **fields):
+        fields = {key: value for key, value in fields.items() if value is not None}
+        if not fields:
+            return
+        assignments = ', '.join(f"{key} = ?" for key in fields)
+        conn = self.connect()
+        try:
+            conn.execute(f'UPDATE search_tasks SET {assignments} WHERE id = ?', (*fields.values(), task_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _cancel_requested(self, task_id):
+        conn = self.connect()
+        try:
+            row = conn.execute('SELECT cancel_requested FROM search_tasks WHERE id = ?', (task_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row[0])
+
+    def _recover_stale_tasks(self):
+        """Re-queue tasks whose worker stopped sending heartbeats"""
+        cutoff = datetime.now() - timedelta(seconds=STALE_TASK_SECONDS)
+        conn = self.connect()
+        try:
+            cursor = conn.execute('''
+                UPDATE search_tasks SET status = ?, worker = NULL, stage = ?
+                WHERE status = ? AND (updated_at < ? OR worker = ?)
+            ''', (TASK_QUEUED, TASK_QUEUED, TASK_RUNNING, cutoff, self.worker_id))
+            # Pinned tasks lost their in-memory secrets, they cannot be resumed
+            conn.execute('''
+                UPDATE search_tasks SET status = ?, stage = ?, error = ?, finished_at = ?
+                WHERE status = ? AND owner IS NOT NULL AND owner != ? AND updated_at < ?
+            ''', (TASK_FAILED, TASK_FAILED, 'Worker restarted before the task could run',
+                  datetime.now(), TASK_QUEUED, self.worker_id, cutoff))
+            conn.commit()
+            if cursor.rowcount:
+                logger.info(f"Re-queued {cursor.rowcount} interrupted tasks")
+        finally:
+            conn.close()
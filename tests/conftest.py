@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DETAIL_CACHE_DIR', '')
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """app pointed at a fresh, migrated database in tmp_path"""
+    import app
+    monkeypatch.setattr(app, 'DATABASE', str(tmp_path / 'jobs.db'))
+    monkeypatch.setattr(app, 'deduper', None)
+    app.init_database()
+    yield app
+    conn = getattr(app._db_local, 'conn', None)
+    if conn is not None:
+        conn.release()
+        app._db_local.conn = None
@@ -0,0 +1,55 @@
+import pytest
+
+import saved_searches
+from browse import encode_cursor
+
+MALFORMED = ['not base64!', encode_cursor({'id': 1}), encode_cursor([]), encode_cursor([True]),
+             encode_cursor([None, 1]), encode_cursor(['a', 'b', 'c']), encode_cursor([2 ** 63])]
+
+
+@pytest.fixture
+def client(database):
+    return database.app.test_client()
+
+
+def delta_url(database):
+    saved = saved_searches.create(database.get_db_connection(), 'data engineer', 'Berlin', 25)
+    return f"/api/saved-searches/{saved['id']}/new"
+
+
+@pytest.mark.parametrize('url, cursor', [
+    ('/api/jobs', encode_cursor(['12'])),
+    ('/api/jobs', encode_cursor([1.5])),
+    ('/api/jobs', encode_cursor([12, '2026-10-01 12:00:00'])),
+    ('/api/sessions', encode_cursor([7])),
+    ('/api/sessions', encode_cursor(['2026-10-01 12:00:00', 7])),
+    ('/results', encode_cursor(['2026-10-01 12:00:00', 'a1b2c3d4'])),
+    ('/database', encode_cursor([12])),
+] + [(url, cursor) for url in ('/api/jobs', '/api/sessions', '/results', '/database') for cursor in MALFORMED])
+def test_malformed_browse_cursor_is_rejected(client, url, cursor):
+    assert client.get(url, query_string={'cursor': cursor}).status_code == 400
+
+
+@pytest.mark.parametrize('cursor', MALFORMED + [encode_cursor(['2026-10-01 12:00:00', 'a1b2c3d4']),
+                                                encode_cursor([12])])
+def test_malformed_delta_cursor_is_rejected(database, client, cursor):
+    response = client.get(delta_url(database), query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+@pytest.mark.parametrize('url, cursor', [
+    ('/api/jobs', encode_cursor([12])),
+    # Cursors handed out before jobs were paged by id alone
+    ('/api/jobs', encode_cursor(['2026-10-01 12:00:00', 12])),
+    ('/api/sessions', encode_cursor(['2026-10-01 12:00:00', 'a1b2c3d4'])),
+])
+def test_well_formed_cursor_is_accepted(client, url, cursor):
+    response = client.get(url, query_string={'cursor': cursor})
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+
+
+def test_well_formed_delta_cursor_is_accepted(database, client):
+    response = client.get(delta_url(database), query_string={'cursor': encode_cursor(['2026-10-01 12:00:00', 12])})
+    assert response.status_code == 200
@@ -0,0 +1,77 @@
+import time
+from datetime import datetime, timedelta
+
+from pipeline import DatabaseWriter
+from records import JobRecord
+
+URL = 'https://www.linkedin.com/jobs/view/4012345678'
+DESCRIPTION = 'Build data pipelines in Python and SQL.'
+
+
+def card():
+    return JobRecord('Data Engineer', 'Acme', 'Berlin', URL, 4012345678, '2026-10-01',
+                     '2026-10-01T12:00:00', 'public_api')
+
+
+def save(app, session_id, job):
+    writer = DatabaseWriter(app.get_db_connection, session_id, 'data engineer', 'Berlin', 25, False)
+    writer.open()
+    writer.write(job)
+    writer.close()
+
+
+def stored(app):
+    conn = app.get_db_connection()
+    description = conn.execute('SELECT description FROM jobs WHERE url = ?', (URL,)).fetchone()[0]
+    skills = sorted(row[0] for row in conn.execute('''
+        SELECT s.name FROM job_skills js JOIN skills s ON s.id = js.skill_id
+        JOIN jobs j ON j.id = js.job_id WHERE j.url = ?
+    ''', (URL,)))
+    return description, skills
+
+
+def enrich(app, job, details, monkeypatch):
+    scraper = app.AdvancedLinkedInScraper()
+    monkeypatch.setattr(scraper, 'get_job_details', lambda url: details)
+    return list(scraper.iter_enriched([job], max_workers=1))
+
+
+def test_failed_detail_fetch_keeps_stored_details(database, monkeypatch):
+    app = database
+    job = card()
+    job.set_details({'description': DESCRIPTION, 'skills': ['Python', 'SQL'], 'industry': 'Software'})
+    save(app, 'first', job)
+    assert stored(app) == (DESCRIPTION, ['Python', 'SQL'])
+
+    for placeholder in (app.TIMEOUT_DESCRIPTION, 'Error: connection reset'):
+        job = card()
+        [(job, success)] = enrich(app, job, {'description': placeholder, 'skills': [], 'industry': ''},
+                                  monkeypatch)
+        assert not success
+        assert not job.enriched and job.db_skills() is None
+        save(app, f'retry {placeholder}', job)
+        assert stored(app) == (DESCRIPTION, ['Python', 'SQL'])
+
+
+def test_upsert_ignores_placeholder_descriptions(database):
+    app = database
+    job = card()
+    job.set_details({'description': DESCRIPTION, 'skills': ['Python'], 'industry': ''})
+    save(app, 'first', job)
+    # Even a placeholder that reaches the writer does not replace the stored description
+    job = card()
+    job.set_details({'description': app.TIMEOUT_DESCRIPTION, 'skills': ['Python'], 'industry': ''})
+    save(app, 'second', job)
+    assert stored(app) == (DESCRIPTION, ['Python'])
+
+
+def test_deadline_replaces_search_time_budget(database, monkeypatch):
+    app = database
+    scraper = app.AdvancedLinkedInScraper()
+    monkeypatch.setattr(scraper, 'get_job_details',
+                        lambda url: {'description': DESCRIPTION, 'skills': [], 'industry': ''})
+    # A crawl's scraper outlives the search budget; each page passes its own deadline
+    scraper.start_time = datetime.now() - timedelta(seconds=app.ENRICH_TIME_BUDGET + 1)
+    assert [success for _, success in scraper.iter_enriched([card()], max_workers=1)] == [False]
+    enriched = scraper.iter_enriched([card()], max_workers=1, deadline=time.time() + 60)
+    assert [success for _, success in enriched] == [True]
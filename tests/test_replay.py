@@ -0,0 +1,54 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from replay import MANIFEST, RecordingAdapter
+
+HEAD = b'<html><body><ul class="description__job-criteria-list"><li>Full-time</li></ul>'
+PAGE = HEAD + b'<p>' + b'x' * 200_000 + b'</p></body></html>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_recording_keeps_early_stop(database, server, tmp_path):
+    app = database
+    adapter = RecordingAdapter(str(tmp_path / 'recording'))
+    scraper = app.AdvancedLinkedInScraper(transport=adapter)
+    _, body = scraper._request(f'{server}/jobs/view/1', 'detail', stop_after=app.DETAIL_STOP_AFTER)
+    assert body.truncated and body.content == HEAD
+    _, body = scraper._request(f'{server}/jobs/view/2', 'detail')
+    assert not body.truncated
+
+    manifest = json.loads((tmp_path / 'recording' / MANIFEST).read_text())
+    entries = {key.rsplit('/', 1)[-1]: entry for key, entry in manifest.items()}
+    assert entries['1']['truncated'] is True
+    assert (tmp_path / 'recording' / entries['1']['body']).read_bytes() == HEAD
+    assert 'truncated' not in entries['2']
+    assert (tmp_path / 'recording' / entries['2']['body']).read_bytes() == PAGE
+
+    # The pools are shared by every scraper; one closing its session leaves them open
+    scraper.session.close()
+    assert adapter.poolmanager.pools
+    assert app.AdvancedLinkedInScraper(transport=adapter)._request(f'{server}/jobs/view/3', 'detail')[1].content == PAGE
+    adapter.shutdown()
@@ -0,0 +1,284 @@
+import http.client
+import logging
+import threading
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from types import SimpleNamespace
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_ACCEPT_ENCODING, get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import metrics
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Only advertise the content codings the installed decoders can undo
+ACCEPT_ENCODING = DEFAULT_ACCEPT_ENCODING
+STREAM_CHUNK_BYTES = 16 * 1024
+# After an early stop, a rest of the body this small is read and dropped so
+# the connection can go back to the pool; a longer one closes the connection
+DRAIN_BYTES = 64 * 1024
+# Not allowed (or meaningless) on HTTP/2
+HOP_BY_HOP_HEADERS = ('connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade')
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        metrics.HTTP_CONNECTIONS_OPENED.inc(host=self.host)
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        metrics.HTTP_CONNECTIONS_OPENED.inc(host=self.host)
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools count every connection they (re)open
+
+    Requests per host minus connections opened is how often keep-alive
+    saved a TCP and TLS handshake.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def close(self):
+        # Shared by every scraper: a Session closing must not close the pools for the others
+        pass
+
+    def shutdown(self):
+        super().close()
+
+
+class _HTTPXBody:
+    """File-like view of a streamed httpx response, enough for requests' iter_content"""
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = response.iter_bytes(STREAM_CHUNK_BYTES)
+        self._buffer = b''
+        self.version = 20 if response.http_version == 'HTTP/2' else 11
+        # What requests reads Set-Cookie headers from, so the Session's cookie jar is kept up to date
+        message = http.client.HTTPMessage()
+        for name, value in response.headers.multi_items():
+            message[name] = value
+        self._original_response = SimpleNamespace(msg=message)
+
+    def read(self, amt=None):
+        while self._chunks is not None and (amt is None or len(self._buffer) < amt):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._chunks = None
+                break
+            self._buffer += chunk
+        if amt is None:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self):
+        self._chunks = None
+        self._response.close()
+
+
+class HTTPXAdapter(BaseAdapter):
+    """requests adapter sending through one shared httpx client, with HTTP/2 when the server offers it
+
+    Many requests to the same host are multiplexed over one connection, and
+    a request stopped early resets only its own stream, not the connection.
+    Cookies live in each requests.Session: the shared client keeps none.
+    """
+
+    def __init__(self, pool_size, http2=True):
+        super().__init__()
+        self.client = httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+            follow_redirects=False,
+        )
+
+    @staticmethod
+    def _timeout(timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        headers = {name: value for name, value in request.headers.items()
+                   if name.lower() not in HOP_BY_HOP_HEADERS}
+        try:
+            upstream = self.client.send(
+                self.client.build_request(request.method, request.url, headers=headers, content=request.body,
+                                          timeout=self._timeout(timeout)),
+                stream=True)
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(e, request=request)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+        response = requests.Response()
+        response.status_code = upstream.status_code
+        response.reason = upstream.reason_phrase
+        response.headers = CaseInsensitiveDict(upstream.headers.multi_items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _HTTPXBody(upstream)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        if not stream:
+            try:
+                response.content
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.ReadTimeout(e, request=request)
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(e, request=request)
+        return response
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        self.client.close()
+
+
+def create_adapter(pool_size, http2=False):
+    """Network adapter for pool_size concurrent requests: httpx with HTTP/2 if asked for and installed"""
+    if http2:
+        if httpx is None:
+            logger.warning("HTTP/2 needs httpx (pip install 'httpx[http2]'), using HTTP/1.1")
+        else:
+            try:
+                return HTTPXAdapter(pool_size)
+            except ImportError as e:  # httpx without the h2 extra
+                logger.warning(f"HTTP/2 unavailable ({e}), using HTTP/1.1")
+    return PooledAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+
+_shared_adapter = None
+_shared_adapter_lock = threading.Lock()
+
+
+def shared_adapter(factory):
+    """The process-wide adapter, created by factory() on first use
+
+    Every scraper mounts the same adapter, so keep-alive connections are
+    reused from one search to the next. Each scraper still has its own
+    requests.Session, so cookies (and the li_at login) never cross searches.
+    """
+    global _shared_adapter
+    with _shared_adapter_lock:
+        if _shared_adapter is None:
+            _shared_adapter = factory()
+        return _shared_adapter
+
+
+def reset_shared_adapter():
+    global _shared_adapter
+    with _shared_adapter_lock:
+        if _shared_adapter is not None:
+            getattr(_shared_adapter, 'shutdown', _shared_adapter.close)()
+        _shared_adapter = None
+
+
+class Body:
+    """A response body as read by read_body; truncated if reading stopped before its end"""
+
+    __slots__ = ('content', 'encoding', 'truncated')
+
+    def __init__(self, content, encoding=None, truncated=False):
+        self.content = content
+        self.encoding = encoding
+        self.truncated = truncated
+
+    @property
+    def text(self):
+        return str(self.content, self.encoding or 'utf-8', errors='replace')
+
+
+def read_body(response, stop_after=None, max_bytes=None):
+    """Read a response body, stopping early once it holds all that is needed
+
+    stop_after is a (start, end) pair of byte strings: reading stops at the
+    first end after start. max_bytes caps the body regardless. Only a
+    streamed response can stop early; any other is already read and is
+    just cut. Returns a Body, truncated when the rest was skipped.
+    """
+    body = bytearray()
+    start_at = -1
+    truncated = False
+    for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+        scan_from = max(0, len(body) - 64)
+        body += chunk
+        if stop_after:
+            start, end = stop_after
+            if start_at < 0:
+                start_at = body.find(start, scan_from)
+            if start_at >= 0:
+                end_at = body.find(end, max(start_at, scan_from))
+                if end_at >= 0:
+                    truncated = end_at + len(end) < len(body)
+                    del body[end_at + len(end):]
+                    break
+        if max_bytes and len(body) >= max_bytes:
+            truncated = len(body) > max_bytes
+            del body[max_bytes:]
+            break
+    else:
+        return Body(bytes(body), response.encoding)
+    # Stopped at the marker or the cap: whatever is left unread is skipped too
+    left = _finish(response)
+    return Body(bytes(body), response.encoding, truncated or left)
+
+
+def _finish(response):
+    """Drop the unread rest of a body, keeping the connection when that is cheap
+
+    Returns False only if nothing was left, as far as can be told.
+    """
+    raw = response.raw
+    if raw is None:
+        return True
+    length = response.headers.get('Content-Length', '')
+    tell = getattr(raw, 'tell', None)
+    if tell and length.isdigit() and int(length) - tell() <= DRAIN_BYTES:
+        try:
+            left = False
+            while raw.read(STREAM_CHUNK_BYTES, decode_content=False):
+                left = True
+            raw.release_conn()
+            return left
+        except Exception:
+            pass
+    raw.close()
+    # Hands the closed connection back, the pool reconnects it when next needed
+    release = getattr(raw, 'release_conn', None)
+    if release:
+        release()
+    return True